@@ -5,4 +5,8 @@ set -o errexit
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+python manage.py backfill_coordinates
+python manage.py rebuild_donor_search_index
+python manage.py build_donor_snapshot
+python manage.py rebuild_blood_supply
@@ -3,6 +3,10 @@ ASGI config for roktodanbd project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production serves it with gunicorn and uvicorn workers (see start.sh), so
+the live request event stream (``/events/requests/``) holds a coroutine per
+donor rather than a worker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
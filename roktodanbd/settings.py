@@ -122,6 +122,88 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Caches. "default" is shared by every worker and node: file-based unless
+# CACHE_BACKEND/CACHE_LOCATION point it at e.g. Redis in production.
+# "tiered" puts a small per-process LRU in front of it, with per-namespace
+# version stamps for invalidation (roktodanbdweb/tiered_cache.py). Nothing
+# relies on the backend's add() or incr() being atomic, which file-based
+# caching does not guarantee: stamps are replaced rather than incremented,
+# and the donor-search lock is a database row.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    },
+    'tiered': {
+        'BACKEND': 'roktodanbdweb.tiered_cache.TieredCache',
+        'LOCATION': 'tiered',
+        'OPTIONS': {
+            'SHARED': 'default',
+            'MAX_ENTRIES': config('L1_CACHE_MAX_ENTRIES', default=1000, cast=int),
+            'LOCAL_TIMEOUT': config('L1_CACHE_TIMEOUT', default=300, cast=int),
+            'STAMP_INTERVAL': config('L1_CACHE_STAMP_INTERVAL', default=1, cast=float),
+        },
+    },
+}
+
+# find_blood under database stress (roktodanbdweb/donor_search.py): a result
+# up to SEARCH_STALE_GRACE seconds old is served while it is recomputed in the
+# background. Once searches average over SEARCH_SLOW_QUERY_SECONDS, any cached
+# result up to SEARCH_STALE_MAX_AGE seconds old is served instead of waiting.
+SEARCH_STALE_GRACE = config('SEARCH_STALE_GRACE', default=120, cast=int)
+SEARCH_STALE_MAX_AGE = config('SEARCH_STALE_MAX_AGE', default=1800, cast=int)
+SEARCH_SLOW_QUERY_SECONDS = config('SEARCH_SLOW_QUERY_SECONDS', default=1.5, cast=float)
+# Identical searches from several workers: one computes under a lock (a
+# SearchLock row) that expires after SEARCH_LOCK_TIMEOUT seconds, and the
+# others wait up to SEARCH_LOCK_WAIT seconds for its result before computing
+# it themselves.
+SEARCH_LOCK_TIMEOUT = config('SEARCH_LOCK_TIMEOUT', default=10, cast=int)
+SEARCH_LOCK_WAIT = config('SEARCH_LOCK_WAIT', default=2.0, cast=float)
+
+# Memory-mapped donor snapshot shared by all workers (see roktodanbdweb/donor_snapshot.py).
+# Rebuild with `manage.py build_donor_snapshot`; searches fall back to the
+# database once the file is older than DONOR_SNAPSHOT_MAX_AGE seconds.
+DONOR_SNAPSHOT_PATH = config('DONOR_SNAPSHOT_PATH', default=str(BASE_DIR / 'donor_snapshot.bin'))
+DONOR_SNAPSHOT_MAX_AGE = config('DONOR_SNAPSHOT_MAX_AGE', default=86400, cast=int)
+DONOR_SNAPSHOT_REFRESH_INTERVAL = config('DONOR_SNAPSHOT_REFRESH_INTERVAL', default=30, cast=int)
+
+# In-process donor bitmap index (roktodanbdweb/donor_bitmaps.py): how often a
+# worker folds in donor changes saved by other processes
+DONOR_BITMAP_REFRESH_INTERVAL = config('DONOR_BITMAP_REFRESH_INTERVAL', default=30, cast=int)
+# ...and how many seconds before the newest last_updated it has seen a
+# refresh re-reads, for rows whose transaction committed after a later one
+DONOR_BITMAP_REFRESH_OVERLAP = config('DONOR_BITMAP_REFRESH_OVERLAP', default=120, cast=int)
+
+# Live request events (roktodanbdweb/request_events.py): how often each
+# process checks for new requests, and the idle gap between keepalive comments
+SSE_POLL_INTERVAL = config('SSE_POLL_INTERVAL', default=2, cast=float)
+SSE_KEEPALIVE = config('SSE_KEEPALIVE', default=15, cast=int)
+
+# Blood-supply matrix (roktodanbdweb/blood_supply.py): how long the JSON
+# served to the home page and admin heatmap may lag donor changes
+BLOOD_SUPPLY_CACHE_TIMEOUT = config('BLOOD_SUPPLY_CACHE_TIMEOUT', default=60, cast=int)
+
+# Admin changelists (roktodanbdweb/admin_lists.py): results are counted
+# exactly up to ADMIN_EXACT_COUNT_LIMIT rows, beyond that PostgreSQL's planner
+# estimate is shown. Date hierarchy links are cached for
+# ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT seconds.
+ADMIN_EXACT_COUNT_LIMIT = config('ADMIN_EXACT_COUNT_LIMIT', default=10000, cast=int)
+ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT = config('ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT', default=300, cast=int)
+
+# Admin bulk actions (roktodanbdweb/bulk_actions.py): actions over more than
+# ADMIN_BULK_ACTION_BACKGROUND_THRESHOLD rows run on a background thread.
+# Reminders are queued OUTBOX_BATCH_SIZE at a time and sent by
+# `manage.py send_outbox`; "Award bonus points" gives ADMIN_BONUS_POINTS.
+ADMIN_BULK_ACTION_BACKGROUND_THRESHOLD = config('ADMIN_BULK_ACTION_BACKGROUND_THRESHOLD', default=5000, cast=int)
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=500, cast=int)
+ADMIN_BONUS_POINTS = config('ADMIN_BONUS_POINTS', default=100, cast=int)
+
+# Full-page cache for anonymous visitors (roktodanbdweb/page_cache.py). Pages
+# are keyed by DEPLOY_VERSION, so each release starts with an empty cache;
+# on Render the commit id is used when it is not set.
+DEPLOY_VERSION = config('DEPLOY_VERSION', default=os.environ.get('RENDER_GIT_COMMIT', 'dev'))
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+
 # Email Configuration
 EMAIL_BACKEND = config(
     'EMAIL_BACKEND',
@@ -40,6 +40,7 @@ urlpatterns = [
     path('blood-requests/', views.blood_request_list, name='blood_request_list'),
     path('emergency-requests/', views.emergency_requests, name='emergency_requests'),
     path('track-requests/', views.track_requests, name='track_requests'),
+    path('track-requests/updates/', views.track_requests_updates, name='track_requests_updates'),
     path('respond-to-request/<int:request_id>/', views.respond_to_request, name='respond_to_request'),
 
     # Rewards & Matching
@@ -49,6 +50,18 @@ urlpatterns = [
     # Blood request URLs
     path('show-request-form/<int:donor_id>/', views.show_request_form, name='show_request_form'),
     path('request-blood/<int:donor_id>/', views.request_blood_from_donor, name='request_blood_from_donor'),
+
+    # Location hierarchy (district -> thana -> post office) for dependent dropdowns
+    path('api/locations/', views.location_index, name='location_index'),
+    path('api/locations/<str:version>/<int:district_id>/', views.location_district, name='location_district'),
+    path('api/hospitals/', views.hospital_autocomplete, name='hospital_autocomplete'),
+    path('api/blood-supply/', views.blood_supply, name='blood_supply'),
+    path('api/donor-counts/', views.donor_counts, name='donor_counts'),
+    path('api/cache-stats/', views.cache_stats, name='cache_stats'),
+    path('api/people-lookup/', views.people_lookup, name='people_lookup'),
+
+    # Server-Sent Events: new urgent requests for the signed-in donor
+    path('events/requests/', views.request_events, name='request_events'),
 ]
 
 # Serve media files (profile images, uploads) during development
@@ -1,13 +1,19 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.contrib.auth.hashers import make_password
+from django.db.models import Count, Q
 from .models import Donor, Recipient, DonationHistory, BloodRequest, DonorResponse
 from .models import DonorPoints, PointTransaction, DonorBadge, WithdrawalRequest
+from .models import District, Thana, PostOffice, Hospital
+from . import bulk_actions
+from .admin_lists import AutocompleteFilter, PeopleSearchMixin, ScalableAdminMixin
 
 class DonorInline(admin.StackedInline):
     """
@@ -17,19 +23,20 @@ class DonorInline(admin.StackedInline):
     can_delete = False
     verbose_name = "Donor Profile"
     verbose_name_plural = "Donor Profiles"
+    # Name and email live on the user form above
     fields = (
-        ('first_name', 'last_name'),
-        ('phone_number', 'email'),
+        'phone_number',
         ('age', 'weight', 'blood_group'),
         ('house_holding_no', 'road_block'),
         ('thana', 'post_office', 'district'),
         ('last_donation_month', 'last_donation_year'),
         'profile_image',
     )
+    autocomplete_fields = ('thana', 'post_office', 'district')
 
 
 @admin.register(Donor)
-class DonorAdmin(admin.ModelAdmin):
+class DonorAdmin(PeopleSearchMixin, ScalableAdminMixin, admin.ModelAdmin):
     """
     Enhanced Donor admin with comprehensive management features
     """
@@ -49,25 +56,17 @@ class DonorAdmin(admin.ModelAdmin):
 
     list_filter = (
         'blood_group',
-        'thana',
-        'district',
+        ('thana', AutocompleteFilter),
+        ('district', AutocompleteFilter),
         'age',
         'last_donation_month',
         'last_donation_year',
         'user__date_joined',
     )
 
-    search_fields = (
-        'first_name',
-        'last_name',
-        'user__first_name',
-        'user__last_name',
-        'user__email',
-        'phone_number',
-        'thana',
-        'district',
-        'house_holding_no'
-    )
+    # Names, phone and email through search_document (PeopleSearchMixin)
+    search_fields = ('search_document',)
+    people_search_extra_fields = ('house_holding_no', 'thana__name', 'district__name')
 
     readonly_fields = (
         'user',
@@ -76,12 +75,13 @@ class DonorAdmin(admin.ModelAdmin):
         'get_full_address',
         'get_donation_eligibility'
     )
+    autocomplete_fields = ('thana', 'post_office', 'district')
 
     fieldsets = (
         ('Personal Information', {
             'fields': (
+                # Names are edited on the linked user account
                 'get_user_info',
-                ('first_name', 'last_name'),
                 'age',
                 'weight',
                 'blood_group',
@@ -216,7 +216,7 @@ class DonorAdmin(admin.ModelAdmin):
             obj.post_office,
             obj.district
         ]
-        return ", ".join([part for part in address_parts if part])
+        return ", ".join(str(part) for part in address_parts if part)
 
     get_full_address.short_description = "Full Address"
 
@@ -263,52 +263,68 @@ class DonorAdmin(admin.ModelAdmin):
         }
         return months.get(month_name, 1)
 
-    # Custom admin actions
+    # Custom admin actions, set-based (see bulk_actions.py)
     def mark_as_available(self, request, queryset):
-        self.message_user(request, 'Availability feature will be implemented soon.')
+        bulk_actions.run_action(
+            self, request, queryset, bulk_actions.set_availability, True,
+            done='{} donors marked as available.',
+            started='Marking {} donors as available in the background.',
+        )
 
     mark_as_available.short_description = "Mark selected donors as available"
 
     def mark_as_unavailable(self, request, queryset):
-        self.message_user(request, 'Availability feature will be implemented soon.')
+        bulk_actions.run_action(
+            self, request, queryset, bulk_actions.set_availability, False,
+            done='{} donors marked as unavailable.',
+            started='Marking {} donors as unavailable in the background.',
+        )
 
     mark_as_unavailable.short_description = "Mark selected donors as unavailable"
 
     def send_donation_reminder(self, request, queryset):
-        count = queryset.count()
-        self.message_user(
-            request,
-            f'Donation reminders will be sent to {count} donors (feature coming soon).'
+        bulk_actions.run_action(
+            self, request, queryset, bulk_actions.enqueue_donation_reminders,
+            done='Donation reminders queued for {} donors.',
+            started='Queueing donation reminders for {} donors in the background.',
         )
 
     send_donation_reminder.short_description = "Send donation reminder"
 
     def export_donor_list(self, request, queryset):
-        count = queryset.count()
-        self.message_user(
-            request,
-            f'Export feature for {count} donors coming soon.'
-        )
+        # Streamed from one cursor, so any number of donors fits in the request
+        response = StreamingHttpResponse(bulk_actions.donor_csv_rows(queryset), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="donors-{timezone.localdate():%Y-%m-%d}.csv"'
+        return response
 
     export_donor_list.short_description = "Export donor list"
 
     # Override get_queryset to add optimizations
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.select_related('user')
+        return queryset.select_related('user', 'thana', 'post_office', 'district')
 
 
 @admin.register(Recipient)
-class RecipientAdmin(admin.ModelAdmin):
+class RecipientAdmin(PeopleSearchMixin, ScalableAdminMixin, admin.ModelAdmin):
     list_display = [
         'full_name', 'blood_group', 'phone_number',
         'user_email', 'thana', 'district', 'created_at', 'is_active', 'has_user_account'
     ]
-    list_filter = ['blood_group', 'thana', 'district', 'is_active', 'created_at', 'user']
-    search_fields = ['first_name', 'last_name', 'email', 'phone_number', 'user__email',
-                     'user__first_name', 'user__last_name']
+    list_filter = [
+        'blood_group',
+        ('thana', AutocompleteFilter),
+        ('district', AutocompleteFilter),
+        'is_active',
+        'created_at',
+        ('user', AutocompleteFilter),
+    ]
+    # Names, phone and email through search_document (PeopleSearchMixin)
+    search_fields = ['search_document']
+    people_search_extra_fields = ('house_holding_no', 'thana__name', 'district__name')
     list_editable = ['is_active']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'has_user_account_display']
+    autocomplete_fields = ['user', 'thana', 'post_office', 'district']
 
     fieldsets = (
         ('User Account', {
@@ -359,7 +375,7 @@ class RecipientAdmin(admin.ModelAdmin):
     has_user_account_display.short_description = 'User Account Status'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user')
+        return super().get_queryset(request).select_related('user', 'thana', 'district')
 
     actions = ['create_user_accounts_for_selected']
 
@@ -400,12 +416,13 @@ class RecipientAdmin(admin.ModelAdmin):
 
 
 @admin.register(DonationHistory)
-class DonationHistoryAdmin(admin.ModelAdmin):
+class DonationHistoryAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['get_donor_name', 'donation_date', 'recipient_name', 'blood_group', 'status', 'location', 'amount']
     list_filter = ['status', 'blood_group', 'donation_date', 'location']
     search_fields = ['donor__user__first_name', 'donor__user__last_name', 'recipient_name', 'hospital_name', 'location']
     date_hierarchy = 'donation_date'
     readonly_fields = ['created_at', 'updated_at']
+    autocomplete_fields = ['donor', 'hospital']
     list_per_page = 25
     ordering = ['-donation_date']
 
@@ -414,7 +431,7 @@ class DonationHistoryAdmin(admin.ModelAdmin):
             'fields': ('donor', 'donation_date', 'blood_group', 'amount', 'status')
         }),
         ('Recipient Information', {
-            'fields': ('recipient_name', 'hospital_name', 'location', 'contact_number')
+            'fields': ('recipient_name', 'hospital_name', 'hospital', 'location', 'contact_number')
         }),
         ('Additional Information', {
             'fields': ('notes', 'created_at', 'updated_at'),
@@ -439,13 +456,19 @@ class DonationHistoryAdmin(admin.ModelAdmin):
     actions = ['mark_as_completed', 'mark_as_pending', 'export_donation_history']
 
     def mark_as_completed(self, request, queryset):
+        donor_ids = set(queryset.values_list('donor_id', flat=True))
         updated = queryset.update(status='completed')
+        # update() skips the DonationHistory signals, so refresh the counters here
+        Donor.refresh_donation_counters(donor_ids)
         self.message_user(request, f'{updated} donation records marked as completed.')
 
     mark_as_completed.short_description = "Mark selected donations as completed"
 
     def mark_as_pending(self, request, queryset):
+        donor_ids = set(queryset.values_list('donor_id', flat=True))
         updated = queryset.update(status='pending')
+        # update() skips the DonationHistory signals, so refresh the counters here
+        Donor.refresh_donation_counters(donor_ids)
         self.message_user(request, f'{updated} donation records marked as pending.')
 
     mark_as_pending.short_description = "Mark selected donations as pending"
@@ -462,9 +485,10 @@ class RecipientInline(admin.StackedInline):
     can_delete = False
     verbose_name_plural = 'Recipient Profile'
     fields = ('blood_group', 'phone_number', 'house_holding_no', 'road_block', 'thana', 'is_active')
+    autocomplete_fields = ('thana',)
 
 
-class CustomUserAdmin(BaseUserAdmin):
+class CustomUserAdmin(ScalableAdminMixin, BaseUserAdmin):
     """
     Custom User admin that includes Donor and Recipient profiles
     """
@@ -478,29 +502,35 @@ class CustomUserAdmin(BaseUserAdmin):
             inline_instances.append(DonorInline(self.model, self.admin_site))
 
         # Only show recipient inline if user has a recipient profile
-        if obj and hasattr(obj, 'recipient'):
+        if obj and hasattr(obj, 'recipient_profile'):
             inline_instances.append(RecipientInline(self.model, self.admin_site))
 
         return inline_instances
 
 @admin.register(BloodRequest)
-class BloodRequestAdmin(admin.ModelAdmin):
+class BloodRequestAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['patient_name', 'blood_group_needed', 'hospital_name', 'urgency_level', 'status', 'created_at']
-    list_filter = ['blood_group_needed', 'urgency_level', 'status', 'thana', 'created_at']
+    list_filter = ['blood_group_needed', 'urgency_level', 'status', ('thana', AutocompleteFilter), 'created_at']
     search_fields = ['patient_name', 'hospital_name', 'contact_person']
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
+    autocomplete_fields = ['recipient', 'hospital', 'thana', 'district']
 
 @admin.register(DonorResponse)
-class DonorResponseAdmin(admin.ModelAdmin):
+class DonorResponseAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['donor', 'blood_request', 'response', 'response_date']
     list_filter = ['response', 'response_date']
     search_fields = ['donor__user__first_name', 'donor__user__last_name', 'blood_request__patient_name']
     ordering = ['-response_date']
+    autocomplete_fields = ['donor', 'blood_request']
+
+    def get_queryset(self, request):
+        # Donor.__str__ reads the user and thana
+        return super().get_queryset(request).select_related('donor__user', 'donor__thana', 'blood_request')
 
 
 @admin.register(DonorPoints)
-class DonorPointsAdmin(admin.ModelAdmin):
+class DonorPointsAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = [
         'get_donor_name',
         'total_points',
@@ -511,6 +541,7 @@ class DonorPointsAdmin(admin.ModelAdmin):
     list_filter = ['last_updated']
     search_fields = ['donor__user__first_name', 'donor__user__last_name', 'donor__phone_number']
     readonly_fields = ['last_updated', 'get_donor_info', 'get_transaction_summary']
+    autocomplete_fields = ['donor']
 
     fieldsets = (
         ('Donor Information', {
@@ -537,7 +568,7 @@ class DonorPointsAdmin(admin.ModelAdmin):
     get_donor_name.admin_order_field = 'donor__user__first_name'
 
     def get_donor_info(self, obj):
-        donor_link = reverse('admin:myapp_donor_change', args=[obj.donor.pk])
+        donor_link = reverse('admin:roktodanbdweb_donor_change', args=[obj.donor.pk])
         return format_html(
             '<a href="{}" target="_blank">{} ({})</a>',
             donor_link,
@@ -548,33 +579,49 @@ class DonorPointsAdmin(admin.ModelAdmin):
     get_donor_info.short_description = "Donor Details"
 
     def get_transaction_summary(self, obj):
-        earned_count = obj.transactions.filter(transaction_type='earned').count()
-        withdrawn_count = obj.transactions.filter(transaction_type='withdrawn').count()
+        counts = obj.transactions.aggregate(
+            earned=Count('pk', filter=Q(transaction_type='earned')),
+            withdrawn=Count('pk', filter=Q(transaction_type='withdrawn')),
+        )
         return format_html(
             '<div>Earned Transactions: <strong>{}</strong></div>'
             '<div>Withdrawn Transactions: <strong>{}</strong></div>',
-            earned_count, withdrawn_count
+            counts['earned'], counts['withdrawn']
         )
 
     get_transaction_summary.short_description = "Transaction Summary"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('donor__user')
+
     actions = ['award_bonus_points', 'reset_points']
 
     def award_bonus_points(self, request, queryset):
-        count = queryset.count()
-        self.message_user(request, f'Bonus points feature for {count} donors coming soon.')
+        points = settings.ADMIN_BONUS_POINTS
+        bulk_actions.run_action(
+            self, request, queryset, bulk_actions.award_bonus_points, points,
+            done=f'{points} bonus points awarded to {{}} donors.',
+            started=f'Awarding {points} bonus points to {{}} donors in the background.',
+        )
 
     award_bonus_points.short_description = "Award bonus points"
 
     def reset_points(self, request, queryset):
-        count = queryset.count()
-        self.message_user(request, f'Point reset feature for {count} donors coming soon.')
+        bulk_actions.run_action(
+            self, request, queryset, bulk_actions.reset_points,
+            done='Available points reset for {} donors.',
+            started='Resetting available points for {} donors in the background.',
+        )
 
     reset_points.short_description = "Reset points (Admin only)"
+    reset_points.allowed_permissions = ('reset_points',)
+
+    def has_reset_points_permission(self, request):
+        return request.user.is_superuser
 
 
 @admin.register(PointTransaction)
-class PointTransactionAdmin(admin.ModelAdmin):
+class PointTransactionAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = [
         'get_donor_name',
         'transaction_type',
@@ -589,6 +636,7 @@ class PointTransactionAdmin(admin.ModelAdmin):
         'description'
     ]
     readonly_fields = ['created_at']
+    autocomplete_fields = ['donor_points']
 
     fieldsets = (
         ('Transaction Details', {
@@ -618,7 +666,7 @@ class PointTransactionAdmin(admin.ModelAdmin):
 
 
 @admin.register(DonorBadge)
-class DonorBadgeAdmin(admin.ModelAdmin):
+class DonorBadgeAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = [
         'get_donor_name',
         'get_badge_display',
@@ -632,6 +680,7 @@ class DonorBadgeAdmin(admin.ModelAdmin):
         'donor__phone_number'
     ]
     readonly_fields = ['earned_date', 'get_badge_icon']
+    autocomplete_fields = ['donor']
 
     fieldsets = (
         ('Badge Information', {
@@ -685,10 +734,13 @@ class DonorBadgeAdmin(admin.ModelAdmin):
         }
         return colors.get(badge_type, '6c757d')  # Default to grey if badge_type not found
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('donor__user')
+
 
 
 @admin.register(WithdrawalRequest)
-class WithdrawalRequestAdmin(admin.ModelAdmin):
+class WithdrawalRequestAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = [
         'get_donor_name',
         'points_requested',
@@ -698,17 +750,19 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'requested_at']
     search_fields = [
-        'donor_points__donor__user__first_name',
-        'donor_points__donor__user__last_name',
-        'donor_points__donor__phone_number'
+        'donor__user__first_name',
+        'donor__user__last_name',
+        'donor__phone_number'
     ]
     readonly_fields = ['requested_at', 'processed_at']
+    autocomplete_fields = ['donor']
 
     fieldsets = (
         ('Withdrawal Details', {
             'fields': (
-                'donor_points',
+                'donor',
                 'points_requested',
+                'amount_bdt',
                 'status',
             )
         }),
@@ -719,14 +773,44 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
     )
 
     def get_donor_name(self, obj):
-        return obj.donor_points.donor.full_name
+        return obj.donor.full_name
     get_donor_name.short_description = "Donor"
-    get_donor_name.admin_order_field = 'donor_points__donor__user__first_name'
+    get_donor_name.admin_order_field = 'donor__user__first_name'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related(
-            'donor_points__donor__user'
-        )
+        return super().get_queryset(request).select_related('donor__user')
+
+@admin.register(District)
+class DistrictAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['name', 'division']
+    list_filter = ['division']
+    search_fields = ['name']
+
+
+@admin.register(Thana)
+class ThanaAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['name', 'district', 'latitude', 'longitude']
+    list_filter = ['district__division']
+    search_fields = ['name', 'district__name']
+    list_select_related = ['district']
+
+
+@admin.register(PostOffice)
+class PostOfficeAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['name', 'thana', 'district']
+    search_fields = ['name', 'district__name']
+    list_select_related = ['thana', 'district']
+    autocomplete_fields = ['district', 'thana']
+
+
+@admin.register(Hospital)
+class HospitalAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['name', 'thana', 'district', 'latitude', 'longitude', 'approximate_location', 'is_active']
+    list_filter = ['is_active', 'approximate_location', ('district', AutocompleteFilter)]
+    search_fields = ['name', 'aliases', 'address', 'thana__name']
+    list_select_related = ['thana', 'district']
+    autocomplete_fields = ['district', 'thana']
+
 
 # Unregister the default User admin and register our custom one
 admin.site.unregister(User)
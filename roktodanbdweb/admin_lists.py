@@ -0,0 +1,155 @@
+# roktodanbdweb/admin_lists.py
+"""
+Admin changelists that stay fast on large tables.
+
+* ``EstimatedCountPaginator`` avoids an exact COUNT(*) over large results.
+  On PostgreSQL it uses the planner's estimate once that estimate passes
+  ADMIN_EXACT_COUNT_LIMIT. Otherwise it counts at most
+  ADMIN_EXACT_COUNT_LIMIT + 1 rows, so the page count stops at the limit.
+* ``AutocompleteFilter`` replaces the sidebar list of every related row with
+  a search box that uses the admin autocomplete view. The related model's
+  admin needs ``search_fields``.
+* ``ScalableAdminMixin`` uses both and skips the second, unfiltered count
+  that changelists run to show "N of M results".
+* ``PeopleSearchMixin`` answers the search box from the indexed
+  ``search_document`` column (see people_search.py) and lists the best
+  matches first. Rows whose ``people_search_extra_fields`` (address and
+  location) contain every query word are listed after them.
+
+Date hierarchies are cached by the ``cached_date_hierarchy`` tag (see
+templatetags/admin_lists.py and templates/admin/change_list.html).
+"""
+import json
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .people_search import search_people
+
+
+def _estimated_rows(queryset):
+    """The PostgreSQL planner's row estimate for ``queryset``, or None elsewhere"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            # Whole table: the statistics kept by VACUUM/ANALYZE, no plan needed
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # -1 until the table has been analyzed
+            return int(row[0]) if row and row[0] >= 0 else None
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count is estimated or capped above ADMIN_EXACT_COUNT_LIMIT"""
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        estimate = _estimated_rows(self.object_list)
+        if estimate is not None and estimate > limit:
+            return estimate
+        return self.object_list.order_by()[:limit + 1].count()
+
+
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """
+    Related-field filter rendered as an autocomplete box. Only the selected
+    row is loaded; other rows are fetched as the user types. Use it as
+    ``list_filter = [('thana', AutocompleteFilter)]``.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.admin_site = model_admin.admin_site
+        own = {self.lookup_kwarg, self.lookup_kwarg_isnull, 'p', 'e'}
+        # The box submits a GET form, so the other filters ride along as hidden inputs
+        self.other_params = [
+            (name, value)
+            for name, values in request.GET.lists() if name not in own
+            for value in values
+        ]
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        return field.get_choices(
+            include_blank=False,
+            limit_choices_to={f'{field.target_field.name}__in': self.lookup_val},
+        )
+
+    def has_output(self):
+        return True
+
+    def widget(self):
+        formfield = self.field.formfield(
+            widget=AutocompleteSelect(self.field, self.admin_site,
+                                      attrs={'data-autocomplete-filter': '', 'style': 'width: 100%'}),
+            required=False,
+        )
+        value = self.lookup_val[0] if self.lookup_val else None
+        return formfield.widget.render(self.lookup_kwarg, value)
+
+    @staticmethod
+    def media(admin_site):
+        return AutocompleteSelect(None, admin_site).media + forms.Media(js=['js/admin_autocomplete_filter.js'])
+
+
+class ScalableAdminMixin:
+    """ModelAdmin settings for changelists over large tables"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(list_filter, (list, tuple)) and issubclass(list_filter[1], AutocompleteFilter)
+               for list_filter in self.list_filter):
+            media += AutocompleteFilter.media(self.admin_site)
+        return media
+
+
+class PeopleSearchMixin:
+    """
+    Admin search over ``search_document`` for donors and recipients: names
+    in Bengali or Latin spelling, phone digits and email, ranked by relevance.
+    Also serves the autocomplete boxes that point at the model.
+    """
+    search_fields = ('search_document',)
+    # Plain icontains fields, outside the document: every query word must
+    # be in one of them
+    people_search_extra_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        results = search_people(queryset, search_term)
+        if self.people_search_extra_fields:
+            extra = Q()
+            for word in search_term.split():
+                extra &= Q.create(
+                    [(f'{field}__icontains', word) for field in self.people_search_extra_fields],
+                    connector=Q.OR,
+                )
+            # Ranked by the document only; extra matches rank last
+            results = results | queryset.filter(extra)
+        if ORDER_VAR in request.GET:
+            # The user sorted by a column
+            return results, False
+        return results.order_by('-search_rank', *queryset.query.order_by), False
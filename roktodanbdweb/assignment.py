@@ -0,0 +1,275 @@
+# roktodanbdweb/assignment.py
+"""
+Many-to-many donor assignment for concurrent blood requests.
+
+When many requests in one area compete for the same donors, notifying the
+nearest donor for each request on its own sends most requests to the same
+few people. ``solve_assignment`` treats the area as one problem. Every unit
+a request needs becomes a slot, every eligible compatible donor can fill at
+most one slot, and the assignment maximizes the total profit:
+
+    profit = URGENCY_VALUE[urgency] - KM_COST * distance - MISMATCH_COST (if not the same group)
+
+Pairs with no profit are not considered, and a slot may stay unfilled. So
+when donors are scarce, critical requests win over low ones. Universal donors
+are kept for the requests that need them. Distant donors are only used when
+nothing closer is available.
+
+The solver is a sparse shortest-augmenting-path (Jonker-Volgenant style)
+min-cost assignment over ``cost = max profit - profit``. Every slot has a
+private "unfilled" column at cost ``max profit``. Each request only gets
+edges to its best ``candidates_per_unit * units`` donors. Those are found
+by reading rings of a fine grid nearest first, stopping once no unread ring
+could hold a better donor.
+"""
+import heapq
+import math
+from collections import defaultdict, namedtuple
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .geo import KM_PER_DEGREE, distances_km
+from .models import BloodRequest, Donor, DonorResponse, COMPATIBLE_DONOR_GROUPS
+
+URGENCY_VALUE = {'critical': 400, 'high': 300, 'medium': 200, 'low': 100}
+KM_COST = 10
+MISMATCH_COST = 25
+MAX_KM = 25
+CANDIDATES_PER_UNIT = 8
+# About 1.1 km; candidate donors are searched ring by ring on this grid
+BUCKET_DEGREES = 0.01
+
+DonorCandidate = namedtuple('DonorCandidate', 'id blood_group latitude longitude')
+RequestDemand = namedtuple('RequestDemand', 'id blood_group units urgency latitude longitude')
+
+
+class AssignmentPlan:
+    """
+    Result of an assignment run: who to notify for each request, who to
+    notify next if they decline, and what could not be covered
+    """
+
+    def __init__(self):
+        self.assignments = defaultdict(list)  # request id -> [(donor id, distance km)]
+        self.backups = defaultdict(list)      # request id -> [(donor id, distance km)]
+        self.unfilled = {}                    # request id -> units without a donor
+        self.total_profit = 0.0
+
+    @property
+    def assigned_units(self):
+        return sum(len(donors) for donors in self.assignments.values())
+
+
+def _bucket(latitude, longitude):
+    return math.floor(latitude / BUCKET_DEGREES), math.floor(longitude / BUCKET_DEGREES)
+
+
+def _ring(row, column, ring):
+    """Buckets exactly ``ring`` steps (Chebyshev distance) away from (row, column)"""
+    if ring == 0:
+        return [(row, column)]
+    buckets = []
+    for d_row in range(-ring, ring + 1):
+        step = 1 if abs(d_row) == ring else 2 * ring
+        for d_column in range(-ring, ring + 1, step):
+            buckets.append((row + d_row, column + d_column))
+    return buckets
+
+
+def candidate_edges(requests, donors, max_km=MAX_KM, candidates_per_unit=CANDIDATES_PER_UNIT,
+                    excluded_pairs=frozenset()):
+    """
+    For each request, its best compatible donors as [(profit, donor index,
+    distance km)] sorted by profit, best first
+    """
+    # A finer grid than the geo_cell one: dense areas put hundreds of donors
+    # in a single geo cell, and only a request's nearest few are needed
+    by_bucket = defaultdict(list)
+    for index, donor in enumerate(donors):
+        by_bucket[_bucket(donor.latitude, donor.longitude)].append(index)
+
+    edges = []
+    for request in requests:
+        urgency_value = URGENCY_VALUE.get(request.urgency, URGENCY_VALUE['medium'])
+        # Beyond this distance the profit is no longer positive
+        reach_km = min(max_km, urgency_value / KM_COST)
+        compatible = COMPATIBLE_DONOR_GROUPS.get(request.blood_group, ())
+        bucket_km = BUCKET_DEGREES * KM_PER_DEGREE * math.cos(math.radians(abs(request.latitude) + BUCKET_DEGREES))
+        row_0, column_0 = _bucket(request.latitude, request.longitude)
+        limit = max(1, request.units) * candidates_per_unit
+        row = []
+        for ring in range(math.ceil(reach_km / bucket_km) + 1):
+            nearby = [
+                index
+                for bucket in _ring(row_0, column_0, ring)
+                for index in by_bucket.get(bucket, ())
+                if donors[index].blood_group in compatible
+                and (request.id, donors[index].id) not in excluded_pairs
+            ]
+            distances = distances_km(request.latitude, request.longitude,
+                                     [(donors[i].latitude, donors[i].longitude) for i in nearby])
+            for index, distance in zip(nearby, distances):
+                profit = urgency_value - KM_COST * distance
+                if donors[index].blood_group != request.blood_group:
+                    profit -= MISMATCH_COST
+                if profit > 0 and distance <= max_km:
+                    row.append((profit, index, distance))
+            row.sort(key=lambda edge: -edge[0])
+            del row[limit:]
+            # Donors outside rings 0..ring are at least ring * bucket_km away
+            if len(row) >= limit and row[-1][0] >= urgency_value - KM_COST * ring * bucket_km:
+                break
+        edges.append(row)
+    return edges
+
+
+def _min_cost_assignment(slot_edges, n_donors, dummy_cost):
+    """
+    Assign every slot a donor column or its own dummy column at minimum
+    total cost. ``slot_edges[s]`` is a list of (donor column, cost) with
+    0 <= cost < dummy_cost. Returns the donor column per slot, -1 if unfilled.
+
+    Dijkstra runs on reduced costs ``cost - v[column]`` from each new slot
+    until it reaches a free column. Column potentials ``v`` keep every
+    matched slot on its cheapest reduced-cost column, which keeps the reduced
+    edge weights non-negative.
+    """
+    n_slots = len(slot_edges)
+    v = [0.0] * n_donors
+    dummy_v = [0.0] * n_slots
+    slot_of = [-1] * n_donors          # donor column -> slot
+    column_of = [None] * n_slots       # slot -> donor column, or ~slot for its dummy
+    assigned_cost = [0.0] * n_slots
+
+    def potential(column):
+        return v[column] if column >= 0 else dummy_v[~column]
+
+    for start in range(n_slots):
+        settled = {}
+        pred = {}
+        best = {}
+        heap = []
+
+        def expand(slot, offset):
+            for column, cost in slot_edges[slot] + [(~slot, dummy_cost)]:
+                # Settled columns are final; relaxing them again on float
+                # round-off could put a cycle into the predecessor chain
+                if column in settled:
+                    continue
+                key = offset + cost - potential(column)
+                if key < best.get(column, math.inf):
+                    best[column] = key
+                    pred[column] = (slot, cost)
+                    heapq.heappush(heap, (key, column))
+
+        expand(start, 0.0)
+        while True:
+            distance, column = heapq.heappop(heap)
+            if column in settled or distance > best[column]:
+                continue
+            settled[column] = distance
+            owner = slot_of[column] if column >= 0 else (~column if column_of[~column] == column else -1)
+            if owner == -1:
+                sink = column
+                break
+            expand(owner, distance - (assigned_cost[owner] - potential(column)))
+
+        for column, distance in settled.items():
+            if column >= 0:
+                v[column] += distance - settled[sink]
+            else:
+                dummy_v[~column] += distance - settled[sink]
+
+        column = sink
+        while True:
+            slot, cost = pred[column]
+            previous = column_of[slot]
+            column_of[slot] = column
+            assigned_cost[slot] = cost
+            if column >= 0:
+                slot_of[column] = slot
+            if slot == start:
+                break
+            column = previous
+
+    return [column if column >= 0 else -1 for column in column_of]
+
+
+def solve_assignment(requests, donors, max_km=MAX_KM, candidates_per_unit=CANDIDATES_PER_UNIT,
+                     excluded_pairs=frozenset()):
+    """
+    Assign donors to the units of ``requests`` (RequestDemand) from ``donors``
+    (DonorCandidate). A donor fills at most one unit, and ``excluded_pairs``
+    holds (request id, donor id) pairs that must not be proposed again.
+    """
+    edges = candidate_edges(requests, donors, max_km, candidates_per_unit, excluded_pairs)
+    max_profit = max(URGENCY_VALUE.values())
+
+    slot_edges = []
+    slot_request = []
+    for request_index, (request, row) in enumerate(zip(requests, edges)):
+        costs = [(index, max_profit - profit) for profit, index, _ in row]
+        for _ in range(request.units):
+            # Slots of one request share the same edge list
+            slot_edges.append(costs)
+            slot_request.append(request_index)
+
+    columns = _min_cost_assignment(slot_edges, len(donors), max_profit)
+
+    plan = AssignmentPlan()
+    taken = set()
+    for slot, column in enumerate(columns):
+        request_index = slot_request[slot]
+        request = requests[request_index]
+        if column < 0:
+            plan.unfilled[request.id] = plan.unfilled.get(request.id, 0) + 1
+            continue
+        profit, distance = next((p, d) for p, index, d in edges[request_index] if index == column)
+        plan.assignments[request.id].append((donors[column].id, distance))
+        plan.total_profit += profit
+        taken.add(column)
+
+    for request, row in zip(requests, edges):
+        plan.backups[request.id] = [
+            (donors[index].id, distance) for _, index, distance in row if index not in taken
+        ][:request.units]
+    return plan
+
+
+def plan_for_region(district=None, max_km=MAX_KM):
+    """
+    Build and solve the assignment for all active, unexpired requests
+    (optionally in one district) against all eligible, available donors with
+    coordinates. Returns (plan, requests by id, donors by id).
+    """
+    # Expired requests may still be marked active until the sweep reaches them
+    requests = (BloodRequest.objects.filter(status='active', expires_at__gt=timezone.now()).exclude(latitude=None)
+                .annotate(accepted=Count('donor_responses', filter=Q(donor_responses__response='accept'))))
+    if district is not None:
+        requests = requests.filter(district=district)
+    requests = {request.id: request for request in requests.select_related('recipient')}
+
+    needed_groups = {group for request in requests.values()
+                     for group in COMPATIBLE_DONOR_GROUPS.get(request.blood_group_needed, ())}
+    today = timezone.localdate()
+    donors = {
+        donor.id: donor
+        for donor in Donor.objects.filter(is_active=True, is_available=True, blood_group__in=needed_groups)
+        .exclude(latitude=None).select_related('user')
+        if donor.eligible_from is None or donor.eligible_from <= today
+    }
+
+    demands = [
+        RequestDemand(request.id, request.blood_group_needed, request.units_needed - request.accepted,
+                      request.urgency_level, request.latitude, request.longitude)
+        for request in requests.values() if request.units_needed > request.accepted
+    ]
+    candidates = [DonorCandidate(donor.id, donor.blood_group, donor.latitude, donor.longitude)
+                  for donor in donors.values()]
+    # Donors who already answered a request are not proposed for it again
+    excluded = set(DonorResponse.objects.filter(blood_request_id__in=list(requests))
+                   .values_list('blood_request_id', 'donor_id'))
+
+    plan = solve_assignment(demands, candidates, max_km=max_km, excluded_pairs=excluded)
+    return plan, requests, donors
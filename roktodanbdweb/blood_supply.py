@@ -0,0 +1,210 @@
+# roktodanbdweb/blood_supply.py
+"""
+Materialized blood-supply matrix: how many donors of each blood group live
+in each thana, and how many of them could donate today.
+
+Reads scan the small BloodSupply table (eight rows per thana) instead of
+grouping the whole donor table. Four things keep it current:
+
+* The Donor save and delete signals move one donor between cells (see
+  signals.py).
+* ``advance_supply`` adds the donors whose 90-day gap ended since the
+  matrix's ``as_of`` day. It runs before the first read or write of each
+  day.
+* ``recount_supply`` recounts the cells of a few thanas after a bulk
+  ``update()``, which skips the signals (see bulk_actions.py).
+* ``rebuild_supply`` (the ``rebuild_blood_supply`` command) recounts
+  everything and fixes any other drift. build.sh runs it on deploy; run it
+  nightly from the host's scheduler as well (see README.md).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .locations import get_hierarchy
+from .models import BloodSupply, Donor, DonorSearchIndex, BLOOD_GROUP_CODES, BLOOD_GROUPS_BY_CODE
+
+STATE_FIELDS = (
+    'pk', 'thana_id', 'blood_group', 'is_active', 'is_available', 'last_donation_month', 'last_donation_year',
+)
+
+_MATRIX_KEY = 'blood-supply:matrix'
+
+# Day this process last advanced the matrix to, so the check is free after that
+_advanced_through = None
+
+
+def supply_state(donor, day):
+    """
+    The cell a donor counts in and whether they count as eligible on ``day``,
+    or None for donors without a thana
+    """
+    if donor.thana_id is None or donor.blood_group not in BLOOD_GROUP_CODES:
+        return None
+    eligible_from = donor.eligible_from
+    eligible = donor.is_active and donor.is_available and (eligible_from is None or eligible_from <= day)
+    return donor.thana_id, donor.blood_group, eligible
+
+
+def _add(state, sign, day):
+    thana_id, blood_group, eligible = state
+    changes = {'total_donors': F('total_donors') + sign}
+    if eligible:
+        changes['eligible_donors'] = F('eligible_donors') + sign
+    cell = BloodSupply.objects.filter(thana_id=thana_id, blood_group=blood_group)
+    if not cell.update(**changes):
+        BloodSupply.objects.get_or_create(thana_id=thana_id, blood_group=blood_group, defaults={'as_of': day})
+        cell.update(**changes)
+
+
+def donor_moved(old_state, new_state):
+    """Move one donor between cells; either state may be None"""
+    if old_state == new_state:
+        return
+    day = advance_supply()
+    with transaction.atomic():
+        if old_state is not None:
+            _add(old_state, -1, day)
+        if new_state is not None:
+            _add(new_state, 1, day)
+
+
+def advance_supply(today=None):
+    """
+    Count donors whose 90-day gap ended after each cell's ``as_of`` day as
+    eligible, and move the cells to ``today``. Returns ``today``.
+    """
+    global _advanced_through
+    today = today or timezone.localdate()
+    if _advanced_through == today:
+        return today
+
+    stale_days = (BloodSupply.objects.filter(as_of__lt=today)
+                  .order_by().values_list('as_of', flat=True).distinct())
+    for as_of in list(stale_days):
+        # The search index carries eligible_from as a real date column
+        became_eligible = (
+            DonorSearchIndex.objects
+            .filter(is_searchable=True, thana_code__isnull=False,
+                    eligible_from__gt=as_of, eligible_from__lte=today)
+            .order_by().values('thana_code', 'blood_group_code')
+            .annotate(donors=Count('pk'))
+        )
+        stale = BloodSupply.objects.filter(as_of=as_of)
+        for row in became_eligible:
+            # Conditional on as_of, so racing processes advance a cell only once
+            stale.filter(
+                thana_id=row['thana_code'], blood_group=BLOOD_GROUPS_BY_CODE.get(row['blood_group_code'])
+            ).update(eligible_donors=F('eligible_donors') + row['donors'], as_of=today)
+        stale.update(as_of=today)
+
+    _advanced_through = today
+    return today
+
+
+def recount_supply(thana_ids):
+    """
+    Recount the cells of ``thana_ids`` with one grouped query. Eligibility
+    comes from the search index, which must already be up to date.
+    """
+    today = advance_supply()
+    counts = {(thana_id, blood_group): [0, 0] for thana_id in thana_ids for blood_group in BLOOD_GROUP_CODES}
+    eligible = (Q(is_active=True, is_available=True)
+                & (Q(search_entry__eligible_from__isnull=True) | Q(search_entry__eligible_from__lte=today)))
+    rows = (
+        Donor.objects.filter(thana_id__in=thana_ids, blood_group__in=BLOOD_GROUP_CODES)
+        .order_by().values('thana_id', 'blood_group')
+        .annotate(total=Count('pk'), eligible=Count('pk', filter=eligible))
+    )
+    for row in rows:
+        counts[row['thana_id'], row['blood_group']] = [row['total'], row['eligible']]
+
+    BloodSupply.objects.bulk_create(
+        [
+            BloodSupply(thana_id=thana_id, blood_group=blood_group,
+                        total_donors=total, eligible_donors=eligible, as_of=today)
+            for (thana_id, blood_group), (total, eligible) in counts.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['thana', 'blood_group'],
+        update_fields=['total_donors', 'eligible_donors', 'as_of'],
+    )
+
+
+def rebuild_supply():
+    """Recount every cell from the donor table. Returns the number of cells."""
+    global _advanced_through
+    today = timezone.localdate()
+    counts = defaultdict(lambda: [0, 0])
+    for donor in Donor.objects.only(*STATE_FIELDS).iterator(chunk_size=2000):
+        state = supply_state(donor, today)
+        if state is not None:
+            cell = counts[state[:2]]
+            cell[0] += 1
+            cell[1] += state[2]
+
+    cells = [
+        BloodSupply(thana_id=thana_id, blood_group=blood_group,
+                    total_donors=counts[thana_id, blood_group][0],
+                    eligible_donors=counts[thana_id, blood_group][1],
+                    as_of=today)
+        for thana_id in get_hierarchy().thanas
+        for blood_group in BLOOD_GROUP_CODES
+    ]
+    BloodSupply.objects.bulk_create(
+        cells,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['thana', 'blood_group'],
+        update_fields=['total_donors', 'eligible_donors', 'as_of'],
+    )
+    _advanced_through = today
+    cache.delete(_MATRIX_KEY)
+    return len(cells)
+
+
+def supply_matrix():
+    """
+    The matrix as a JSON-ready dict: blood groups, and per thana its district
+    and the eligible and total counts in blood group order. Cached for
+    BLOOD_SUPPLY_CACHE_TIMEOUT seconds.
+    """
+    matrix = cache.get(_MATRIX_KEY)
+    if matrix is not None:
+        return matrix
+
+    as_of = advance_supply()
+    groups = list(BLOOD_GROUP_CODES)
+    column = {group: position for position, group in enumerate(groups)}
+    hierarchy = get_hierarchy()
+    rows = {}
+    for thana_id, blood_group, eligible, total in BloodSupply.objects.values_list(
+            'thana_id', 'blood_group', 'eligible_donors', 'total_donors'):
+        thana = hierarchy.thanas.get(thana_id)
+        if thana is None or blood_group not in column:
+            continue
+        row = rows.get(thana_id)
+        if row is None:
+            district = hierarchy.districts.get(thana.district_id)
+            row = rows[thana_id] = {
+                'id': thana_id,
+                'name': thana.name,
+                'district': district.name if district else '',
+                'eligible': [0] * len(groups),
+                'total': [0] * len(groups),
+            }
+        row['eligible'][column[blood_group]] = max(eligible, 0)
+        row['total'][column[blood_group]] = max(total, 0)
+
+    matrix = {
+        'as_of': as_of.isoformat(),
+        'groups': groups,
+        'thanas': sorted(rows.values(), key=lambda row: (row['district'], row['name'])),
+    }
+    cache.set(_MATRIX_KEY, matrix, settings.BLOOD_SUPPLY_CACHE_TIMEOUT)
+    return matrix
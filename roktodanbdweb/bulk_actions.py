@@ -0,0 +1,170 @@
+# roktodanbdweb/bulk_actions.py
+"""
+Set-based bodies of the admin bulk actions.
+
+Each action takes the admin's queryset. That is either the selected rows or,
+after "select all", every row matching the changelist. The rows are changed
+with a fixed number of statements, never one statement per row:
+
+* ``set_availability``: one UPDATE of the donors and one of their search
+  entries, then a grouped recount of the blood-supply cells in their
+  thanas. ``update()`` skips the Donor signals, so this function does their
+  work itself.
+* ``enqueue_donation_reminders``: OutboxMessage inserts in batches of
+  OUTBOX_BATCH_SIZE. ``manage.py send_outbox`` sends them.
+* ``award_bonus_points`` and ``reset_points``: one PointTransaction bulk
+  insert into the ledger and one UPDATE of the balances.
+
+``run_action`` runs an action in the request, or on a background thread
+when it covers more than ADMIN_BULK_ACTION_BACKGROUND_THRESHOLD rows.
+"""
+import csv
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from . import donor_bitmaps
+from .blood_supply import recount_supply
+from .donor_search import invalidate_donor_searches
+from .models import DonorSearchIndex, OutboxMessage, PointTransaction
+
+logger = logging.getLogger(__name__)
+
+# One worker, so two large actions never update the same rows at once
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='admin-bulk-action')
+
+
+# ---------- actions ----------
+
+def set_availability(queryset, available):
+    """Mark the donors available or unavailable. Returns the number of donors."""
+    donors = queryset.order_by()
+    with transaction.atomic():
+        thana_ids = set(donors.exclude(thana=None).values_list('thana_id', flat=True).distinct())
+        # Before the donor UPDATE, which may take the rows out of the queryset
+        entries = DonorSearchIndex.objects.filter(donor__in=donors.values('pk'))
+        if available:
+            entries = entries.filter(donor__is_active=True)
+        entries.update(is_searchable=available)
+        # last_updated lets other processes' bitmap indexes pick the change up
+        updated = donors.update(is_available=available, last_updated=timezone.now())
+        recount_supply(thana_ids)
+    donor_bitmaps.donors_changed()
+    invalidate_donor_searches()
+    return updated
+
+
+def enqueue_donation_reminders(queryset):
+    """
+    Queue a reminder for each active donor with an email address who has
+    none waiting. Returns the number queued.
+    """
+    waiting = OutboxMessage.objects.filter(donor=OuterRef('pk'), kind='donation_reminder', sent_at__isnull=True)
+    donor_ids = list(
+        queryset.order_by().filter(is_active=True).exclude(user__email='')
+        .exclude(Exists(waiting)).values_list('pk', flat=True)
+    )
+    batch_size = settings.OUTBOX_BATCH_SIZE
+    for start in range(0, len(donor_ids), batch_size):
+        OutboxMessage.objects.bulk_create([
+            OutboxMessage(donor_id=donor_id, kind='donation_reminder')
+            for donor_id in donor_ids[start:start + batch_size]
+        ])
+    return len(donor_ids)
+
+
+def award_bonus_points(queryset, points):
+    """Add ``points`` to each account, with a ledger entry. Returns the number of accounts."""
+    accounts = queryset.order_by()
+    with transaction.atomic():
+        account_ids = list(accounts.select_for_update().values_list('pk', flat=True))
+        PointTransaction.objects.bulk_create([
+            PointTransaction(donor_points_id=account_id, transaction_type='bonus', points=points,
+                             description='Admin bonus')
+            for account_id in account_ids
+        ])
+        accounts.update(
+            total_points=F('total_points') + points,
+            available_points=F('available_points') + points,
+            last_updated=timezone.now(),
+        )
+    return len(account_ids)
+
+
+def reset_points(queryset):
+    """
+    Zero each account's available points, recording the amount removed in
+    the ledger. Returns the number of accounts that had points.
+    """
+    accounts = queryset.order_by().filter(available_points__gt=0)
+    with transaction.atomic():
+        balances = list(accounts.select_for_update().values_list('pk', 'available_points'))
+        PointTransaction.objects.bulk_create([
+            PointTransaction(donor_points_id=account_id, transaction_type='penalty', points=-available,
+                             description='Points reset by admin')
+            for account_id, available in balances
+        ])
+        accounts.update(available_points=0, last_updated=timezone.now())
+    return len(balances)
+
+
+# ---------- export ----------
+
+DONOR_EXPORT_COLUMNS = (
+    'Name', 'Email', 'Phone', 'Blood group', 'Age', 'Weight', 'Thana', 'Post office', 'District',
+    'Available', 'Active', 'Last donation', 'Completed donations', 'Registered',
+)
+
+
+class _Echo:
+    """File-like object that hands each CSV line back to the writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def donor_csv_rows(queryset):
+    """CSV lines for the donors, read from one cursor in chunks"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(DONOR_EXPORT_COLUMNS)
+    donors = queryset.order_by('pk').select_related('user', 'thana', 'post_office', 'district')
+    for donor in donors.iterator(chunk_size=2000):
+        yield writer.writerow([
+            donor.full_name, donor.user.email, donor.phone_number, donor.blood_group, donor.age,
+            donor.weight or '', donor.thana or '', donor.post_office or '', donor.district or '',
+            'Yes' if donor.is_available else 'No', 'Yes' if donor.is_active else 'No',
+            donor.last_donation_date.date() if donor.last_donation_date else '',
+            donor.completed_donation_count, donor.registration_date.date(),
+        ])
+
+
+# ---------- running ----------
+
+def _run_in_background(action, queryset, args):
+    try:
+        result = action(queryset, *args)
+        logger.info("Background %s finished: %s rows", action.__name__, result)
+    except Exception:
+        logger.exception("Background %s failed", action.__name__)
+    finally:
+        connections.close_all()
+
+
+def run_action(model_admin, request, queryset, action, *args, done, started):
+    """
+    Run ``action(queryset, *args)`` and tell the user. ``done`` is formatted
+    with the action's result and ``started`` with the number of rows, for
+    actions handed to the background thread.
+    """
+    rows = queryset.count()
+    if rows > settings.ADMIN_BULK_ACTION_BACKGROUND_THRESHOLD:
+        queryset = queryset.all()
+        # The thread must not start before the request's transaction commits
+        transaction.on_commit(lambda: _pool.submit(_run_in_background, action, queryset, args))
+        model_admin.message_user(request, started.format(rows))
+    else:
+        model_admin.message_user(request, done.format(action(queryset, *args)))
@@ -0,0 +1,317 @@
+# roktodanbdweb/donor_bitmaps.py
+"""
+In-process bitmap index over donor attributes.
+
+Every (attribute, value) pair owns one bitset with bit ``n`` set for donor
+``n``. A bitset is a Python int, which gives C-speed AND/OR/NOT and
+``bit_count``. Multi-predicate counts such as
+
+    index.count(BloodGroup('O-') & (InThana(mirpur) | InThana(pallabi))
+                & EligibleOn(today) & WeightAtLeast(55))
+
+are answered with bitset algebra instead of a COUNT over the donor table.
+The staff endpoint ``/api/donor-counts/`` (views.donor_counts) serves
+them to the admin team.
+
+Indexed attributes are blood group, district, thana, post office, the
+active/available flags, whole-kilogram weight and the eligibility day
+(``Donor.eligible_from``). The index is updated by the Donor save/delete
+signals in this process. Every ``DONOR_BITMAP_REFRESH_INTERVAL`` seconds
+the index picks up changes made by other processes, using
+``Donor.last_updated``. ``last_updated`` is stamped before commit, so a
+slow transaction can commit a row older than one already seen; a refresh
+therefore re-reads ``DONOR_BITMAP_REFRESH_OVERLAP`` seconds before the
+newest timestamp it has indexed. Deletes leave no row behind, so a refresh also
+compares the donor count with the index and drops missing ids when the
+two differ.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Donor
+
+_lock = threading.Lock()
+_index = None
+
+NEVER_DONATED = 0
+
+INDEX_FIELDS = (
+    'pk', 'blood_group', 'district_id', 'thana_id', 'post_office_id', 'is_active', 'is_available',
+    'weight', 'last_donation_month', 'last_donation_year', 'last_updated',
+)
+
+
+def _donor_keys(donor):
+    """The (attribute, value) pairs whose bitsets contain this donor"""
+    eligible_from = donor.eligible_from
+    return frozenset((
+        ('blood_group', donor.blood_group),
+        ('district', donor.district_id),
+        ('thana', donor.thana_id),
+        ('post_office', donor.post_office_id),
+        ('active', donor.is_active),
+        ('available', donor.is_available),
+        ('weight', int(donor.weight) if donor.weight is not None else None),
+        ('eligible_day', eligible_from.toordinal() if eligible_from else NEVER_DONATED),
+    ))
+
+
+def bit_ids(bits):
+    """Ascending positions of the set bits"""
+    ids = []
+    digits = bin(bits)[:1:-1]  # least significant bit first
+    position = digits.find('1')
+    while position != -1:
+        ids.append(position)
+        position = digits.find('1', position + 1)
+    return ids
+
+
+class DonorBitmapIndex:
+    """
+    Bitsets keyed by (attribute, value), plus the universe of indexed donors
+    """
+
+    def __init__(self):
+        self.bitmaps = defaultdict(int)
+        self.universe = 0
+        self._keys = {}  # donor id -> keys currently set for it
+        self.watermark = None
+        self.refreshed_at = time.monotonic()
+
+    @classmethod
+    def load(cls):
+        index = cls()
+        for donor in Donor.objects.only(*INDEX_FIELDS).iterator(chunk_size=2000):
+            index.update(donor)
+        index.refreshed_at = time.monotonic()
+        return index
+
+    # ---------- maintenance ----------
+
+    def update(self, donor):
+        """Index a new or changed donor"""
+        keys = _donor_keys(donor)
+        old_keys = self._keys.get(donor.pk, frozenset())
+        bit = 1 << donor.pk
+        for key in old_keys - keys:
+            self.bitmaps[key] &= ~bit
+        for key in keys - old_keys:
+            self.bitmaps[key] |= bit
+        self._keys[donor.pk] = keys
+        self.universe |= bit
+        if donor.last_updated and (self.watermark is None or donor.last_updated > self.watermark):
+            self.watermark = donor.last_updated
+
+    def remove(self, donor_id):
+        bit = 1 << donor_id
+        for key in self._keys.pop(donor_id, ()):
+            self.bitmaps[key] &= ~bit
+        self.universe &= ~bit
+
+    def refresh(self):
+        """Fold in donors changed or deleted by other processes since the last refresh"""
+        changed = Donor.objects.only(*INDEX_FIELDS)
+        if self.watermark is not None:
+            # Applying a donor twice is harmless, so overlap the window
+            overlap = timedelta(seconds=settings.DONOR_BITMAP_REFRESH_OVERLAP)
+            changed = changed.filter(last_updated__gt=self.watermark - overlap)
+        for donor in changed:
+            self.update(donor)
+        # Every insert has been applied by now, so a mismatch means deletes
+        if Donor.objects.count() != len(self._keys):
+            existing = set(Donor.objects.values_list('pk', flat=True))
+            for donor_id in set(self._keys) - existing:
+                self.remove(donor_id)
+        self.refreshed_at = time.monotonic()
+
+    # ---------- queries ----------
+
+    def bitmap(self, attribute, value):
+        return self.bitmaps.get((attribute, value), 0)
+
+    def values(self, attribute):
+        """Values of ``attribute`` that have a non-empty bitset"""
+        return [value for (name, value), bits in self.bitmaps.items() if name == attribute and bits]
+
+    def evaluate(self, expression):
+        return expression.evaluate(self)
+
+    def count(self, expression):
+        return self.evaluate(expression).bit_count()
+
+    def ids(self, expression):
+        return bit_ids(self.evaluate(expression))
+
+
+# ---------- filter expressions ----------
+
+class Filter:
+    """Composable predicate; combine with ``&``, ``|`` and ``~``"""
+
+    def evaluate(self, index):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class And(Filter):
+    def __init__(self, *filters):
+        self.filters = filters
+
+    def evaluate(self, index):
+        bits = index.universe
+        for item in self.filters:
+            bits &= item.evaluate(index)
+            if not bits:
+                break
+        return bits
+
+
+class Or(Filter):
+    def __init__(self, *filters):
+        self.filters = filters
+
+    def evaluate(self, index):
+        bits = 0
+        for item in self.filters:
+            bits |= item.evaluate(index)
+        return bits
+
+
+class Not(Filter):
+    def __init__(self, item):
+        self.item = item
+
+    def evaluate(self, index):
+        return index.universe & ~self.item.evaluate(index)
+
+
+class Equals(Filter):
+    def __init__(self, attribute, value):
+        self.attribute = attribute
+        self.value = getattr(value, 'pk', value)
+
+    def evaluate(self, index):
+        return index.bitmap(self.attribute, self.value)
+
+
+class Between(Filter):
+    """Inclusive range over an integer-valued attribute; None leaves a side open"""
+
+    def __init__(self, attribute, low=None, high=None):
+        self.attribute = attribute
+        self.low = low
+        self.high = high
+
+    def evaluate(self, index):
+        bits = 0
+        for value in index.values(self.attribute):
+            if value is None:
+                continue
+            if (self.low is None or value >= self.low) and (self.high is None or value <= self.high):
+                bits |= index.bitmap(self.attribute, value)
+        return bits
+
+
+class BloodGroup(Equals):
+    def __init__(self, group):
+        super().__init__('blood_group', group)
+
+
+class InDistrict(Equals):
+    def __init__(self, district):
+        super().__init__('district', district)
+
+
+class InThana(Equals):
+    def __init__(self, thana):
+        super().__init__('thana', thana)
+
+
+class InPostOffice(Equals):
+    def __init__(self, post_office):
+        super().__init__('post_office', post_office)
+
+
+class Active(Equals):
+    def __init__(self, value=True):
+        super().__init__('active', value)
+
+
+class Available(Equals):
+    def __init__(self, value=True):
+        super().__init__('available', value)
+
+
+class WeightAtLeast(Between):
+    """Weight of at least ``kg`` (a whole number of kilograms)"""
+
+    def __init__(self, kg):
+        super().__init__('weight', low=int(kg))
+
+
+class EligibleOn(Or):
+    """Never donated, or the 90-day gap has passed by ``day`` (default today)"""
+
+    def __init__(self, day=None):
+        day = day or timezone.localdate()
+        super().__init__(Equals('eligible_day', NEVER_DONATED), Between('eligible_day', 1, day.toordinal()))
+
+
+# ---------- per-process instance ----------
+
+def get_bitmap_index():
+    """Return this process's index, loading it on first use and refreshing it periodically"""
+    global _index
+    with _lock:
+        if _index is None:
+            _index = DonorBitmapIndex.load()
+        elif time.monotonic() - _index.refreshed_at >= settings.DONOR_BITMAP_REFRESH_INTERVAL:
+            _index.refresh()
+        return _index
+
+
+def query_bitmap_index(function):
+    """
+    Return ``function(index)`` for this process's index. The lock is held
+    meanwhile, so signal updates cannot change the bitsets mid-query.
+    """
+    index = get_bitmap_index()
+    with _lock:
+        return function(index)
+
+
+def donor_changed(donor):
+    """Signal hook: apply a saved donor to the index if this process has one"""
+    with _lock:
+        if _index is not None:
+            _index.update(donor)
+
+
+def donors_changed():
+    """
+    Bulk update() hook: fold in the changed rows now rather than at the next
+    periodic refresh. The update must set ``last_updated``.
+    """
+    with _lock:
+        if _index is not None:
+            _index.refresh()
+
+
+def donor_deleted(donor_id):
+    with _lock:
+        if _index is not None:
+            _index.remove(donor_id)
@@ -0,0 +1,304 @@
+# roktodanbdweb/donor_search.py
+"""
+Cached find_blood searches, served stale-while-revalidate.
+
+Each search stores two entries in the tiered cache:
+
+* a fresh result for SEARCH_CACHE_TIMEOUT seconds, under the
+  ``donor-search`` namespace. Any donor change retires that namespace.
+* the last good result with the time it was computed, under
+  ``donor-search-last``. Donor changes do not touch it.
+
+Without a fresh result, a last good result younger than SEARCH_STALE_GRACE
+is served at once and a background thread recomputes the search. Only a
+search with neither result waits for the database.
+
+Every computation is timed. When the moving average passes
+SEARCH_SLOW_QUERY_SECONDS, the worker switches to cache-only mode: it
+serves any last good result it still has (up to SEARCH_STALE_MAX_AGE old)
+and leaves recomputation to the background threads. Those threads keep
+measuring, and the worker switches back once the average falls below half
+the threshold. Results served stale are flagged so the page can say so.
+
+Identical searches are computed once. Keys are built from resolved primary
+keys, so the same search typed differently shares a key. Within a process,
+threads asking for a search already being computed wait for that result.
+Across processes, the first worker takes a short lock (a SearchLock row, as
+the file-based default cache has no atomic ``add``), and the others poll
+the cache for its result for up to SEARCH_LOCK_WAIT seconds before
+computing the search themselves.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .donor_snapshot import search_donor_ids
+from .geo import nearest
+from .models import Donor, DonorSearchIndex, SearchLock, BLOOD_GROUP_CODES
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_NAMESPACE = 'donor-search'
+LAST_GOOD_NAMESPACE = 'donor-search-last'
+SEARCH_CACHE_TIMEOUT = 300
+_LOCK_KEY = 'donor-search-lock:{}'
+# How often a worker waiting on another worker's search checks for the result
+LOCK_POLL_SECONDS = 0.05
+
+# Nearest-donor search from a hospital
+NEAREST_DONOR_LIMIT = 20
+NEAREST_DONOR_MAX_KM = 25
+
+# Weight of the newest timing in the moving average
+LATENCY_SMOOTHING = 0.3
+
+_cache = caches['tiered']
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='donor-search-refresh')
+
+
+class _SearchHealth:
+    """Per-process latency average, cache-only switch and counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.average_seconds = None
+        self.cache_only = False
+        self.refreshing = set()
+        self.counts = dict.fromkeys(
+            ('fresh_hits', 'stale_served', 'computed', 'coalesced', 'shared_waits', 'refreshes',
+             'refresh_failures', 'cache_only_entered'), 0
+        )
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def record(self, seconds):
+        threshold = settings.SEARCH_SLOW_QUERY_SECONDS
+        with self.lock:
+            if self.average_seconds is None:
+                self.average_seconds = seconds
+            else:
+                self.average_seconds += LATENCY_SMOOTHING * (seconds - self.average_seconds)
+            if not self.cache_only and self.average_seconds > threshold:
+                self.cache_only = True
+                self.counts['cache_only_entered'] += 1
+                logger.warning("Donor search averaging %.2fs; serving cached results only", self.average_seconds)
+            elif self.cache_only and self.average_seconds < threshold / 2:
+                self.cache_only = False
+                logger.info("Donor search back to %.2fs; leaving cache-only mode", self.average_seconds)
+
+
+_health = _SearchHealth()
+
+
+class _Flight:
+    """One in-progress computation that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.donors = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.donors
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _compute(key, compute):
+    """Run a search, time it, and store it as both the fresh and the last good result"""
+    _health.count('computed')
+    started = time.monotonic()
+    donors = compute()
+    _health.record(time.monotonic() - started)
+    _cache.set(f'{SEARCH_CACHE_NAMESPACE}:{key}', donors, SEARCH_CACHE_TIMEOUT)
+    _cache.set(f'{LAST_GOOD_NAMESPACE}:{key}', (time.time(), donors), settings.SEARCH_STALE_MAX_AGE)
+    return donors
+
+
+def _take_lock(lock_key):
+    """Take the cross-worker lock, returning its owner token, or None if another worker holds it"""
+    now = timezone.now()
+    owner = f'{os.getpid()}:{threading.get_ident()}'
+    # A worker that died holding the lock leaves an expired row behind
+    SearchLock.objects.filter(key=lock_key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            SearchLock.objects.create(key=lock_key, owner=owner,
+                                      expires_at=now + timedelta(seconds=settings.SEARCH_LOCK_TIMEOUT))
+    except IntegrityError:
+        return None
+    return owner
+
+
+def _compute_shared(key, compute):
+    """``_compute`` under a cross-worker lock, so one worker computes the search"""
+    lock_key = _LOCK_KEY.format(key)
+    owner = _take_lock(lock_key)
+    if owner is None:
+        deadline = time.monotonic() + settings.SEARCH_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            donors = _cache.get(f'{SEARCH_CACHE_NAMESPACE}:{key}')
+            if donors is not None:
+                _health.count('shared_waits')
+                return donors
+        # The other worker is slow or gone; don't keep the visitor waiting longer
+        return _compute(key, compute)
+    try:
+        return _compute(key, compute)
+    finally:
+        SearchLock.objects.filter(key=lock_key, owner=owner).delete()
+
+
+def _compute_once(key, compute):
+    """Compute a search, or wait for the thread already computing it"""
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        _health.count('coalesced')
+        return flight.wait()
+
+    try:
+        # A flight that just finished may have stored the result already
+        flight.donors = _cache.get(f'{SEARCH_CACHE_NAMESPACE}:{key}')
+        if flight.donors is None:
+            flight.donors = _compute_shared(key, compute)
+    except Exception as error:
+        flight.error = error
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+    return flight.donors
+
+
+def _refresh(key, compute):
+    try:
+        _compute_once(key, compute)
+        _health.count('refreshes')
+    except Exception:
+        logger.exception("Background refresh of donor search %s failed", key)
+        _health.count('refresh_failures')
+        # A failure is at least as bad as a slow answer
+        _health.record(2 * settings.SEARCH_SLOW_QUERY_SECONDS)
+    finally:
+        connections.close_all()
+        with _health.lock:
+            _health.refreshing.discard(key)
+
+
+def _refresh_in_background(key, compute):
+    with _health.lock:
+        if key in _health.refreshing:
+            return
+        _health.refreshing.add(key)
+    _refresh_pool.submit(_refresh, key, compute)
+
+
+def _search(key, compute):
+    """Return ``(donors, stale)`` for one search"""
+    donors = _cache.get(f'{SEARCH_CACHE_NAMESPACE}:{key}')
+    if donors is not None:
+        _health.count('fresh_hits')
+        return donors, False
+
+    last_good = _cache.get(f'{LAST_GOOD_NAMESPACE}:{key}')
+    if last_good is not None:
+        computed_at, donors = last_good
+        if _health.cache_only or time.time() - computed_at <= settings.SEARCH_STALE_GRACE:
+            _health.count('stale_served')
+            _refresh_in_background(key, compute)
+            return donors, True
+
+    return _compute_once(key, compute), False
+
+
+def search_stats():
+    """Counters and latency state of this process"""
+    with _health.lock:
+        return {
+            **_health.counts,
+            'average_seconds': _health.average_seconds,
+            'cache_only': _health.cache_only,
+            'refreshing': len(_health.refreshing),
+        }
+
+
+def invalidate_donor_searches():
+    """Retire every fresh find_blood result, in all processes"""
+    _cache.invalidate_namespace(SEARCH_CACHE_NAMESPACE)
+
+
+# ---------- searches ----------
+
+def _nearest_donor_entries(latitude, longitude, blood_group):
+    matches = nearest(
+        Donor.objects.filter(blood_group=blood_group, is_active=True, is_available=True),
+        latitude, longitude,
+        k=NEAREST_DONOR_LIMIT, max_km=NEAREST_DONOR_MAX_KM
+    )
+    entries = DonorSearchIndex.objects.filter(
+        pk__in=[donor_id for donor_id, _ in matches], is_searchable=True
+    ).in_bulk()
+    donors = []
+    for donor_id, distance in matches:
+        if donor_id in entries:
+            entries[donor_id].distance_km = distance
+            donors.append(entries[donor_id])
+    return donors
+
+
+def _area_donor_entries(blood_group, thana_id, post_office_id, district_id):
+    # Matching ids come from the shared memory-mapped snapshot; only
+    # the rows to render are read, by primary key
+    donor_ids = search_donor_ids(blood_group, thana_id, post_office_id, district_id)
+    if donor_ids is not None:
+        entries = DonorSearchIndex.objects.filter(pk__in=donor_ids, is_searchable=True).in_bulk()
+        return [entries[donor_id] for donor_id in donor_ids if donor_id in entries]
+    # No fresh snapshot: served from the narrow search index
+    # (no auth_user join, no full Donor rows)
+    return list(DonorSearchIndex.objects.filter(
+        thana_code=thana_id,
+        blood_group_code=BLOOD_GROUP_CODES[blood_group],
+        post_office_code=post_office_id,
+        district_code=district_id,
+        is_searchable=True
+    ).order_by('-registered_at'))
+
+
+def donors_near_hospital(hospital, blood_group):
+    """
+    Search entries of the nearest available donors to ``hospital``, with
+    distance_km set, and whether the result is stale
+    """
+    args = (hospital.latitude, hospital.longitude, blood_group)
+    return _search(f'near:{hospital.pk}:{blood_group}', lambda: _nearest_donor_entries(*args))
+
+
+def donors_in_area(blood_group, thana, post_office, district):
+    """
+    Search entries of the available donors in one location, newest first,
+    and whether the result is stale
+    """
+    args = (blood_group, thana.pk, post_office.pk, district.pk)
+    return _search(f'area:{blood_group}:{district.pk}:{thana.pk}:{post_office.pk}',
+                   lambda: _area_donor_entries(*args))
@@ -0,0 +1,251 @@
+# roktodanbdweb/donor_snapshot.py
+"""
+Memory-mapped columnar snapshot of the searchable donors.
+
+``build_snapshot`` writes one fixed-width column per attribute into a single
+file (see ``COLUMNS``). Rows are sorted by a packed 64-bit location/blood
+group key and then newest registration first, so a find_blood search is two
+binary searches over the key column that return an already ordered slice.
+Every worker maps the file read-only, so all processes share one copy in the
+page cache instead of each sending the same filters to the database.
+
+Between rebuilds each worker folds in donors whose ``last_updated`` moved past
+the snapshot watermark (an in-memory overlay). When the file is missing, too
+old or unreadable, ``search_donor_ids`` returns None and callers fall back to
+the ORM.
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .models import Donor, BLOOD_GROUP_CODES
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RDSNAP01'
+# Written in native byte order; the sentinel rejects files from another arch
+BYTE_ORDER_SENTINEL = 0x01020304
+HEADER = struct.Struct('=8sIIqq')  # magic, sentinel, row count, built at (us), watermark (us)
+
+# (name, array typecode, item size). Offsets are 8-byte aligned.
+COLUMNS = (
+    ('key', 'Q', 8),            # district << 48 | thana << 32 | post office << 16 | blood group
+    ('registered', 'q', 8),     # registration time, epoch microseconds
+    ('donor_id', 'I', 4),
+    ('eligible_day', 'i', 4),   # eligible_from as days since 1970-01-01, 0 if never donated
+)
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+_lock = threading.Lock()
+_state = None
+
+
+def pack_key(blood_group_code, thana_id, post_office_id, district_id):
+    return ((district_id or 0) << 48) | ((thana_id or 0) << 32) | ((post_office_id or 0) << 16) | blood_group_code
+
+
+def _epoch_us(value):
+    return int(value.timestamp() * 1_000_000) if value else 0
+
+
+def _eligible_day(donor_eligible_from):
+    return donor_eligible_from.toordinal() - EPOCH_ORDINAL if donor_eligible_from else 0
+
+
+def _column_offsets(count):
+    offsets = {}
+    offset = HEADER.size + (-HEADER.size % 8)
+    for name, _, size in COLUMNS:
+        offsets[name] = offset
+        offset += count * size
+        offset += -offset % 8
+    return offsets, offset
+
+
+def _row(donor):
+    """(key, registered, donor_id, eligible_day) for a searchable donor, else None"""
+    if not (donor.is_active and donor.is_available) or donor.blood_group not in BLOOD_GROUP_CODES:
+        return None
+    return (
+        pack_key(BLOOD_GROUP_CODES[donor.blood_group], donor.thana_id, donor.post_office_id, donor.district_id),
+        _epoch_us(donor.registration_date),
+        donor.pk,
+        _eligible_day(donor.eligible_from),
+    )
+
+
+SNAPSHOT_FIELDS = (
+    'pk', 'blood_group', 'thana_id', 'post_office_id', 'district_id', 'is_active', 'is_available',
+    'last_donation_month', 'last_donation_year', 'registration_date', 'last_updated',
+)
+
+
+def build_snapshot(path=None):
+    """
+    Write a fresh snapshot of all searchable donors to ``path`` (default
+    ``settings.DONOR_SNAPSHOT_PATH``) and return the number of rows. The file
+    is replaced atomically, so mapped readers keep their old copy until they
+    reopen.
+    """
+    path = path or settings.DONOR_SNAPSHOT_PATH
+    built_at = datetime.now(dt_timezone.utc)
+    watermark = 0
+    rows = []
+    for donor in Donor.objects.only(*SNAPSHOT_FIELDS).iterator(chunk_size=2000):
+        watermark = max(watermark, _epoch_us(donor.last_updated))
+        row = _row(donor)
+        if row is not None:
+            rows.append(row)
+    # Newest registration first within each key
+    rows.sort(key=lambda row: (row[0], -row[1]))
+
+    offsets, size = _column_offsets(len(rows))
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as fh:
+        fh.write(HEADER.pack(MAGIC, BYTE_ORDER_SENTINEL, len(rows), _epoch_us(built_at), watermark))
+        for index, (name, typecode, itemsize) in enumerate(COLUMNS):
+            column = array(typecode, (row[index] for row in rows))
+            assert column.itemsize == itemsize, f'{typecode!r} is not {itemsize} bytes on this platform'
+            fh.seek(offsets[name])
+            column.tofile(fh)
+        fh.truncate(size)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+class DonorSnapshot:
+    """
+    Read-only view of a snapshot file. Columns are zero-copy memoryviews over
+    the shared mapping.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as fh:
+            stat = os.fstat(fh.fileno())
+            self.file_id = (stat.st_ino, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, sentinel, count, built_at, watermark = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or sentinel != BYTE_ORDER_SENTINEL:
+            self._mmap.close()
+            raise ValueError(f'{path} is not a donor snapshot for this platform')
+
+        self.count = count
+        self.built_at = built_at / 1_000_000
+        self.watermark = watermark
+        offsets, _ = _column_offsets(count)
+        view = memoryview(self._mmap)
+        self.columns = {
+            name: view[offsets[name]:offsets[name] + count * size].cast(typecode)
+            for name, typecode, size in COLUMNS
+        }
+
+    def key_range(self, key):
+        """(start, stop) of the rows with this key, newest registration first"""
+        keys = self.columns['key']
+        return bisect_left(keys, key), bisect_right(keys, key)
+
+
+class _WorkerState:
+    """The mapped snapshot plus the changes this worker has seen since it was built"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.watermark = snapshot.watermark
+        self.refreshed_at = time.monotonic()
+        # donor id -> (key, registered, donor_id, eligible_day), or None when
+        # the donor is no longer searchable
+        self.overlay = {}
+
+    def refresh(self):
+        """Fold in donors changed since the last refresh"""
+        changed = (Donor.objects.only(*SNAPSHOT_FIELDS)
+                   .filter(last_updated__gt=datetime.fromtimestamp(self.watermark / 1_000_000, dt_timezone.utc)))
+        for donor in changed:
+            self.overlay[donor.pk] = _row(donor)
+            self.watermark = max(self.watermark, _epoch_us(donor.last_updated))
+        self.refreshed_at = time.monotonic()
+
+    def search(self, key, eligible_on=None):
+        snapshot = self.snapshot
+        start, stop = snapshot.key_range(key)
+        donor_ids = snapshot.columns['donor_id'][start:stop]
+        registered = snapshot.columns['registered'][start:stop]
+        eligible_days = snapshot.columns['eligible_day'][start:stop]
+        max_day = eligible_on.toordinal() - EPOCH_ORDINAL if eligible_on else None
+
+        overlay = self.overlay
+        matches = [
+            (registered[i], donor_ids[i]) for i in range(stop - start)
+            if donor_ids[i] not in overlay and (max_day is None or eligible_days[i] <= max_day)
+        ]
+        if overlay:
+            matches.extend(
+                (row[1], row[2]) for row in overlay.values()
+                if row is not None and row[0] == key and (max_day is None or row[3] <= max_day)
+            )
+            matches.sort(reverse=True)
+        return [donor_id for _, donor_id in matches]
+
+
+def _current_state():
+    """
+    Return the worker's snapshot state, (re)mapping the file when it changed
+    and folding in recent donor changes. None if no usable snapshot exists.
+    """
+    global _state
+    path = settings.DONOR_SNAPSHOT_PATH
+    with _lock:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            _state = None
+            return None
+
+        if _state is None or _state.snapshot.file_id != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                _state = _WorkerState(DonorSnapshot(path))
+            except (OSError, ValueError, struct.error):
+                logger.exception('Could not map donor snapshot %s', path)
+                _state = None
+                return None
+
+        if time.time() - _state.snapshot.built_at > settings.DONOR_SNAPSHOT_MAX_AGE:
+            return None
+
+        if time.monotonic() - _state.refreshed_at >= settings.DONOR_SNAPSHOT_REFRESH_INTERVAL:
+            _state.refresh()
+        return _state
+
+
+def search_donor_ids(blood_group, thana, post_office, district, eligible_on=None):
+    """
+    Ids of searchable donors in this location with this blood group, newest
+    registration first. Locations may be instances or ids. Returns None when
+    no fresh snapshot is available, in which case the caller should query
+    the database.
+    """
+    if blood_group not in BLOOD_GROUP_CODES:
+        return []
+    state = _current_state()
+    if state is None:
+        return None
+    key = pack_key(
+        BLOOD_GROUP_CODES[blood_group],
+        getattr(thana, 'pk', thana),
+        getattr(post_office, 'pk', post_office),
+        getattr(district, 'pk', district),
+    )
+    return state.search(key, eligible_on)
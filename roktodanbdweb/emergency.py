@@ -0,0 +1,127 @@
+# roktodanbdweb/emergency.py
+"""
+Cached emergency feed: the active high and critical requests a donor can
+serve, nearest first.
+
+Every (donor blood group, thana) pair has one ranked list in the cache, so
+all donors of a group in a thana share it and a page view is a cache read.
+A list only holds requests in the donor's district or within FEED_RADIUS_KM
+of their thana, and is ordered and cut to FEED_SIZE in the query.
+Universal donors who only want other groups' critical requests get their
+own list, filtered before it is cut to FEED_SIZE.
+
+A list is only rebuilt (one query) after a blood request it could contain
+changes. Saving or deleting a request replaces the generation of every donor
+group that can serve it, or could serve its blood group before an edit (see
+signals.py), which orphans the old lists. A list also expires when its first
+request does.
+"""
+import math
+
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .geo import cells_within, distances_km
+from .models import BloodRequest, COMPATIBLE_DONOR_GROUPS, compatible_for
+from .tiered_cache import new_stamp
+
+EMERGENCY_URGENCY_LEVELS = ('critical', 'high')
+FEED_SIZE = 50
+# Requests further than this from the donor's thana only show up when they
+# are in the donor's district
+FEED_RADIUS_KM = 50
+# Upper bound on how long a list is kept when nothing in it expires sooner
+FEED_TIMEOUT = 60 * 60
+
+_GENERATION_KEY = 'emergency-feed:generation:{}'
+_FEED_KEY = 'emergency-feed:{}:{}:{}:{}'
+
+
+def _generation(blood_group):
+    key = _GENERATION_KEY.format(blood_group)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, new_stamp(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_emergency_feeds(*blood_groups_needed):
+    """Orphan the cached lists of every donor group that can serve any of ``blood_groups_needed``"""
+    donor_groups = set()
+    for blood_group_needed in blood_groups_needed:
+        donor_groups.update(COMPATIBLE_DONOR_GROUPS.get(blood_group_needed, ()))
+    for blood_group in donor_groups:
+        # A new random generation rather than incr(), which is not atomic on
+        # every cache backend (see tiered_cache.py)
+        cache.set(_GENERATION_KEY.format(blood_group), new_stamp(), None)
+
+
+def _rank(blood_group, thana, critical_only):
+    """Build the list for donors of ``blood_group`` in ``thana``: one query, ordered and cut in SQL"""
+    servable = Q(blood_group_needed__in=compatible_for(blood_group))
+    if critical_only:
+        servable = Q(blood_group_needed=blood_group) | (servable & Q(urgency_level='critical'))
+    requests = BloodRequest.objects.filter(
+        servable,
+        status='active',
+        urgency_level__in=EMERGENCY_URGENCY_LEVELS,
+        expires_at__gt=timezone.now(),
+    ).select_related('thana', 'district')
+    urgency = Case(*[When(urgency_level=level, then=Value(rank))
+                     for rank, level in enumerate(EMERGENCY_URGENCY_LEVELS)], output_field=IntegerField())
+    located = thana is not None and thana.latitude is not None
+
+    # Own thana, then by distance, then requests with no known location
+    if located:
+        # Squared equirectangular distance: orders like haversine at this
+        # scale and needs no trigonometry in SQL
+        d_latitude = F('latitude') - thana.latitude
+        d_longitude = (F('longitude') - thana.longitude) * math.cos(math.radians(thana.latitude))
+        proximity = Case(When(thana_id=thana.pk, then=Value(0.0)),
+                         default=d_latitude * d_latitude + d_longitude * d_longitude, output_field=FloatField())
+    elif thana is not None:
+        proximity = Case(When(thana_id=thana.pk, then=Value(0.0)), default=None, output_field=FloatField())
+    else:
+        proximity = Value(None, output_field=FloatField())
+    if thana is not None:
+        nearby = Q(thana_id=thana.pk) | Q(district_id=thana.district_id)
+        if located:
+            nearby |= Q(geo_cell__in=cells_within(thana.latitude, thana.longitude, FEED_RADIUS_KM))
+        requests = requests.filter(nearby)
+    requests = list(
+        requests.annotate(proximity=proximity, urgency_rank=urgency)
+        .order_by(F('proximity').asc(nulls_last=True), 'urgency_rank', '-created_at')[:FEED_SIZE]
+    )
+
+    for request in requests:
+        request.distance_km = None
+    if located:
+        with_point = [request for request in requests if request.latitude is not None]
+        distances = distances_km(thana.latitude, thana.longitude,
+                                 [(request.latitude, request.longitude) for request in with_point])
+        for request, distance in zip(with_point, distances):
+            request.distance_km = distance
+    return requests
+
+
+def emergency_feed(blood_group, thana, critical_only=False):
+    """
+    Active high and critical requests compatible with ``blood_group``, nearest
+    to ``thana`` first. With ``critical_only``, requests for other groups are
+    only included when critical. Requests that expired since the list was
+    built are dropped on the way out.
+    """
+    key = _FEED_KEY.format(blood_group, thana.pk if thana is not None else 0, int(critical_only),
+                           _generation(blood_group))
+    requests = cache.get(key)
+    if requests is None:
+        requests = _rank(blood_group, thana, critical_only)
+        timeout = FEED_TIMEOUT
+        if requests:
+            first_expiry = min(request.expires_at for request in requests)
+            timeout = max(1, min(timeout, int((first_expiry - timezone.now()).total_seconds()) + 1))
+        cache.set(key, requests, timeout)
+    now = timezone.now()
+    return [request for request in requests if request.expires_at > now]
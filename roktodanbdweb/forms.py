@@ -1,13 +1,91 @@
 from django import forms
 from django.contrib.auth.models import User
+from django.utils import timezone
 from datetime import datetime
+from functools import lru_cache
 from .models import *
 from .models import Recipient
 from django.core.exceptions import ValidationError
 from .utils import *
+from .locations import get_hierarchy
 
 
-class DonorRegistrationForm(forms.ModelForm):
+# ==================== SHARED CHOICE LISTS ====================
+# Built once per process and shared by every form instance, instead of being
+# rebuilt (with fresh widgets) in each form's __init__.
+
+BLOOD_GROUP_SELECT_CHOICES = (('', 'Select Your Blood Group'),) + tuple(Donor.BLOOD_GROUP_CHOICES)
+MONTH_SELECT_CHOICES = (('', 'Select Month'),) + tuple(Donor.MONTH_CHOICES)
+
+
+@lru_cache(maxsize=4)
+def _year_choices(current_year, span):
+    return (('', 'Select Year'),) + tuple(
+        (str(year), str(year)) for year in range(current_year, current_year - span, -1)
+    )
+
+
+def registration_year_choices():
+    """Last 10 years; the cache key rolls over with the calendar year"""
+    return _year_choices(timezone.localdate().year, 10)
+
+
+def profile_year_choices():
+    return _year_choices(timezone.localdate().year, 6)
+
+
+def district_choices():
+    return get_hierarchy().district_choices(blank_label='Select District')
+
+
+def thana_choices():
+    return get_hierarchy().thana_choices(blank_label='Select Thana')
+
+
+def post_office_choices():
+    return get_hierarchy().post_office_choices(blank_label='Select Post Office')
+
+
+class LocationFieldsMixin:
+    """
+    Posted district/thana/post office values are names; resolve them against
+    the cached location hierarchy so the model receives the matching rows.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        instance = getattr(self, 'instance', None)
+        if instance is not None and instance.pk:
+            hierarchy = get_hierarchy()
+            for field, lookup in (('district', hierarchy.districts), ('thana', hierarchy.thanas),
+                                  ('post_office', hierarchy.post_offices)):
+                location = lookup.get(getattr(instance, f'{field}_id', None))
+                if field in self.fields and location is not None:
+                    self.initial[field] = location.name
+
+    def clean(self):
+        cleaned_data = super().clean()
+        hierarchy = get_hierarchy()
+
+        district = hierarchy.district(cleaned_data.get('district'))
+        if 'district' in cleaned_data:
+            cleaned_data['district'] = district
+
+        for field, lookup, label in (('thana', hierarchy.thana, 'thana'),
+                                     ('post_office', hierarchy.post_office, 'post office')):
+            if field not in cleaned_data:
+                continue
+            name = cleaned_data[field]
+            location = lookup(name, district) if district else None
+            if name and district and location is None:
+                self.add_error(field, f"Please select a {label} in {district.name}.")
+            else:
+                cleaned_data[field] = location
+        return cleaned_data
+
+
+
+class DonorRegistrationForm(LocationFieldsMixin, forms.ModelForm):
     first_name = forms.CharField(
         max_length=100,
         required=True,
@@ -74,34 +152,7 @@ class DonorRegistrationForm(forms.ModelForm):
         })
     )
     thana = forms.ChoiceField(
-        choices=[
-            ('', 'Select Thana'),
-            ('Adabar', 'Adabar'),
-            ('Badda', 'Badda'),
-            ('Banani', 'Banani'),
-            ('Baridhara', 'Baridhara'),
-            ('Dhanmondi', 'Dhanmondi'),
-            ('Gulshan', 'Gulshan'),
-            ('Hatirjheel', 'Hatirjheel'),
-            ('Kafrul', 'Kafrul'),
-            ('Kalabagan', 'Kalabagan'),
-            ('Khilgaon', 'Khilgaon'),
-            ('Khilkhet', 'Khilkhet'),
-            ('Mirpur', 'Mirpur'),
-            ('Mohammadpur', 'Mohammadpur'),
-            ('Motijheel', 'Motijheel'),
-            ('New Market', 'New Market'),
-            ('Old Dhaka', 'Old Dhaka'),
-            ('Pallabi', 'Pallabi'),
-            ('Ramna', 'Ramna'),
-            ('Rampura', 'Rampura'),
-            ('Sabujbagh', 'Sabujbagh'),
-            ('Shah Ali', 'Shah Ali'),
-            ('Sher-e-Bangla Nagar', 'Sher-e-Bangla Nagar'),
-            ('Tejgaon', 'Tejgaon'),
-            ('Uttara', 'Uttara'),
-            ('Wari', 'Wari'),
-        ],
+        choices=thana_choices,
         required=True,
         widget=forms.Select(attrs={
             'class': 'form-control',
@@ -109,39 +160,21 @@ class DonorRegistrationForm(forms.ModelForm):
         })
     )
     post_office = forms.ChoiceField(
-        choices=[
-            ('', 'Select Post Office'),
-            ('Dhaka GPO', 'Dhaka GPO'),
-            ('Banani', 'Banani'),
-            ('Dhanmondi', 'Dhanmondi'),
-            ('Gulshan', 'Gulshan'),
-            ('Mirpur', 'Mirpur'),
-            ('Mohammadpur', 'Mohammadpur'),
-            ('Motijheel', 'Motijheel'),
-            ('New Market', 'New Market'),
-            ('Old Dhaka', 'Old Dhaka'),
-            ('Ramna', 'Ramna'),
-            ('Tejgaon', 'Tejgaon'),
-            ('Uttara', 'Uttara'),
-            ('Wari', 'Wari'),
-        ],
+        choices=post_office_choices,
         required=True,
         widget=forms.Select(attrs={
             'class': 'form-control',
             'id': 'postOffice'
         })
     )
-    district = forms.CharField(
-        max_length=50,
+    district = forms.ChoiceField(
+        choices=district_choices,
         initial='Dhaka',
         required=True,
-        widget=forms.Select(
-            choices=[('', 'Select District'), ('Dhaka', 'Dhaka')],
-            attrs={
-                'class': 'form-control',
-                'id': 'district'
-            }
-        )
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+            'id': 'district'
+        })
     )
 
     # Weight field (added as it's in HTML but not in original form)
@@ -159,6 +192,34 @@ class DonorRegistrationForm(forms.ModelForm):
         })
     )
 
+    blood_group = forms.ChoiceField(
+        choices=BLOOD_GROUP_SELECT_CHOICES,
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+            'id': 'bloodGroup'
+        })
+    )
+    last_donation_month = forms.TypedChoiceField(
+        choices=MONTH_SELECT_CHOICES,
+        required=False,
+        empty_value=None,
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+            'id': 'lastDonationMonth'
+        })
+    )
+    last_donation_year = forms.CharField(
+        required=False,
+        empty_value=None,
+        widget=forms.Select(
+            choices=registration_year_choices,
+            attrs={
+                'class': 'form-control',
+                'id': 'lastDonationYear'
+            }
+        )
+    )
+
     # Health declaration fields
     health_declaration = forms.BooleanField(
         required=True,
@@ -192,63 +253,6 @@ class DonorRegistrationForm(forms.ModelForm):
                 'max': 65,
                 'id': 'age'
             }),
-            'blood_group': forms.Select(
-                choices=[
-                    ('', 'Select Your Blood Group'),
-                    ('A+', 'A+'),
-                    ('A-', 'A-'),
-                    ('B+', 'B+'),
-                    ('B-', 'B-'),
-                    ('AB+', 'AB+'),
-                    ('AB-', 'AB-'),
-                    ('O+', 'O+'),
-                    ('O-', 'O-'),
-                ],
-                attrs={
-                    'class': 'form-control',
-                    'id': 'bloodGroup'
-                }
-            ),
-            'last_donation_month': forms.Select(
-                choices=[
-                    ('', 'Select Month'),
-                    ('January', 'January'),
-                    ('February', 'February'),
-                    ('March', 'March'),
-                    ('April', 'April'),
-                    ('May', 'May'),
-                    ('June', 'June'),
-                    ('July', 'July'),
-                    ('August', 'August'),
-                    ('September', 'September'),
-                    ('October', 'October'),
-                    ('November', 'November'),
-                    ('December', 'December'),
-                ],
-                attrs={
-                    'class': 'form-control',
-                    'id': 'lastDonationMonth'
-                }
-            ),
-            'last_donation_year': forms.Select(
-                choices=[
-                    ('', 'Select Year'),
-                    ('2024', '2024'),
-                    ('2023', '2023'),
-                    ('2022', '2022'),
-                    ('2021', '2021'),
-                    ('2020', '2020'),
-                    ('2019', '2019'),
-                    ('2018', '2018'),
-                    ('2017', '2017'),
-                    ('2016', '2016'),
-                    ('2015', '2015'),
-                ],
-                attrs={
-                    'class': 'form-control',
-                    'id': 'lastDonationYear'
-                }
-            ),
             'profile_image': forms.FileInput(attrs={
                 'class': 'form-control',
                 'accept': 'image/*',
@@ -357,7 +361,22 @@ class DonorRegistrationForm(forms.ModelForm):
         else:
             return super().save(commit=False)
 
-class DonorProfileUpdateForm(forms.ModelForm):
+class DonorProfileUpdateForm(LocationFieldsMixin, forms.ModelForm):
+    district = forms.ChoiceField(choices=district_choices,
+                                 widget=forms.Select(attrs={'class': 'form-control'}))
+    thana = forms.ChoiceField(choices=thana_choices,
+                              widget=forms.Select(attrs={'class': 'form-control'}))
+    post_office = forms.ChoiceField(choices=post_office_choices,
+                                    widget=forms.Select(attrs={'class': 'form-control'}))
+    blood_group = forms.ChoiceField(choices=BLOOD_GROUP_SELECT_CHOICES,
+                                    widget=forms.Select(attrs={'class': 'form-control'}))
+    last_donation_month = forms.TypedChoiceField(choices=MONTH_SELECT_CHOICES, required=False,
+                                                 empty_value=None,
+                                                 widget=forms.Select(attrs={'class': 'form-control'}))
+    last_donation_year = forms.CharField(required=False, empty_value=None,
+                                         widget=forms.Select(choices=profile_year_choices,
+                                                             attrs={'class': 'form-control'}))
+
     class Meta:
         model = Donor
         fields = [
@@ -370,120 +389,12 @@ class DonorProfileUpdateForm(forms.ModelForm):
         widgets = {
             'phone_number': forms.TextInput(attrs={'class': 'form-control'}),
             'age': forms.NumberInput(attrs={'class': 'form-control', 'min': 18, 'max': 65}),
-            'blood_group': forms.Select(attrs={'class': 'form-control'}),
             'house_holding_no': forms.TextInput(attrs={'class': 'form-control'}),
             'road_block': forms.TextInput(attrs={'class': 'form-control'}),
-            'thana': forms.Select(attrs={'class': 'form-control'}),
-            'post_office': forms.Select(attrs={'class': 'form-control'}),
-            'district': forms.TextInput(attrs={'class': 'form-control'}),
             'weight': forms.NumberInput(attrs={'class': 'form-control', 'min': 50, 'step': 0.1}),
-            'last_donation_month': forms.Select(attrs={'class': 'form-control'}),
-            'last_donation_year': forms.Select(attrs={'class': 'form-control'}),
             'profile_image': forms.FileInput(attrs={'class': 'form-control', 'accept': 'image/*'})
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        # Generate year choices
-        current_year = datetime.now().year
-        year_choices = [('', 'Select Year')] + [(str(year), str(year)) for year in
-                                                range(current_year, current_year - 6, -1)]
-        self.fields['last_donation_year'].widget = forms.Select(
-            choices=year_choices,
-            attrs={'class': 'form-control'}
-        )
-
-        # Month choices
-        month_choices = [
-            ('', 'Select Month'),
-            ('January', 'January'), ('February', 'February'), ('March', 'March'),
-            ('April', 'April'), ('May', 'May'), ('June', 'June'),
-            ('July', 'July'), ('August', 'August'), ('September', 'September'),
-            ('October', 'October'), ('November', 'November'), ('December', 'December')
-        ]
-
-        self.fields['last_donation_month'].widget = forms.Select(
-            choices=month_choices,
-            attrs={'class': 'form-control'}
-        )
-
-        # Add thana choices
-        thana_choices = [
-            ('', 'Select Thana'),
-            ('Adabar', 'Adabar'),
-            ('Badda', 'Badda'),
-            ('Banani', 'Banani'),
-            ('Baridhara', 'Baridhara'),
-            ('Dhanmondi', 'Dhanmondi'),
-            ('Gulshan', 'Gulshan'),
-            ('Hatirjheel', 'Hatirjheel'),
-            ('Kafrul', 'Kafrul'),
-            ('Kalabagan', 'Kalabagan'),
-            ('Khilgaon', 'Khilgaon'),
-            ('Khilkhet', 'Khilkhet'),
-            ('Mirpur', 'Mirpur'),
-            ('Mohammadpur', 'Mohammadpur'),
-            ('Motijheel', 'Motijheel'),
-            ('New Market', 'New Market'),
-            ('Old Dhaka', 'Old Dhaka'),
-            ('Pallabi', 'Pallabi'),
-            ('Ramna', 'Ramna'),
-            ('Rampura', 'Rampura'),
-            ('Sabujbagh', 'Sabujbagh'),
-            ('Shah Ali', 'Shah Ali'),
-            ('Sher-e-Bangla Nagar', 'Sher-e-Bangla Nagar'),
-            ('Tejgaon', 'Tejgaon'),
-            ('Uttara', 'Uttara'),
-            ('Wari', 'Wari'),
-        ]
-
-        self.fields['thana'].widget = forms.Select(
-            choices=thana_choices,
-            attrs={'class': 'form-control'}
-        )
-
-        # Add post office choices
-        post_office_choices = [
-            ('', 'Select Post Office'),
-            ('Dhaka GPO', 'Dhaka GPO'),
-            ('Banani', 'Banani'),
-            ('Dhanmondi', 'Dhanmondi'),
-            ('Gulshan', 'Gulshan'),
-            ('Mirpur', 'Mirpur'),
-            ('Mohammadpur', 'Mohammadpur'),
-            ('Motijheel', 'Motijheel'),
-            ('New Market', 'New Market'),
-            ('Old Dhaka', 'Old Dhaka'),
-            ('Ramna', 'Ramna'),
-            ('Tejgaon', 'Tejgaon'),
-            ('Uttara', 'Uttara'),
-            ('Wari', 'Wari'),
-        ]
-
-        self.fields['post_office'].widget = forms.Select(
-            choices=post_office_choices,
-            attrs={'class': 'form-control'}
-        )
-
-        # Add blood group choices
-        blood_group_choices = [
-            ('', 'Select Your Blood Group'),
-            ('A+', 'A+'),
-            ('A-', 'A-'),
-            ('B+', 'B+'),
-            ('B-', 'B-'),
-            ('AB+', 'AB+'),
-            ('AB-', 'AB-'),
-            ('O+', 'O+'),
-            ('O-', 'O-'),
-        ]
-
-        self.fields['blood_group'].widget = forms.Select(
-            choices=blood_group_choices,
-            attrs={'class': 'form-control'}
-        )
-
     def clean_phone_number(self):
         phone = self.cleaned_data.get('phone_number')
         # Exclude current instance from duplicate check
@@ -562,7 +473,13 @@ class DonorResponseForm(forms.ModelForm):
         self.fields['preferred_donation_time'].required = False
         self.fields['availability_notes'].required = False
 
-class RecipientRegistrationForm(forms.ModelForm):
+class RecipientRegistrationForm(LocationFieldsMixin, forms.ModelForm):
+    district = forms.ChoiceField(choices=district_choices, initial='Dhaka',
+                                 widget=forms.Select(attrs={'class': 'form-select'}))
+    thana = forms.ChoiceField(choices=thana_choices,
+                              widget=forms.Select(attrs={'class': 'form-select'}))
+    post_office = forms.ChoiceField(choices=post_office_choices,
+                                    widget=forms.Select(attrs={'class': 'form-select'}))
     # Add user fields
     first_name = forms.CharField(max_length=100, required=True)
     last_name = forms.CharField(max_length=100, required=True)
@@ -589,9 +506,6 @@ class RecipientRegistrationForm(forms.ModelForm):
         widgets = {
             'age': forms.NumberInput(attrs={'min': 1, 'max': 120}),
             'blood_group': forms.Select(attrs={'class': 'form-select'}),
-            'thana': forms.Select(attrs={'class': 'form-select'}),
-            'post_office': forms.Select(attrs={'class': 'form-select'}),
-            'district': forms.Select(attrs={'class': 'form-select'}),
         }
 
     def clean_email(self):
@@ -0,0 +1,129 @@
+# roktodanbdweb/geo.py
+"""
+Fixed-grid spatial index helpers.
+
+Rows with coordinates store ``geo_cell``: the id of the CELL_DEGREES x
+CELL_DEGREES grid square they fall in (an indexed integer column). A nearest
+search reads rings of cells around the query point, nearest ring first, and
+only computes exact haversine distances for the rows found there. It stops
+as soon as nothing in an unread ring could beat the k-th best distance.
+"""
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# 0.05 degrees is about 5.5 km north-south and 5.1 km east-west at Dhaka's
+# latitude, so the first ring already covers a typical thana.
+CELL_DEGREES = 0.05
+_COLUMNS = round(360 / CELL_DEGREES)
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'thana_centroids.json'
+
+
+def geo_cell(latitude, longitude):
+    """Grid cell id for a point, or None without coordinates"""
+    if latitude is None or longitude is None:
+        return None
+    row = math.floor((latitude + 90) / CELL_DEGREES)
+    column = math.floor((longitude + 180) / CELL_DEGREES) % _COLUMNS
+    return row * _COLUMNS + column
+
+
+def ring_cells(latitude, longitude, ring):
+    """Cell ids exactly ``ring`` cells away (Chebyshev distance) from the point's cell"""
+    row = math.floor((latitude + 90) / CELL_DEGREES)
+    column = math.floor((longitude + 180) / CELL_DEGREES)
+    if ring == 0:
+        return [row * _COLUMNS + column % _COLUMNS]
+    cells = []
+    for d_row in range(-ring, ring + 1):
+        step = 1 if abs(d_row) == ring else 2 * ring
+        for d_column in range(-ring, ring + 1, step):
+            cells.append((row + d_row) * _COLUMNS + (column + d_column) % _COLUMNS)
+    return cells
+
+
+def cell_size_km(latitude):
+    """Shortest side of a grid cell around this latitude"""
+    return CELL_DEGREES * KM_PER_DEGREE * min(1.0, math.cos(math.radians(abs(latitude) + CELL_DEGREES)))
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def distances_km(latitude, longitude, points):
+    """
+    Haversine distances from one origin to many (latitude, longitude) points,
+    computed in a single pass with the origin terms hoisted out of the loop
+    """
+    phi1 = math.radians(latitude)
+    cos_phi1 = math.cos(phi1)
+    lambda1 = math.radians(longitude)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    return [
+        2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0,
+            sin((radians(lat) - phi1) / 2) ** 2
+            + cos_phi1 * cos(radians(lat)) * sin((radians(lng) - lambda1) / 2) ** 2)))
+        for lat, lng in points
+    ]
+
+
+def nearest(queryset, latitude, longitude, k=10, max_km=25):
+    """
+    The ``k`` rows of ``queryset`` nearest to the point and within ``max_km``,
+    as a list of (pk, distance_km) pairs, nearest first. The queryset's model
+    needs ``latitude``, ``longitude`` and ``geo_cell`` columns.
+    """
+    cell_km = cell_size_km(latitude)
+    max_ring = math.ceil(max_km / cell_km)
+    found = []
+    for ring in range(max_ring + 1):
+        rows = list(queryset.filter(geo_cell__in=ring_cells(latitude, longitude, ring))
+                    .values_list('pk', 'latitude', 'longitude'))
+        if rows:
+            distances = distances_km(latitude, longitude, [(lat, lng) for _, lat, lng in rows])
+            found.extend((distance, pk) for (pk, _, _), distance in zip(rows, distances)
+                         if distance <= max_km)
+            found.sort()
+            del found[k:]
+        # Anything outside rings 0..ring is at least ring * cell_km away
+        if len(found) >= k and found[-1][0] <= ring * cell_km:
+            break
+    return [(pk, distance) for distance, pk in found]
+
+
+def cells_within(latitude, longitude, radius_km):
+    """Cell ids covering every point within ``radius_km`` of the point"""
+    max_ring = math.ceil(radius_km / cell_size_km(latitude))
+    return [cell for ring in range(max_ring + 1) for cell in ring_cells(latitude, longitude, ring)]
+
+
+def within(queryset, latitude, longitude, radius_km):
+    """All rows of ``queryset`` within ``radius_km`` as {pk: distance_km}, in one query"""
+    cells = cells_within(latitude, longitude, radius_km)
+    rows = list(queryset.filter(geo_cell__in=cells).values_list('pk', 'latitude', 'longitude'))
+    distances = distances_km(latitude, longitude, [(lat, lng) for _, lat, lng in rows])
+    return {pk: distance for (pk, _, _), distance in zip(rows, distances) if distance <= radius_km}
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """
+    Bundled offline thana centroids: {(district name, thana name): (latitude, longitude)}
+    """
+    with open(GAZETTEER_PATH, encoding='utf-8') as fh:
+        data = json.load(fh)
+    return {
+        (district, thana): tuple(point)
+        for district, thanas in data.items()
+        for thana, point in thanas.items()
+    }
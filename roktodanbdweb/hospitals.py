@@ -0,0 +1,116 @@
+# roktodanbdweb/hospitals.py
+"""
+Prefix trie over the hospital registry, for autocomplete.
+
+The trie is built once from the active hospitals and kept in the tiered
+cache, so each worker answers lookups from its in-process copy. Every node keeps
+the ids of its best few completions, so a lookup never visits the subtree
+below the typed prefix. Nodes are stored flat, addressed by their prefix, so
+a lookup is a single dict probe. Nodes with the same completions share one
+tuple, which keeps long single-hospital tails cheap. Full names and aliases
+are indexed from their first character, and so is every later word, so
+"medical" finds "Dhaka Medical College Hospital". Whole-name matches rank
+before mid-name matches. Saving or deleting a hospital retires the
+``hospitals`` namespace (see signals.py), which makes every worker reload.
+"""
+import re
+
+from django.core.cache import caches
+
+from .models import Hospital
+
+_TRIE_KEY = 'hospitals:trie'
+_cache = caches['tiered']
+
+MAX_SUGGESTIONS = 10
+# Prefixes longer than this are matched on their first MAX_DEPTH characters
+MAX_DEPTH = 24
+
+# Common abbreviations in free-text hospital names
+ABBREVIATIONS = {
+    'hosp': 'hospital',
+    'hospt': 'hospital',
+    'med': 'medical',
+    'clg': 'college',
+    'coll': 'college',
+    'univ': 'university',
+    'gen': 'general',
+    'diag': 'diagnostic',
+    'ctr': 'centre',
+    'center': 'centre',
+    'bsmmu': 'bangabandhu sheikh mujib medical university',
+}
+
+
+def normalize_name(name):
+    """Lower-case, drop punctuation and expand common abbreviations"""
+    words = re.sub(r'[^0-9a-z]+', ' ', (name or '').lower()).split()
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+class HospitalTrie:
+    """
+    Prefix trie over normalized hospital names and aliases, stored as
+    ``{prefix: ids}`` where ``ids`` are that node's top completions.
+    """
+
+    def __init__(self, hospitals):
+        self.hospitals = {hospital.id: hospital for hospital in hospitals}
+        self._nodes = {}
+        # normalized name or alias -> hospital id, for exact matching
+        self.names = {}
+
+        entries = []
+        for hospital in sorted(self.hospitals.values(), key=lambda h: h.name.lower()):
+            for text in [hospital.name] + hospital.alias_list:
+                key = normalize_name(text)
+                if key:
+                    self.names.setdefault(key, hospital.id)
+                    entries.append((key, hospital.id))
+
+        # Whole names first so they take the top slots of every node they share
+        for key, hospital_id in entries:
+            self._insert(key, hospital_id)
+        for key, hospital_id in entries:
+            for match in re.finditer(r' (?=\S)', key):
+                self._insert(key[match.end():], hospital_id)
+
+        shared = {}
+        self._nodes = {prefix: shared.setdefault(tuple(ids), tuple(ids))
+                       for prefix, ids in self._nodes.items()}
+
+    @classmethod
+    def load(cls):
+        return cls(list(Hospital.objects.filter(is_active=True).select_related('thana')))
+
+    def _insert(self, key, hospital_id):
+        for end in range(1, min(len(key), MAX_DEPTH) + 1):
+            ids = self._nodes.setdefault(key[:end], [])
+            if len(ids) < MAX_SUGGESTIONS and hospital_id not in ids:
+                ids.append(hospital_id)
+
+    def suggest(self, prefix, limit=MAX_SUGGESTIONS):
+        """Hospitals whose name, an alias, or a word within them starts with ``prefix``"""
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        ids = self._nodes.get(key[:MAX_DEPTH], ())
+        return [self.hospitals[hospital_id] for hospital_id in ids[:limit]]
+
+    def match(self, name):
+        """The hospital whose normalized name or alias equals ``name``, or None"""
+        return self.hospitals.get(self.names.get(normalize_name(name)))
+
+
+def get_hospital_trie():
+    """Return the cached HospitalTrie, building it on first use"""
+    trie = _cache.get(_TRIE_KEY)
+    if trie is None:
+        trie = HospitalTrie.load()
+        _cache.set(_TRIE_KEY, trie, None)
+    return trie
+
+
+def invalidate_hospital_trie():
+    """Make every worker rebuild the trie on its next lookup"""
+    _cache.invalidate_namespace('hospitals')
@@ -0,0 +1,224 @@
+# roktodanbdweb/locations.py
+"""
+Cached District -> Thana -> Post Office hierarchy.
+
+The hierarchy is tiny (64 districts, a few hundred thanas) and changes only
+when an admin edits it, so it is loaded once into the tiered cache and each
+worker answers name/id lookups and choice lists from its in-process copy.
+Saving or deleting a location row retires the ``locations`` namespace (see
+signals.py), which makes every worker reload.
+"""
+import hashlib
+import json
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from .models import District, Thana, PostOffice
+
+_HIERARCHY_KEY = 'locations:hierarchy'
+# The backend is thread-safe and its L1 is per process, so one instance serves
+# every thread without a caches[] lookup per call
+_cache = caches['tiered']
+
+
+class LocationHierarchy:
+    """
+    Immutable snapshot of all location rows, indexed for lookups
+    """
+
+    def __init__(self, districts, thanas, post_offices):
+        self.districts = {district.id: district for district in districts}
+        self.thanas = {thana.id: thana for thana in thanas}
+        self.post_offices = {post_office.id: post_office for post_office in post_offices}
+
+        self._district_ids = {district.name.lower(): district.id for district in districts}
+        self._thana_ids = {(thana.district_id, thana.name.lower()): thana.id for thana in thanas}
+        self._post_office_ids = {
+            (post_office.district_id, post_office.name.lower()): post_office.id
+            for post_office in post_offices
+        }
+
+        # Name -> ids across all districts, for lookups without a district
+        self._thana_ids_by_name = defaultdict(list)
+        for thana in thanas:
+            self._thana_ids_by_name[thana.name.lower()].append(thana.id)
+        self._post_office_ids_by_name = defaultdict(list)
+        for post_office in post_offices:
+            self._post_office_ids_by_name[post_office.name.lower()].append(post_office.id)
+
+        self.thanas_by_district = defaultdict(list)
+        for thana in sorted(thanas, key=lambda t: t.name):
+            self.thanas_by_district[thana.district_id].append(thana)
+        self.post_offices_by_district = defaultdict(list)
+        for post_office in sorted(post_offices, key=lambda p: p.name):
+            self.post_offices_by_district[post_office.district_id].append(post_office)
+
+        self._district_blobs = {}
+        self._choice_cache = {}
+
+    @classmethod
+    def load(cls):
+        return cls(
+            list(District.objects.order_by('name')),
+            list(Thana.objects.order_by('name')),
+            list(PostOffice.objects.order_by('name')),
+        )
+
+    # ---------- lookups ----------
+
+    def district(self, name):
+        """Return the District with this name, or None"""
+        if not name:
+            return None
+        district_id = self._district_ids.get(str(name).strip().lower())
+        return self.districts.get(district_id)
+
+    def thana(self, name, district=None):
+        """
+        Return the Thana with this name. Without a district the name must be
+        unambiguous across the whole country.
+        """
+        if not name:
+            return None
+        key = str(name).strip().lower()
+        if district is not None:
+            return self.thanas.get(self._thana_ids.get((_pk(district), key)))
+        matches = self._thana_ids_by_name.get(key, [])
+        return self.thanas[matches[0]] if len(matches) == 1 else None
+
+    def post_office(self, name, district=None):
+        """Return the PostOffice with this name (see ``thana`` for ambiguity rules)"""
+        if not name:
+            return None
+        key = str(name).strip().lower()
+        if district is not None:
+            return self.post_offices.get(self._post_office_ids.get((_pk(district), key)))
+        matches = self._post_office_ids_by_name.get(key, [])
+        return self.post_offices[matches[0]] if len(matches) == 1 else None
+
+    def thana_name(self, thana_id):
+        thana = self.thanas.get(thana_id)
+        return thana.name if thana else ''
+
+    # ---------- choice lists (value = name, as posted by the templates) ----------
+    # Memoized per snapshot, so every form render shares the same tuples.
+
+    def district_choices(self, blank_label=None):
+        return self._choices('district', None, blank_label, lambda: sorted(
+            self.districts.values(), key=lambda d: d.name))
+
+    def thana_choices(self, district=None, blank_label=None):
+        if district is not None:
+            return self._choices('thana', _pk(district), blank_label,
+                                 lambda: self.thanas_by_district.get(_pk(district), []))
+        return self._choices('thana', None, blank_label, lambda: sorted(
+            self.thanas.values(), key=lambda t: t.name))
+
+    def post_office_choices(self, district=None, blank_label=None):
+        if district is not None:
+            return self._choices('post_office', _pk(district), blank_label,
+                                 lambda: self.post_offices_by_district.get(_pk(district), []))
+        return self._choices('post_office', None, blank_label, lambda: sorted(
+            self.post_offices.values(), key=lambda p: p.name))
+
+    def _choices(self, kind, district_id, blank_label, rows):
+        key = (kind, district_id, blank_label)
+        choices = self._choice_cache.get(key)
+        if choices is None:
+            choices = _unique_name_choices(rows())
+            if blank_label is not None:
+                choices = (('', blank_label),) + choices
+            self._choice_cache[key] = choices
+        return choices
+
+    # ---------- precomputed JSON blobs for the location API ----------
+
+    @cached_property
+    def version(self):
+        """Content hash of the whole hierarchy; changes whenever any row changes"""
+        rows = (
+            sorted((d.id, d.name, d.division) for d in self.districts.values()),
+            sorted((t.id, t.district_id, t.name) for t in self.thanas.values()),
+            sorted((p.id, p.district_id, p.thana_id, p.name) for p in self.post_offices.values()),
+        )
+        return hashlib.sha1(json.dumps(rows).encode()).hexdigest()[:12]
+
+    @cached_property
+    def index_blob(self):
+        """(body, etag) listing every district with the versioned URL of its children"""
+        return _blob({
+            'version': self.version,
+            'districts': [
+                {
+                    'id': district.id,
+                    'name': district.name,
+                    'division': district.division,
+                    'url': reverse('location_district', args=[self.version, district.id]),
+                }
+                for district in sorted(self.districts.values(), key=lambda d: d.name)
+            ],
+        })
+
+    def district_blob(self, district_id):
+        """(body, etag) with the thanas and post offices of one district, or None"""
+        blob = self._district_blobs.get(district_id)
+        if blob is None and district_id in self.districts:
+            blob = _blob({
+                'version': self.version,
+                'district': district_id,
+                'thanas': [{'id': t.id, 'name': t.name}
+                           for t in self.thanas_by_district.get(district_id, [])],
+                'post_offices': [{'id': p.id, 'name': p.name, 'thana': p.thana_id}
+                                 for p in self.post_offices_by_district.get(district_id, [])],
+            })
+            self._district_blobs[district_id] = blob
+        return blob
+
+
+def _blob(payload):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    return body, '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+
+
+def _pk(value):
+    return value.pk if hasattr(value, 'pk') else value
+
+
+def _unique_name_choices(rows):
+    seen = set()
+    choices = []
+    for row in rows:
+        if row.name not in seen:
+            seen.add(row.name)
+            choices.append((row.name, row.name))
+    return tuple(choices)
+
+
+def get_hierarchy():
+    """Return the cached LocationHierarchy, loading it on first use"""
+    hierarchy = _cache.get(_HIERARCHY_KEY)
+    if hierarchy is None:
+        hierarchy = LocationHierarchy.load()
+        _cache.set(_HIERARCHY_KEY, hierarchy, None)
+    return hierarchy
+
+
+def invalidate_hierarchy():
+    """Make every worker reload the hierarchy on its next lookup"""
+    _cache.invalidate_namespace('locations')
+
+
+def resolve_location(district_name, thana_name=None, post_office_name=None):
+    """
+    Map posted location names to (district, thana, post_office) instances.
+    Unknown names come back as None.
+    """
+    hierarchy = get_hierarchy()
+    district = hierarchy.district(district_name)
+    thana = hierarchy.thana(thana_name, district) if district else hierarchy.thana(thana_name)
+    post_office = (hierarchy.post_office(post_office_name, district) if district
+                   else hierarchy.post_office(post_office_name))
+    return district, thana, post_office
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from roktodanbdweb.geo import geo_cell, load_gazetteer
+from roktodanbdweb.locations import invalidate_hierarchy
+from roktodanbdweb.models import Thana, Donor, BloodRequest, Hospital
+
+GEO_FIELDS = ['latitude', 'longitude', 'geo_cell', 'approximate_location']
+
+
+class Command(BaseCommand):
+    help = ("Load thana centroids from the bundled gazetteer, then give donors, blood "
+            "requests and hospitals without coordinates the centroid of their thana. "
+            "Warns about thanas left without a centroid.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Rows updated per statement (default: 1000)")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        gazetteer = {(district.lower(), thana.lower()): point
+                     for (district, thana), point in load_gazetteer().items()}
+        thanas = []
+        for thana in Thana.objects.select_related('district').filter(latitude=None):
+            point = gazetteer.get((thana.district.name.lower(), thana.name.lower()))
+            if point:
+                thana.latitude, thana.longitude = point
+                thanas.append(thana)
+        Thana.objects.bulk_update(thanas, ['latitude', 'longitude'])
+        # bulk_update skips the signal that drops the cached hierarchy
+        invalidate_hierarchy()
+        self.stdout.write(f"Thana centroids loaded: {len(thanas)}")
+
+        for model in (Donor, BloodRequest, Hospital):
+            rows = (model.objects
+                    .filter(Q(latitude=None) | Q(longitude=None) | Q(approximate_location=True))
+                    .only('pk', 'thana', *GEO_FIELDS)
+                    .order_by('pk'))
+            updated = 0
+            with transaction.atomic():
+                batch = []
+                for row in rows.iterator(chunk_size=batch_size):
+                    if row.apply_thana_centroid():
+                        row.geo_cell = geo_cell(row.latitude, row.longitude)
+                        batch.append(row)
+                    if len(batch) >= batch_size:
+                        model.objects.bulk_update(batch, GEO_FIELDS)
+                        updated += len(batch)
+                        batch = []
+                model.objects.bulk_update(batch, GEO_FIELDS)
+                updated += len(batch)
+            self.stdout.write(f"{model._meta.verbose_name_plural} updated: {updated}")
+
+        # Rows in these thanas have no coordinates, so nearest searches skip
+        # them. Only a warning: the deploy must still go on to build the
+        # search indexes.
+        missing = (Thana.objects.filter(Q(latitude=None) | Q(longitude=None))
+                   .select_related('district').annotate(donor_count=Count('donors'))
+                   .order_by('district__name', 'name'))
+        for thana in missing:
+            self.stderr.write(self.style.WARNING(
+                f"No centroid for {thana.district.name} / {thana.name} ({thana.donor_count} donors)"
+            ))
+        if missing:
+            self.stderr.write(self.style.WARNING(
+                f"{len(missing)} thanas have no centroid. Add them to roktodanbdweb/data/thana_centroids.json "
+                f"or set their latitude and longitude in the admin, then run this command again."
+            ))
+
+        self.stdout.write(self.style.SUCCESS("Coordinates backfilled."))
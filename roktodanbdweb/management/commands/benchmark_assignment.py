@@ -0,0 +1,77 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from roktodanbdweb.assignment import (
+    KM_COST, MAX_KM, MISMATCH_COST, URGENCY_VALUE, DonorCandidate, RequestDemand, solve_assignment
+)
+from roktodanbdweb.geo import distances_km
+from roktodanbdweb.models import COMPATIBLE_DONOR_GROUPS, Donor
+
+# Roughly the Dhaka metropolitan area
+LATITUDE_RANGE = (23.70, 23.90)
+LONGITUDE_RANGE = (90.33, 90.45)
+
+
+class Command(BaseCommand):
+    help = ("Time the donor assignment optimizer on a synthetic mass-casualty scenario "
+            "and compare it with notifying the nearest free donors request by request")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--donors', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--max-units', type=int, default=3,
+                            help="Units needed per request are drawn from 1..max-units (default: 3)")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        groups = [group for group, _ in Donor.BLOOD_GROUP_CHOICES]
+        # Approximate Bangladeshi blood group distribution
+        weights = [24, 1, 33, 1, 8, 0.5, 31, 1.5]
+
+        def point():
+            return rng.uniform(*LATITUDE_RANGE), rng.uniform(*LONGITUDE_RANGE)
+
+        donors = [DonorCandidate(i, rng.choices(groups, weights)[0], *point())
+                  for i in range(options['donors'])]
+        requests = [RequestDemand(i, rng.choices(groups, weights)[0], rng.randint(1, options['max_units']),
+                                  rng.choice(list(URGENCY_VALUE)), *point())
+                    for i in range(options['requests'])]
+        units = sum(request.units for request in requests)
+        self.stdout.write(f"{len(donors)} donors, {len(requests)} requests, {units} units")
+
+        started = time.perf_counter()
+        plan = solve_assignment(requests, donors)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"optimizer: {elapsed:.2f}s, {plan.assigned_units} units assigned, "
+                          f"profit {plan.total_profit:.0f}")
+
+        started = time.perf_counter()
+        assigned, profit = self._greedy(requests, donors)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"greedy:    {elapsed:.2f}s, {assigned} units assigned, profit {profit:.0f}")
+
+    @staticmethod
+    def _greedy(requests, donors):
+        """Each request in arrival order takes its best still-free donors"""
+        taken = set()
+        assigned = 0
+        profit = 0.0
+        for request in requests:
+            compatible = COMPATIBLE_DONOR_GROUPS[request.blood_group]
+            urgency_value = URGENCY_VALUE[request.urgency]
+            free = [donor for donor in donors if donor.id not in taken and donor.blood_group in compatible]
+            distances = distances_km(request.latitude, request.longitude,
+                                     [(donor.latitude, donor.longitude) for donor in free])
+            ranked = sorted(
+                (urgency_value - KM_COST * distance
+                 - (MISMATCH_COST if donor.blood_group != request.blood_group else 0), donor.id)
+                for donor, distance in zip(free, distances) if distance <= MAX_KM
+            )
+            chosen = [(gain, donor_id) for gain, donor_id in reversed(ranked) if gain > 0][:request.units]
+            taken.update(donor_id for _, donor_id in chosen)
+            assigned += len(chosen)
+            profit += sum(gain for gain, _ in chosen)
+        return assigned, profit
@@ -0,0 +1,70 @@
+import timeit
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from roktodanbdweb.donor_bitmaps import (
+    DonorBitmapIndex, BloodGroup, InThana, Active, Available, EligibleOn, WeightAtLeast
+)
+from roktodanbdweb.models import Donor
+
+
+class Command(BaseCommand):
+    help = "Compare bitmap index counts and id lists with the equivalent ORM queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200,
+                            help="Repetitions per measurement (default: 200)")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        index = DonorBitmapIndex.load()
+
+        busiest = list(Donor.objects.exclude(thana=None).values_list('thana')
+                       .annotate(n=Count('pk')).order_by('-n')[:2])
+        if not busiest:
+            self.stdout.write(self.style.WARNING("No donors with a thana to benchmark against."))
+            return
+        thanas = [thana_id for thana_id, _ in busiest]
+        today = timezone.localdate()
+
+        # "Eligible O- donors in thana A or B who weigh at least 55 kg"
+        expression = (BloodGroup('O-') & (InThana(thanas[0]) | InThana(thanas[-1]))
+                      & Active() & Available() & EligibleOn(today) & WeightAtLeast(55))
+        queryset = Donor.objects.filter(
+            Q(thana_id=thanas[0]) | Q(thana_id=thanas[-1]),
+            blood_group='O-', is_active=True, is_available=True, weight__gte=55,
+        ).exclude(self._ineligible(today))
+
+        cases = [
+            ('count', lambda: index.count(expression), lambda: queryset.count()),
+            ('ids', lambda: index.ids(expression),
+             lambda: list(queryset.order_by('pk').values_list('pk', flat=True))),
+            ('count NOT available', lambda: index.count(~Available()),
+             lambda: Donor.objects.filter(is_available=False).count()),
+        ]
+
+        self.stdout.write(f"{Donor.objects.count()} donors, thanas {thanas}")
+        self.stdout.write(f"{'query':<22}{'bitmap (us)':>14}{'orm (us)':>14}{'match':>8}")
+        for name, bitmap_call, orm_call in cases:
+            bitmap_time = timeit.timeit(bitmap_call, number=iterations) / iterations
+            orm_time = timeit.timeit(orm_call, number=iterations) / iterations
+            match = bitmap_call() == orm_call()
+            self.stdout.write(f"{name:<22}{bitmap_time * 1e6:>14.1f}{orm_time * 1e6:>14.1f}{str(match):>8}")
+
+    @staticmethod
+    def _ineligible(today):
+        """
+        Q matching donors still inside the 90-day gap: their last donation
+        month is one of the few (year, month) pairs within ~4 months of today
+        """
+        months = [month for month, _ in Donor.MONTH_CHOICES]
+        condition = Q(pk__in=[])
+        year, month = today.year + 1, 12
+        while True:
+            if date(year, month, 1) + timedelta(days=90) <= today:
+                return condition
+            condition |= Q(last_donation_year=str(year), last_donation_month=months[month - 1])
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
@@ -0,0 +1,36 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from roktodanbdweb.forms import (
+    DonorRegistrationForm, DonorProfileUpdateForm, RecipientRegistrationForm
+)
+from roktodanbdweb.locations import get_hierarchy
+from roktodanbdweb.models import Donor
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark construction and rendering of the registration and profile forms"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500,
+                            help="Number of form instances per measurement (default: 500)")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        # Load the location hierarchy up front so the first measurement
+        # doesn't include the one-off database read
+        get_hierarchy()
+
+        cases = [
+            ('DonorRegistrationForm', lambda: DonorRegistrationForm()),
+            ('DonorProfileUpdateForm', lambda: DonorProfileUpdateForm(instance=Donor())),
+            ('RecipientRegistrationForm', lambda: RecipientRegistrationForm()),
+        ]
+
+        self.stdout.write(f"{'form':<28}{'construct (us)':>16}{'construct+render (us)':>24}")
+        for name, build in cases:
+            construct = timeit.timeit(build, number=iterations) / iterations
+            render = timeit.timeit(lambda: build().as_p(), number=iterations) / iterations
+            self.stdout.write(f"{name:<28}{construct * 1e6:>16.1f}{render * 1e6:>24.1f}")
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from roktodanbdweb.donor_snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = ("Write the memory-mapped donor snapshot used by donor search. "
+            "Run it periodically (e.g. from cron) well within DONOR_SNAPSHOT_MAX_AGE.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None,
+                            help="Output file (default: settings.DONOR_SNAPSHOT_PATH)")
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.DONOR_SNAPSHOT_PATH
+        started = time.perf_counter()
+        count = build_snapshot(path)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} searchable donors to {path} in {elapsed:.2f}s."
+        ))
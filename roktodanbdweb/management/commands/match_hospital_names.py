@@ -0,0 +1,82 @@
+import difflib
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from roktodanbdweb.geo import geo_cell
+from roktodanbdweb.hospitals import HospitalTrie, normalize_name
+from roktodanbdweb.models import BloodRequest, DonationHistory
+
+
+class Command(BaseCommand):
+    help = ("Link blood requests and donation records to registry hospitals by "
+            "fuzzy-matching their free-text hospital_name")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cutoff', type=float, default=0.85,
+                            help="Minimum similarity (0-1) for a fuzzy match (default: 0.85)")
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Distinct names matched per transaction (default: 200)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Print the matches without saving them")
+
+    def handle(self, *args, **options):
+        trie = HospitalTrie.load()
+        if not trie.names:
+            self.stdout.write(self.style.WARNING("The hospital registry is empty."))
+            return
+        self.trie = trie
+        self.candidates = list(trie.names)
+        self.cutoff = options['cutoff']
+        self.matched = {}  # normalized name -> hospital or None, shared by both models
+
+        for model in (BloodRequest, DonationHistory):
+            # Each distinct spelling is matched once, then linked with one UPDATE
+            names = list(model.objects.filter(hospital=None).exclude(hospital_name=None)
+                         .exclude(hospital_name='').values_list('hospital_name', flat=True)
+                         .distinct().order_by('hospital_name'))
+            linked = 0
+            for start in range(0, len(names), options['batch_size']):
+                batch = names[start:start + options['batch_size']]
+                with transaction.atomic():
+                    for raw_name in batch:
+                        hospital = self._match(raw_name)
+                        if hospital is None:
+                            continue
+                        if options['dry_run']:
+                            self.stdout.write(f"  {raw_name!r} -> {hospital.name}")
+                            continue
+                        linked += self._link(model, raw_name, hospital)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {len(names)} distinct unlinked names, "
+                f"{linked} rows linked"
+            )
+
+    def _match(self, raw_name):
+        key = normalize_name(raw_name)
+        if key not in self.matched:
+            hospital = self.trie.match(raw_name)
+            if hospital is None and ' ' in key:
+                # A multi-word name that only one registry entry starts with,
+                # e.g. "Dhaka Medical College" for "... College Hospital"
+                completions = self.trie.suggest(key, limit=2)
+                hospital = completions[0] if len(completions) == 1 else None
+            if hospital is None and key:
+                close = difflib.get_close_matches(key, self.candidates, n=1, cutoff=self.cutoff)
+                hospital = self.trie.hospitals[self.trie.names[close[0]]] if close else None
+            self.matched[key] = hospital
+        return self.matched[key]
+
+    @staticmethod
+    def _link(model, raw_name, hospital):
+        rows = model.objects.filter(hospital=None, hospital_name=raw_name)
+        if model is BloodRequest and hospital.latitude is not None and not hospital.approximate_location:
+            # Requests without exact coordinates move to the hospital
+            rows.filter(Q(latitude=None) | Q(approximate_location=True)).update(
+                latitude=hospital.latitude,
+                longitude=hospital.longitude,
+                geo_cell=geo_cell(hospital.latitude, hospital.longitude),
+                approximate_location=False,
+            )
+        return rows.update(hospital=hospital)
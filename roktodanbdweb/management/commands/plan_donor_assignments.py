@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from roktodanbdweb.assignment import MAX_KM, plan_for_region
+from roktodanbdweb.models import District
+from roktodanbdweb.utils import send_blood_request_email_to_donor
+
+
+class Command(BaseCommand):
+    help = ("Assign eligible donors to all active blood requests at once and print "
+            "who to notify for each request, optionally sending the emails")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--district', help="Only plan for requests in this district (name)")
+        parser.add_argument('--max-km', type=float, default=MAX_KM,
+                            help=f"Never propose a donor further away than this (default: {MAX_KM})")
+        parser.add_argument('--notify', action='store_true',
+                            help="Email the assigned donors instead of only printing the plan")
+
+    def handle(self, *args, **options):
+        district = None
+        if options['district']:
+            district = District.objects.filter(name__iexact=options['district']).first()
+            if district is None:
+                self.stderr.write(self.style.ERROR(f"Unknown district: {options['district']}"))
+                return
+
+        plan, requests, donors = plan_for_region(district, max_km=options['max_km'])
+        sent = 0
+        for request_id, request in requests.items():
+            assigned = plan.assignments.get(request_id, [])
+            if not assigned and request_id not in plan.unfilled:
+                continue
+            self.stdout.write(
+                f"Request #{request_id} ({request.blood_group_needed}, {request.urgency_level}, "
+                f"{request.patient_name}):"
+            )
+            for donor_id, distance in assigned:
+                donor = donors[donor_id]
+                self.stdout.write(f"  notify  {donor.full_name} ({donor.blood_group}, {distance:.1f} km)")
+                if options['notify'] and send_blood_request_email_to_donor(donor, request, request.recipient):
+                    sent += 1
+            for donor_id, distance in plan.backups.get(request_id, []):
+                donor = donors[donor_id]
+                self.stdout.write(f"  backup  {donor.full_name} ({donor.blood_group}, {distance:.1f} km)")
+            if request_id in plan.unfilled:
+                self.stdout.write(self.style.WARNING(f"  {plan.unfilled[request_id]} unit(s) without a donor"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{plan.assigned_units} units assigned across {len(requests)} active requests"
+            + (f", {sent} emails sent" if options['notify'] else "")
+        ))
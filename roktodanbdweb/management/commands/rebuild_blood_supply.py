@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from roktodanbdweb.blood_supply import rebuild_supply
+
+
+class Command(BaseCommand):
+    help = ("Recount the blood-supply matrix (donors per thana and blood group) from the "
+            "Donor table; run nightly to correct drift")
+
+    def handle(self, *args, **options):
+        cells = rebuild_supply()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} blood-supply cells."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from roktodanbdweb.models import Donor, DonorSearchIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized donor search index from the Donor table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Donors upserted per statement (default: 1000)")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        update_fields = [
+            field.name for field in DonorSearchIndex._meta.concrete_fields if not field.primary_key
+        ]
+
+        total = 0
+        with transaction.atomic():
+            batch = []
+            donors = Donor.objects.select_related('user').order_by('pk')
+            for donor in donors.iterator(chunk_size=batch_size):
+                batch.append(DonorSearchIndex.from_donor(donor))
+                if len(batch) >= batch_size:
+                    total += self._upsert(batch, update_fields)
+                    batch = []
+            if batch:
+                total += self._upsert(batch, update_fields)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} donors."))
+
+    @staticmethod
+    def _upsert(batch, update_fields):
+        DonorSearchIndex.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['donor'],
+            update_fields=update_fields,
+        )
+        return len(batch)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from roktodanbdweb.models import Donor, Recipient
+from roktodanbdweb.people_search import install_search_indexes, remove_search_indexes
+
+
+class Command(BaseCommand):
+    help = "Recompute donor and recipient search documents and rebuild their search indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Rows updated per statement (default: 1000)")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        models = [Donor, Recipient]
+
+        with transaction.atomic():
+            for model in models:
+                total = 0
+                batch = []
+                rows = model.objects.select_related('user').order_by('pk')
+                for person in rows.iterator(chunk_size=batch_size):
+                    person.search_document = person.build_search_document()
+                    batch.append(person)
+                    if len(batch) >= batch_size:
+                        total += model.objects.bulk_update(batch, ['search_document'])
+                        batch = []
+                if batch:
+                    total += model.objects.bulk_update(batch, ['search_document'])
+                self.stdout.write(f"{model._meta.verbose_name_plural}: {total} search documents.")
+
+            remove_search_indexes(connection, models)
+            install_search_indexes(connection, models)
+
+        self.stdout.write(self.style.SUCCESS("Rebuilt the people search indexes."))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Max, Q
+
+from roktodanbdweb.models import Donor, LIVES_PER_DONATION
+
+
+class Command(BaseCommand):
+    help = ("Recompute every donor's completed donation count, last donation date and "
+            "lives saved from the donation history")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Donors updated per UPDATE statement (default: 5000)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many donors have drifted")
+
+    def handle(self, *args, **options):
+        completed = Q(donations__status='completed')
+        drifted = Donor.objects.annotate(
+            actual_count=Count('donations', filter=completed),
+            actual_last=Max('donations__donation_date', filter=completed),
+        ).exclude(
+            completed_donation_count=F('actual_count'),
+            lives_saved=F('actual_count') * LIVES_PER_DONATION,
+            last_donation_date=F('actual_last'),
+        ).exclude(
+            # NULL never equals NULL in SQL, so donors without donations need their own check
+            completed_donation_count=0, lives_saved=0, last_donation_date__isnull=True,
+            actual_count=0,
+        )
+        drift = drifted.count()
+        if options['dry_run']:
+            self.stdout.write(f"{drift} donor(s) with counters out of step")
+            return
+
+        updated = 0
+        start = 0
+        batch_size = options['batch_size']
+        last_pk = Donor.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        while start < last_pk:
+            ids = Donor.objects.filter(pk__gt=start, pk__lte=start + batch_size).values('pk')
+            updated += Donor.refresh_donation_counters(ids)
+            start += batch_size
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed counters for {updated} donor(s), {drift} of which had drifted"
+        ))
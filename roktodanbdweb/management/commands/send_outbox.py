@@ -0,0 +1,60 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from roktodanbdweb.models import OutboxMessage
+from roktodanbdweb.utils import donation_reminder_email
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BUILDERS = {
+    'donation_reminder': donation_reminder_email,
+}
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches over one mail connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help="Messages loaded and marked per query (default: OUTBOX_BATCH_SIZE)")
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help="Give up on a message after this many failed sends (default: 5)")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queue = (
+            OutboxMessage.objects
+            .filter(sent_at__isnull=True, attempts__lt=options['max_attempts'])
+            .select_related('donor__user', 'donor__thana')
+            .order_by('pk')
+        )
+
+        sent = failed = 0
+        last_pk = 0
+        with get_connection() as connection:
+            while True:
+                batch = list(queue.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                delivered, undelivered = [], []
+                for message in batch:
+                    try:
+                        EMAIL_BUILDERS[message.kind](message.donor, connection).send()
+                        delivered.append(message.pk)
+                    except Exception:
+                        logger.exception("Failed to send outbox message %s", message.pk)
+                        undelivered.append(message.pk)
+                OutboxMessage.objects.filter(pk__in=delivered).update(
+                    sent_at=timezone.now(), attempts=F('attempts') + 1
+                )
+                OutboxMessage.objects.filter(pk__in=undelivered).update(attempts=F('attempts') + 1)
+                sent += len(delivered)
+                failed += len(undelivered)
+
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} messages, {failed} failed."))
@@ -0,0 +1,115 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+DISTRICTS_BY_DIVISION = {
+    'Barishal': ['Barguna', 'Barishal', 'Bhola', 'Jhalokati', 'Patuakhali', 'Pirojpur'],
+    'Chattogram': [
+        'Bandarban', 'Brahmanbaria', 'Chandpur', 'Chattogram', "Cox's Bazar", 'Cumilla',
+        'Feni', 'Khagrachhari', 'Lakshmipur', 'Noakhali', 'Rangamati',
+    ],
+    'Dhaka': [
+        'Dhaka', 'Faridpur', 'Gazipur', 'Gopalganj', 'Kishoreganj', 'Madaripur', 'Manikganj',
+        'Munshiganj', 'Narayanganj', 'Narsingdi', 'Rajbari', 'Shariatpur', 'Tangail',
+    ],
+    'Khulna': [
+        'Bagerhat', 'Chuadanga', 'Jashore', 'Jhenaidah', 'Khulna', 'Kushtia', 'Magura',
+        'Meherpur', 'Narail', 'Satkhira',
+    ],
+    'Mymensingh': ['Jamalpur', 'Mymensingh', 'Netrokona', 'Sherpur'],
+    'Rajshahi': [
+        'Bogura', 'Chapai Nawabganj', 'Joypurhat', 'Naogaon', 'Natore', 'Pabna', 'Rajshahi',
+        'Sirajganj',
+    ],
+    'Rangpur': [
+        'Dinajpur', 'Gaibandha', 'Kurigram', 'Lalmonirhat', 'Nilphamari', 'Panchagarh',
+        'Rangpur', 'Thakurgaon',
+    ],
+    'Sylhet': ['Habiganj', 'Moulvibazar', 'Sunamganj', 'Sylhet'],
+}
+
+# The thanas and post offices previously hard-coded as choice lists
+DHAKA_THANAS = [
+    'Adabar', 'Badda', 'Banani', 'Baridhara', 'Dhanmondi', 'Gulshan', 'Hatirjheel', 'Kafrul',
+    'Kalabagan', 'Khilgaon', 'Khilkhet', 'Mirpur', 'Mohammadpur', 'Motijheel', 'New Market',
+    'Old Dhaka', 'Pallabi', 'Ramna', 'Rampura', 'Sabujbagh', 'Shah Ali', 'Sher-e-Bangla Nagar',
+    'Tejgaon', 'Uttara', 'Wari',
+]
+
+DHAKA_POST_OFFICES = [
+    'Dhaka GPO', 'Banani', 'Dhanmondi', 'Gulshan', 'Mirpur', 'Mohammadpur', 'Motijheel',
+    'New Market', 'Old Dhaka', 'Ramna', 'Tejgaon', 'Uttara', 'Wari',
+]
+
+
+def seed_locations(apps, schema_editor):
+    District = apps.get_model('roktodanbdweb', 'District')
+    Thana = apps.get_model('roktodanbdweb', 'Thana')
+    PostOffice = apps.get_model('roktodanbdweb', 'PostOffice')
+
+    District.objects.bulk_create([
+        District(name=name, division=division)
+        for division, names in DISTRICTS_BY_DIVISION.items()
+        for name in names
+    ])
+    dhaka = District.objects.get(name='Dhaka')
+    Thana.objects.bulk_create([Thana(district=dhaka, name=name) for name in DHAKA_THANAS])
+    PostOffice.objects.bulk_create([PostOffice(district=dhaka, name=name) for name in DHAKA_POST_OFFICES])
+
+
+def unseed_locations(apps, schema_editor):
+    for model_name in ('PostOffice', 'Thana', 'District'):
+        apps.get_model('roktodanbdweb', model_name).objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0008_donorpoints_pointtransaction_withdrawalrequest_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='District',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('division', models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                'verbose_name': 'District',
+                'verbose_name_plural': 'Districts',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Thana',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50)),
+                ('district', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='thanas', to='roktodanbdweb.district')),
+            ],
+            options={
+                'verbose_name': 'Thana',
+                'verbose_name_plural': 'Thanas',
+                'ordering': ['name'],
+                'unique_together': {('district', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PostOffice',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50)),
+                ('district', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='post_offices', to='roktodanbdweb.district')),
+                ('thana', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='post_offices', to='roktodanbdweb.thana')),
+            ],
+            options={
+                'verbose_name': 'Post Office',
+                'verbose_name_plural': 'Post Offices',
+                'ordering': ['name'],
+                'unique_together': {('district', 'name')},
+            },
+        ),
+        migrations.RunPython(seed_locations, unseed_locations),
+    ]
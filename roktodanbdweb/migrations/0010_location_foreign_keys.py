@@ -0,0 +1,150 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Placeholder defaults of the old string columns that do not name a real place
+LEGACY_PLACEHOLDERS = {'thana': {'Dhaka'}}
+
+
+def _location_fk(model, related_name):
+    return models.ForeignKey(
+        blank=True,
+        null=True,
+        on_delete=django.db.models.deletion.PROTECT,
+        related_name=related_name,
+        to=f'roktodanbdweb.{model}',
+    )
+
+
+def strings_to_keys(apps, schema_editor):
+    """
+    Copy the old VARCHAR location columns into the new integer keys, one
+    UPDATE per distinct location combination. Names that are not part of
+    the seeded hierarchy are added to it rather than dropped.
+    """
+    District = apps.get_model('roktodanbdweb', 'District')
+    Thana = apps.get_model('roktodanbdweb', 'Thana')
+    PostOffice = apps.get_model('roktodanbdweb', 'PostOffice')
+
+    def district_for(name):
+        if not name:
+            return None
+        return District.objects.get_or_create(name=name.strip())[0]
+
+    def child_for(model, field, district, name):
+        if not name or district is None or name in LEGACY_PLACEHOLDERS.get(field, ()):
+            return None
+        return model.objects.get_or_create(district=district, name=name.strip())[0]
+
+    for model_name, has_post_office in (('Donor', True), ('Recipient', True), ('BloodRequest', False)):
+        model = apps.get_model('roktodanbdweb', model_name)
+        columns = ['district', 'thana'] + (['post_office'] if has_post_office else [])
+        for values in model.objects.values_list(*columns).distinct():
+            location = dict(zip(columns, values))
+            district = district_for(location['district'])
+            update = {
+                'district_ref': district,
+                'thana_ref': child_for(Thana, 'thana', district, location['thana']),
+            }
+            if has_post_office:
+                update['post_office_ref'] = child_for(PostOffice, 'post_office', district,
+                                                      location['post_office'])
+            model.objects.filter(**location).update(**update)
+
+
+def keys_to_strings(apps, schema_editor):
+    for model_name, has_post_office in (('Donor', True), ('Recipient', True), ('BloodRequest', False)):
+        model = apps.get_model('roktodanbdweb', model_name)
+        refs = ['district_ref', 'thana_ref'] + (['post_office_ref'] if has_post_office else [])
+        for obj in model.objects.select_related(*refs):
+            for ref in refs:
+                related = getattr(obj, ref)
+                setattr(obj, ref[:-len('_ref')], related.name if related else '')
+            obj.save(update_fields=[ref[:-len('_ref')] for ref in refs])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0009_district_thana_postoffice'),
+    ]
+
+    operations = [
+        migrations.AddField(model_name='donor', name='district_ref', field=_location_fk('district', '+')),
+        migrations.AddField(model_name='donor', name='thana_ref', field=_location_fk('thana', '+')),
+        migrations.AddField(model_name='donor', name='post_office_ref', field=_location_fk('postoffice', '+')),
+        migrations.AddField(model_name='recipient', name='district_ref', field=_location_fk('district', '+')),
+        migrations.AddField(model_name='recipient', name='thana_ref', field=_location_fk('thana', '+')),
+        migrations.AddField(model_name='recipient', name='post_office_ref', field=_location_fk('postoffice', '+')),
+        migrations.AddField(model_name='bloodrequest', name='district_ref', field=_location_fk('district', '+')),
+        migrations.AddField(model_name='bloodrequest', name='thana_ref', field=_location_fk('thana', '+')),
+
+        migrations.RunPython(strings_to_keys, keys_to_strings),
+
+        migrations.RemoveIndex(model_name='donor', name='roktodanbdw_thana_9ba631_idx'),
+        migrations.RemoveIndex(model_name='donor', name='roktodanbdw_distric_788d64_idx'),
+        migrations.RemoveIndex(model_name='bloodrequest', name='roktodanbdw_thana_1668b5_idx'),
+
+        migrations.RemoveField(model_name='donor', name='district'),
+        migrations.RemoveField(model_name='donor', name='thana'),
+        migrations.RemoveField(model_name='donor', name='post_office'),
+        migrations.RemoveField(model_name='recipient', name='district'),
+        migrations.RemoveField(model_name='recipient', name='thana'),
+        migrations.RemoveField(model_name='recipient', name='post_office'),
+        migrations.RemoveField(model_name='bloodrequest', name='district'),
+        migrations.RemoveField(model_name='bloodrequest', name='thana'),
+
+        migrations.RenameField(model_name='donor', old_name='district_ref', new_name='district'),
+        migrations.RenameField(model_name='donor', old_name='thana_ref', new_name='thana'),
+        migrations.RenameField(model_name='donor', old_name='post_office_ref', new_name='post_office'),
+        migrations.RenameField(model_name='recipient', old_name='district_ref', new_name='district'),
+        migrations.RenameField(model_name='recipient', old_name='thana_ref', new_name='thana'),
+        migrations.RenameField(model_name='recipient', old_name='post_office_ref', new_name='post_office'),
+        migrations.RenameField(model_name='bloodrequest', old_name='district_ref', new_name='district'),
+        migrations.RenameField(model_name='bloodrequest', old_name='thana_ref', new_name='thana'),
+
+        migrations.AlterField(
+            model_name='bloodrequest',
+            name='district',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='blood_requests', to='roktodanbdweb.district'),
+        ),
+        migrations.AlterField(
+            model_name='bloodrequest',
+            name='thana',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='blood_requests', to='roktodanbdweb.thana'),
+        ),
+        migrations.AlterField(
+            model_name='donor',
+            name='district',
+            field=models.ForeignKey(blank=True, help_text='District', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='donors', to='roktodanbdweb.district'),
+        ),
+        migrations.AlterField(
+            model_name='donor',
+            name='post_office',
+            field=models.ForeignKey(blank=True, help_text='Nearest post office', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='donors', to='roktodanbdweb.postoffice'),
+        ),
+        migrations.AlterField(
+            model_name='donor',
+            name='thana',
+            field=models.ForeignKey(blank=True, help_text='Thana/Police station', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='donors', to='roktodanbdweb.thana'),
+        ),
+        migrations.AlterField(
+            model_name='recipient',
+            name='district',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='recipients', to='roktodanbdweb.district'),
+        ),
+        migrations.AlterField(
+            model_name='recipient',
+            name='post_office',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='recipients', to='roktodanbdweb.postoffice'),
+        ),
+        migrations.AlterField(
+            model_name='recipient',
+            name='thana',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='recipients', to='roktodanbdweb.thana'),
+        ),
+        migrations.AddIndex(
+            model_name='donor',
+            index=models.Index(fields=['thana', 'blood_group'], name='roktodanbdw_thana_i_5edce8_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0010_location_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorSearchIndex',
+            fields=[
+                ('donor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='roktodanbdweb.donor')),
+                ('blood_group_code', models.PositiveSmallIntegerField(choices=[(1, 'A+'), (2, 'A-'), (3, 'B+'), (4, 'B-'), (5, 'AB+'), (6, 'AB-'), (7, 'O+'), (8, 'O-')])),
+                ('district_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('thana_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('post_office_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('eligible_from', models.DateField(blank=True, help_text='Empty if never donated', null=True)),
+                ('first_name', models.CharField(blank=True, max_length=150)),
+                ('last_name', models.CharField(blank=True, max_length=150)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('thumbnail', models.CharField(blank=True, help_text='Profile image storage path', max_length=100)),
+                ('is_searchable', models.BooleanField(default=True, help_text='Donor is active and available')),
+                ('registered_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Donor Search Entry',
+                'verbose_name_plural': 'Donor Search Index',
+                'indexes': [models.Index(condition=models.Q(('is_searchable', True)), fields=['thana_code', 'blood_group_code', 'post_office_code', 'district_code', '-registered_at', 'eligible_from', 'first_name', 'last_name', 'phone_number', 'thumbnail'], name='donor_search_covering_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0011_donorsearchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloodrequest',
+            name='approximate_location',
+            field=models.BooleanField(default=False, editable=False, help_text='Coordinates are the thana centroid'),
+        ),
+        migrations.AddField(
+            model_name='bloodrequest',
+            name='geo_cell',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='bloodrequest',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bloodrequest',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='donor',
+            name='approximate_location',
+            field=models.BooleanField(default=False, editable=False, help_text='Coordinates are the thana centroid'),
+        ),
+        migrations.AddField(
+            model_name='donor',
+            name='geo_cell',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='donor',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='donor',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='thana',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Centroid latitude', null=True),
+        ),
+        migrations.AddField(
+            model_name='thana',
+            name='longitude',
+            field=models.FloatField(blank=True, help_text='Centroid longitude', null=True),
+        ),
+        migrations.CreateModel(
+            name='Hospital',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('geo_cell', models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True)),
+                ('approximate_location', models.BooleanField(default=False, editable=False, help_text='Coordinates are the thana centroid')),
+                ('name', models.CharField(max_length=200)),
+                ('address', models.TextField(blank=True)),
+                ('phone_number', models.CharField(blank=True, max_length=15)),
+                ('is_active', models.BooleanField(default=True)),
+                ('district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='hospitals', to='roktodanbdweb.district')),
+                ('thana', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='hospitals', to='roktodanbdweb.thana')),
+            ],
+            options={
+                'verbose_name': 'Hospital',
+                'verbose_name_plural': 'Hospitals',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0012_geo_points_hospital'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloodrequest',
+            name='hospital',
+            field=models.ForeignKey(blank=True, help_text='Registry entry for hospital_name', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='blood_requests', to='roktodanbdweb.hospital'),
+        ),
+        migrations.AddField(
+            model_name='donationhistory',
+            name='hospital',
+            field=models.ForeignKey(blank=True, help_text='Registry entry for hospital_name', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donations', to='roktodanbdweb.hospital'),
+        ),
+        migrations.AddField(
+            model_name='hospital',
+            name='aliases',
+            field=models.TextField(blank=True, help_text='Other spellings and abbreviations, one per line (e.g. DMCH)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0013_hospital_aliases_links'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donor',
+            name='critical_requests_only',
+            field=models.BooleanField(default=True, help_text="Universal donors: only show other groups' requests when they are critical"),
+        ),
+    ]
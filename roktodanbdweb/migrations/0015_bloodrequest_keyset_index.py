@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0014_donor_critical_requests_only'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bloodrequest',
+            index=models.Index(fields=['status', 'urgency_level', 'needed_by_date', 'id'], name='roktodanbdw_status_67a78e_idx'),
+        ),
+    ]
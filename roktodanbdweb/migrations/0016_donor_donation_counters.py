@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+LIVES_PER_DONATION = 3
+
+
+def fill_counters(apps, schema_editor):
+    """Count each donor's completed donations in one set-wise UPDATE"""
+    Donor = apps.get_model('roktodanbdweb', 'Donor')
+    DonationHistory = apps.get_model('roktodanbdweb', 'DonationHistory')
+    completed = DonationHistory.objects.filter(donor=OuterRef('pk'), status='completed')
+    count = Coalesce(
+        Subquery(completed.order_by().values('donor').annotate(n=Count('pk')).values('n')), 0
+    )
+    Donor.objects.update(
+        completed_donation_count=count,
+        last_donation_date=Subquery(completed.order_by('-donation_date').values('donation_date')[:1]),
+        lives_saved=count * LIVES_PER_DONATION,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0015_bloodrequest_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donor',
+            name='completed_donation_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Completed donations in the donation history'),
+        ),
+        migrations.AddField(
+            model_name='donor',
+            name='last_donation_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date of the latest completed donation', null=True),
+        ),
+        migrations.AddField(
+            model_name='donor',
+            name='lives_saved',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Completed donations x 3'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
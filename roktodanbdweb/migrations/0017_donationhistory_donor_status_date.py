@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0016_donor_donation_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationhistory',
+            index=models.Index(fields=['donor', 'status', 'donation_date'], name='roktodanbdw_donor_i_4a28ff_idx'),
+        ),
+    ]
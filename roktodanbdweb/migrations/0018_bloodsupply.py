@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0017_donationhistory_donor_status_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BloodSupply',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blood_group', models.CharField(choices=[('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'), ('AB+', 'AB+'), ('AB-', 'AB-'), ('O+', 'O+'), ('O-', 'O-')], max_length=5)),
+                ('total_donors', models.IntegerField(default=0)),
+                ('eligible_donors', models.IntegerField(default=0, help_text='Active, available and past the 90-day gap')),
+                ('as_of', models.DateField(help_text='Day the eligible count was last brought up to date')),
+                ('thana', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blood_supply', to='roktodanbdweb.thana')),
+            ],
+            options={
+                'verbose_name': 'Blood Supply',
+                'verbose_name_plural': 'Blood Supply',
+                'unique_together': {('thana', 'blood_group')},
+            },
+        ),
+    ]
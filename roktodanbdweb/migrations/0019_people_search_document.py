@@ -0,0 +1,190 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:55
+
+import re
+import unicodedata
+import warnings
+
+from django.db import DatabaseError, migrations, models, transaction
+
+# Frozen copy of the roktodanbdweb.people_search document builder and index SQL
+
+BENGALI = {
+    # Independent vowels
+    'অ': 'a', 'আ': 'a', 'ই': 'i', 'ঈ': 'i', 'উ': 'u', 'ঊ': 'u', 'ঋ': 'ri',
+    'এ': 'e', 'ঐ': 'oi', 'ও': 'o', 'ঔ': 'ou',
+    # Consonants, without the inherent vowel
+    'ক': 'k', 'খ': 'kh', 'গ': 'g', 'ঘ': 'gh', 'ঙ': 'ng',
+    'চ': 'ch', 'ছ': 'chh', 'জ': 'j', 'ঝ': 'jh', 'ঞ': 'n',
+    'ট': 't', 'ঠ': 'th', 'ড': 'd', 'ঢ': 'dh', 'ণ': 'n',
+    'ত': 't', 'থ': 'th', 'দ': 'd', 'ধ': 'dh', 'ন': 'n',
+    'প': 'p', 'ফ': 'ph', 'ব': 'b', 'ভ': 'bh', 'ম': 'm',
+    'য': 'j', 'র': 'r', 'ল': 'l', 'শ': 'sh', 'ষ': 'sh', 'স': 's', 'হ': 'h',
+    'ৎ': 't', 'ং': 'ng', 'ঃ': 'h', 'ঁ': '',
+    # Vowel signs, virama and nukta
+    'া': 'a', 'ি': 'i', 'ী': 'i', 'ু': 'u', 'ূ': 'u', 'ৃ': 'ri',
+    'ে': 'e', 'ৈ': 'oi', 'ো': 'o', 'ৌ': 'ou', '্': '', '়': '',
+    # Digits
+    '০': '0', '১': '1', '২': '2', '৩': '3', '৪': '4',
+    '৫': '5', '৬': '6', '৭': '7', '৮': '8', '৯': '9',
+}
+TRANSLITERATION = str.maketrans(BENGALI)
+NUKTA_LETTERS = (('ড়', 'r'), ('ঢ়', 'rh'), ('য়', 'y'))
+WORD = re.compile(r'[\wঀ-৿]+')
+BENGALI_LETTER = re.compile(r'[ঀ-৿]')
+KEY_SPELLINGS = (('ph', 'f'), ('z', 'j'), ('q', 'k'), ('v', 'b'), ('x', 'ks'))
+KEY_DROPPED = re.compile(r'[aeiouyhw]')
+REPEATS = re.compile(r'(.)\1+')
+
+
+def latin(word):
+    word = unicodedata.normalize('NFC', word)
+    for letter, sound in NUKTA_LETTERS:
+        word = word.replace(letter, sound)
+    word = unicodedata.normalize('NFKD', word.translate(TRANSLITERATION))
+    return ''.join(char for char in word if char.isascii() and char.isalnum())
+
+
+def key(word):
+    for spelling, sound in KEY_SPELLINGS:
+        word = word.replace(spelling, sound)
+    return '#%s#' % REPEATS.sub(r'\1', word[:1] + KEY_DROPPED.sub('', word[1:]))
+
+
+def name_forms(word):
+    forms = [word] if BENGALI_LETTER.search(word) else []
+    word = latin(word)
+    if word:
+        forms.append(word)
+        if not word.isdigit():
+            forms.append(key(word))
+    return forms
+
+
+def phone_digits(phone):
+    digits = ''.join(char for char in latin(phone) if char.isdigit())
+    return digits[2:] if digits.startswith('880') else digits
+
+
+def search_document(names, phones=(), emails=()):
+    tokens = []
+    for name in names:
+        for word in WORD.findall(unicodedata.normalize('NFKC', name or '').casefold()):
+            tokens.extend(name_forms(word))
+    tokens.extend(phone_digits(phone) for phone in phones if phone)
+    tokens.extend(email.strip().casefold() for email in emails if email)
+    return ' '.join(dict.fromkeys(token for token in tokens if token))
+
+
+def fill_search_documents(apps, schema_editor):
+    Donor = apps.get_model('roktodanbdweb', 'Donor')
+    Recipient = apps.get_model('roktodanbdweb', 'Recipient')
+
+    donors = list(Donor.objects.select_related('user').only(
+        'phone_number', 'user__first_name', 'user__last_name', 'user__email'))
+    for donor in donors:
+        donor.search_document = search_document(
+            [donor.user.first_name, donor.user.last_name],
+            phones=[donor.phone_number], emails=[donor.user.email],
+        )
+    Donor.objects.bulk_update(donors, ['search_document'], batch_size=500)
+
+    recipients = list(Recipient.objects.select_related('user'))
+    for recipient in recipients:
+        names = [recipient.first_name, recipient.last_name]
+        emails = [recipient.email]
+        if recipient.user:
+            names += [recipient.user.first_name, recipient.user.last_name]
+            emails.append(recipient.user.email)
+        recipient.search_document = search_document(names, phones=[recipient.phone_number], emails=emails)
+    Recipient.objects.bulk_update(recipients, ['search_document'], batch_size=500)
+
+
+TABLES = ('roktodanbdweb_donor', 'roktodanbdweb_recipient')
+
+
+def install_trigram(connection):
+    """pg_trgm needs a superuser (or CREATE on the database on PostgreSQL 13+)"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone():
+            return True
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError as error:
+        warnings.warn(
+            f'Could not create the pg_trgm extension ({error}); people search runs without its '
+            f'index until a superuser runs CREATE EXTENSION pg_trgm and migrate is re-run.'
+        )
+        return False
+    return True
+
+
+def install_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql' and not install_trigram(connection):
+        return
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}_search_trgm" '
+                    f'ON "{table}" USING gin (search_document gin_trgm_ops)'
+                )
+            elif connection.vendor == 'sqlite':
+                fts = f'{table}_fts'
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS \"{fts}\" USING fts5("
+                    f"search_document, content='{table}', content_rowid='id', tokenize='trigram')"
+                )
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "{fts}_insert" AFTER INSERT ON "{table}" BEGIN '
+                    f'INSERT INTO "{fts}" (rowid, search_document) VALUES (new.id, new.search_document); END'
+                )
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "{fts}_delete" AFTER DELETE ON "{table}" BEGIN '
+                    f'INSERT INTO "{fts}" ("{fts}", rowid, search_document) '
+                    f"VALUES ('delete', old.id, old.search_document); END"
+                )
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "{fts}_update" AFTER UPDATE OF search_document ON "{table}" '
+                    f'BEGIN INSERT INTO "{fts}" ("{fts}", rowid, search_document) '
+                    f"VALUES ('delete', old.id, old.search_document); "
+                    f'INSERT INTO "{fts}" (rowid, search_document) VALUES (new.id, new.search_document); END'
+                )
+                cursor.execute(f"INSERT INTO \"{fts}\" (\"{fts}\") VALUES ('rebuild')")
+
+
+def remove_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS "{table}_search_trgm"')
+            elif connection.vendor == 'sqlite':
+                fts = f'{table}_fts'
+                for suffix in ('insert', 'delete', 'update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"')
+                cursor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0018_bloodsupply'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donor',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipient',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(install_indexes, remove_indexes),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0020_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchLock',
+            fields=[
+                ('key', models.CharField(max_length=250, primary_key=True, serialize=False)),
+                ('owner', models.CharField(max_length=64)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Search Lock',
+                'verbose_name_plural': 'Search Locks',
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:10
+
+from datetime import date, timedelta
+
+from django.db import migrations
+
+# Frozen copies of BLOOD_GROUP_CODES, Donor.MONTH_CHOICES and Donor.eligible_from
+BLOOD_GROUP_CODES = {'A+': 1, 'A-': 2, 'B+': 3, 'B-': 4, 'AB+': 5, 'AB-': 6, 'O+': 7, 'O-': 8}
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+          'October', 'November', 'December']
+
+
+def eligible_from(donor):
+    try:
+        month_number = MONTHS.index(donor.last_donation_month) + 1
+        return date(int(donor.last_donation_year), month_number, 1) + timedelta(days=90)
+    except (TypeError, ValueError):
+        return None
+
+
+def fill_search_index(apps, schema_editor):
+    """Index the donors that have no entry, so search works without a manual rebuild"""
+    Donor = apps.get_model('roktodanbdweb', 'Donor')
+    DonorSearchIndex = apps.get_model('roktodanbdweb', 'DonorSearchIndex')
+
+    donors = Donor.objects.filter(search_entry__isnull=True).select_related('user').order_by('pk')
+    batch = []
+    for donor in donors.iterator(chunk_size=1000):
+        batch.append(DonorSearchIndex(
+            donor_id=donor.pk,
+            blood_group_code=BLOOD_GROUP_CODES.get(donor.blood_group, 0),
+            district_code=donor.district_id,
+            thana_code=donor.thana_id,
+            post_office_code=donor.post_office_id,
+            eligible_from=eligible_from(donor),
+            first_name=donor.user.first_name,
+            last_name=donor.user.last_name,
+            phone_number=donor.phone_number,
+            thumbnail=donor.profile_image.name or '',
+            is_searchable=donor.is_active and donor.is_available,
+            registered_at=donor.registration_date,
+        ))
+        if len(batch) >= 1000:
+            DonorSearchIndex.objects.bulk_create(batch)
+            batch = []
+    DonorSearchIndex.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roktodanbdweb', '0021_searchlock'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,157 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator, MinLengthValidator
 from django.utils import timezone
 
+from .geo import geo_cell
+from .people_search import search_document
 
-class Donor(models.Model):
+# Each whole-blood donation is separated into components for up to three patients
+LIVES_PER_DONATION = 3
+
+
+class District(models.Model):
+    """
+    Administrative district (zila). Small integer keys keep location
+    columns on donor/recipient/request rows compact and cheap to index.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=50, unique=True)
+    division = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "District"
+        verbose_name_plural = "Districts"
+
+    def __str__(self):
+        return self.name
+
+
+class Thana(models.Model):
+    """
+    Thana / upazila within a district
+    """
+    id = models.SmallAutoField(primary_key=True)
+    district = models.ForeignKey(District, on_delete=models.PROTECT, related_name='thanas')
+    name = models.CharField(max_length=50)
+    latitude = models.FloatField(null=True, blank=True, help_text="Centroid latitude")
+    longitude = models.FloatField(null=True, blank=True, help_text="Centroid longitude")
+
+    class Meta:
+        ordering = ['name']
+        unique_together = ['district', 'name']
+        verbose_name = "Thana"
+        verbose_name_plural = "Thanas"
+
+    def __str__(self):
+        return self.name
+
+
+class PostOffice(models.Model):
+    """
+    Post office within a district. ``thana`` is optional because several
+    post offices (e.g. Dhaka GPO) serve more than one thana.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    district = models.ForeignKey(District, on_delete=models.PROTECT, related_name='post_offices')
+    thana = models.ForeignKey(
+        Thana,
+        on_delete=models.SET_NULL,
+        related_name='post_offices',
+        null=True,
+        blank=True
+    )
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ['name']
+        unique_together = ['district', 'name']
+        verbose_name = "Post Office"
+        verbose_name_plural = "Post Offices"
+
+    def __str__(self):
+        return self.name
+
+
+class GeoPoint(models.Model):
+    """
+    Optional coordinates plus the indexed grid cell used by nearest searches
+    (see geo.py). Rows without coordinates of their own take the centroid of
+    their thana and are flagged as approximate.
+    """
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.PositiveIntegerField(null=True, blank=True, db_index=True, editable=False)
+    approximate_location = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Coordinates are the thana centroid"
+    )
+
+    class Meta:
+        abstract = True
+
+    def apply_thana_centroid(self):
+        """Use the thana centroid when there are no exact coordinates; True if anything changed"""
+        if not (self.latitude is None or self.longitude is None or self.approximate_location):
+            return False
+        from .locations import get_hierarchy
+        thana = get_hierarchy().thanas.get(getattr(self, 'thana_id', None))
+        if thana is None or thana.latitude is None:
+            point, approximate = (None, None), False
+        else:
+            point, approximate = (thana.latitude, thana.longitude), True
+        if (self.latitude, self.longitude) == point and self.approximate_location == approximate:
+            return False
+        self.latitude, self.longitude = point
+        self.approximate_location = approximate
+        return True
+
+    def save(self, *args, **kwargs):
+        self.apply_thana_centroid()
+        self.geo_cell = geo_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude', 'thana'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {
+                'latitude', 'longitude', 'geo_cell', 'approximate_location'}
+        super().save(*args, **kwargs)
+
+
+class Hospital(GeoPoint):
+    """
+    Registry of hospitals and blood banks that requests are made from
+    """
+    name = models.CharField(max_length=200)
+    aliases = models.TextField(
+        blank=True,
+        help_text="Other spellings and abbreviations, one per line (e.g. DMCH)"
+    )
+    address = models.TextField(blank=True)
+    thana = models.ForeignKey(Thana, on_delete=models.PROTECT, related_name='hospitals',
+                              null=True, blank=True)
+    district = models.ForeignKey(District, on_delete=models.PROTECT, related_name='hospitals',
+                                 null=True, blank=True)
+    phone_number = models.CharField(max_length=15, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Hospital"
+        verbose_name_plural = "Hospitals"
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def alias_list(self):
+        return [alias.strip() for alias in self.aliases.splitlines() if alias.strip()]
+
+
+class Donor(GeoPoint):
     BLOOD_GROUP_CHOICES = [
         ('A+', 'A+'),
         ('A-', 'A-'),
@@ -32,50 +178,6 @@ class Donor(models.Model):
         ('December', 'December'),
     ]
 
-    THANA_CHOICES = [
-        ('Adabar', 'Adabar'),
-        ('Badda', 'Badda'),
-        ('Banani', 'Banani'),
-        ('Baridhara', 'Baridhara'),
-        ('Dhanmondi', 'Dhanmondi'),
-        ('Gulshan', 'Gulshan'),
-        ('Hatirjheel', 'Hatirjheel'),
-        ('Kafrul', 'Kafrul'),
-        ('Kalabagan', 'Kalabagan'),
-        ('Khilgaon', 'Khilgaon'),
-        ('Khilkhet', 'Khilkhet'),
-        ('Mirpur', 'Mirpur'),
-        ('Mohammadpur', 'Mohammadpur'),
-        ('Motijheel', 'Motijheel'),
-        ('New Market', 'New Market'),
-        ('Old Dhaka', 'Old Dhaka'),
-        ('Pallabi', 'Pallabi'),
-        ('Ramna', 'Ramna'),
-        ('Rampura', 'Rampura'),
-        ('Sabujbagh', 'Sabujbagh'),
-        ('Shah Ali', 'Shah Ali'),
-        ('Sher-e-Bangla Nagar', 'Sher-e-Bangla Nagar'),
-        ('Tejgaon', 'Tejgaon'),
-        ('Uttara', 'Uttara'),
-        ('Wari', 'Wari'),
-    ]
-
-    POST_OFFICE_CHOICES = [
-        ('Dhaka GPO', 'Dhaka GPO'),
-        ('Banani', 'Banani'),
-        ('Dhanmondi', 'Dhanmondi'),
-        ('Gulshan', 'Gulshan'),
-        ('Mirpur', 'Mirpur'),
-        ('Mohammadpur', 'Mohammadpur'),
-        ('Motijheel', 'Motijheel'),
-        ('New Market', 'New Market'),
-        ('Old Dhaka', 'Old Dhaka'),
-        ('Ramna', 'Ramna'),
-        ('Tejgaon', 'Tejgaon'),
-        ('Uttara', 'Uttara'),
-        ('Wari', 'Wari'),
-    ]
-
     # Link to Django User model
     user = models.OneToOneField(
         User,
@@ -121,22 +223,29 @@ class Donor(models.Model):
         default='N/A',
         help_text="Road or block name/number"
     )
-    thana = models.CharField(
-        max_length=50,
-        choices=THANA_CHOICES,
-        default='Dhaka',
+    thana = models.ForeignKey(
+        Thana,
+        on_delete=models.PROTECT,
+        related_name='donors',
+        null=True,
+        blank=True,
         help_text="Thana/Police station"
     )
-    post_office = models.CharField(
-        max_length=50,
-        choices=POST_OFFICE_CHOICES,
-        default='Dhaka GPO',
+    post_office = models.ForeignKey(
+        PostOffice,
+        on_delete=models.PROTECT,
+        related_name='donors',
+        null=True,
+        blank=True,
         help_text="Nearest post office"
     )
-    district = models.CharField(
-        max_length=50,
-        default='Dhaka',
-        help_text="District name"
+    district = models.ForeignKey(
+        District,
+        on_delete=models.PROTECT,
+        related_name='donors',
+        null=True,
+        blank=True,
+        help_text="District"
     )
 
     # Donation History
@@ -193,6 +302,32 @@ class Donor(models.Model):
         default=True,
         help_text="Whether the donor is currently available for donation"
     )
+    critical_requests_only = models.BooleanField(
+        default=True,
+        help_text="Universal donors: only show other groups' requests when they are critical"
+    )
+
+    # Donation counters, kept in step with DonationHistory (see
+    # Donor.refresh_donation_counters); rebuild with `reconcile_donation_counters`
+    completed_donation_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Completed donations in the donation history"
+    )
+    last_donation_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Date of the latest completed donation"
+    )
+    lives_saved = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=f"Completed donations x {LIVES_PER_DONATION}"
+    )
+
+    # Normalized names, phone and email for staff search (see people_search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
 
     class Meta:
         verbose_name = "Donor"
@@ -200,8 +335,7 @@ class Donor(models.Model):
         ordering = ['-registration_date']
         indexes = [
             models.Index(fields=['blood_group']),
-            models.Index(fields=['thana']),
-            models.Index(fields=['district']),
+            models.Index(fields=['thana', 'blood_group']),
             models.Index(fields=['is_active', 'is_available']),
         ]
 
@@ -238,7 +372,43 @@ class Donor(models.Model):
             self.post_office,
             self.district
         ]
-        return ", ".join([part for part in address_parts if part])
+        return ", ".join([str(part) for part in address_parts if part])
+
+    @classmethod
+    def refresh_donation_counters(cls, donor_ids=None):
+        """
+        Recompute the donation counters from DonationHistory with a single
+        set-wise UPDATE, for ``donor_ids`` or for every donor
+        """
+        completed = DonationHistory.objects.filter(donor=OuterRef('pk'), status='completed')
+        count = Coalesce(
+            Subquery(completed.order_by().values('donor').annotate(n=models.Count('pk')).values('n')),
+            0,
+        )
+        donors = cls.objects.all() if donor_ids is None else cls.objects.filter(pk__in=donor_ids)
+        return donors.update(
+            completed_donation_count=count,
+            last_donation_date=Subquery(completed.order_by('-donation_date').values('donation_date')[:1]),
+            lives_saved=count * LIVES_PER_DONATION,
+        )
+
+    @property
+    def eligible_from(self):
+        """
+        Date from which the donor may donate again (90 days after the last
+        donation), or None if they have never donated
+        """
+        if not self.last_donation_month or not self.last_donation_year:
+            return None
+
+        try:
+            from datetime import date, timedelta
+
+            month_number = [month for month, _ in self.MONTH_CHOICES].index(self.last_donation_month) + 1
+            return date(int(self.last_donation_year), month_number, 1) + timedelta(days=90)
+
+        except ValueError:
+            return None
 
     @property
     def can_donate(self):
@@ -314,8 +484,23 @@ class Donor(models.Model):
             # You might want to handle this differently based on your business logic
             pass
 
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'user', 'phone_number'} & set(update_fields):
+            self.search_document = self.build_search_document()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'search_document'}
+
         super().save(*args, **kwargs)
 
+    def build_search_document(self, user=None):
+        """search_document for this donor; names and email come from the user"""
+        user = user or self.user
+        return search_document(
+            [user.first_name, user.last_name] if user else [],
+            phones=[self.phone_number],
+            emails=[user.email] if user else [],
+        )
+
     def get_absolute_url(self):
         """Get URL for this donor's profile"""
         from django.urls import reverse
@@ -325,6 +510,180 @@ class Donor(models.Model):
         return f"<Donor: {self.full_name} ({self.blood_group}) - {self.phone_number}>"
 
 
+# Compact codes for blood groups, shared by the search structures
+BLOOD_GROUP_CODES = {group: code for code, (group, _) in enumerate(Donor.BLOOD_GROUP_CHOICES, start=1)}
+BLOOD_GROUPS_BY_CODE = {code: group for group, code in BLOOD_GROUP_CODES.items()}
+
+# Red cell compatibility: recipient blood group -> donor groups it can receive
+COMPATIBLE_DONOR_GROUPS = {
+    'O-': ('O-',),
+    'O+': ('O+', 'O-'),
+    'A-': ('A-', 'O-'),
+    'A+': ('A+', 'A-', 'O+', 'O-'),
+    'B-': ('B-', 'O-'),
+    'B+': ('B+', 'B-', 'O+', 'O-'),
+    'AB-': ('AB-', 'A-', 'B-', 'O-'),
+    'AB+': ('AB+', 'AB-', 'A+', 'A-', 'B+', 'B-', 'O+', 'O-'),
+}
+
+# Donor blood group -> bitmask of the recipient groups it can serve, one bit
+# per blood group code
+SERVABLE_RECIPIENT_MASKS = {
+    donor_group: sum(1 << BLOOD_GROUP_CODES[recipient_group]
+                     for recipient_group, donor_groups in COMPATIBLE_DONOR_GROUPS.items()
+                     if donor_group in donor_groups)
+    for donor_group in BLOOD_GROUP_CODES
+}
+_SERVABLE_RECIPIENT_GROUPS = {
+    donor_group: tuple(group for group, code in BLOOD_GROUP_CODES.items() if mask >> code & 1)
+    for donor_group, mask in SERVABLE_RECIPIENT_MASKS.items()
+}
+# Groups that can give to every recipient and would otherwise see every request
+UNIVERSAL_DONOR_GROUPS = ('O-',)
+
+
+def compatible_for(donor_group):
+    """Recipient blood groups a donor of ``donor_group`` can give red cells to"""
+    return _SERVABLE_RECIPIENT_GROUPS.get(donor_group, ())
+
+
+class DonorSearchIndex(models.Model):
+    """
+    Narrow, denormalized copy of the donor columns that donor search filters
+    on and renders, so searches neither join auth_user nor read full Donor
+    rows. Kept in sync by signals (see signals.py); rebuild with the
+    ``rebuild_donor_search_index`` command.
+    """
+    donor = models.OneToOneField(
+        Donor,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_entry'
+    )
+    blood_group_code = models.PositiveSmallIntegerField(
+        choices=[(code, group) for group, code in BLOOD_GROUP_CODES.items()]
+    )
+    district_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    thana_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    post_office_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    eligible_from = models.DateField(null=True, blank=True, help_text="Empty if never donated")
+    first_name = models.CharField(max_length=150, blank=True)
+    last_name = models.CharField(max_length=150, blank=True)
+    phone_number = models.CharField(max_length=15)
+    thumbnail = models.CharField(max_length=100, blank=True, help_text="Profile image storage path")
+    is_searchable = models.BooleanField(default=True, help_text="Donor is active and available")
+    registered_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Donor Search Entry"
+        verbose_name_plural = "Donor Search Index"
+        indexes = [
+            # Leading columns match the find_blood filter and ordering; the
+            # trailing columns are everything a result card renders, so the
+            # search is answered from the index alone.
+            models.Index(
+                fields=[
+                    'thana_code', 'blood_group_code', 'post_office_code', 'district_code',
+                    '-registered_at', 'eligible_from', 'first_name', 'last_name',
+                    'phone_number', 'thumbnail',
+                ],
+                condition=models.Q(is_searchable=True),
+                name='donor_search_covering_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.full_name} ({self.blood_group})"
+
+    @classmethod
+    def from_donor(cls, donor):
+        user = donor.user
+        return cls(
+            donor_id=donor.pk,
+            blood_group_code=BLOOD_GROUP_CODES.get(donor.blood_group, 0),
+            district_code=donor.district_id,
+            thana_code=donor.thana_id,
+            post_office_code=donor.post_office_id,
+            eligible_from=donor.eligible_from,
+            first_name=user.first_name if user else '',
+            last_name=user.last_name if user else '',
+            phone_number=donor.phone_number,
+            thumbnail=donor.profile_image.name if donor.profile_image else '',
+            is_searchable=donor.is_active and donor.is_available,
+            registered_at=donor.registration_date,
+        )
+
+    @classmethod
+    def refresh(cls, donor):
+        """Insert or replace the entry for one donor. Returns whether it changed."""
+        entry = cls.from_donor(donor)
+        fields = [field.attname for field in cls._meta.concrete_fields]
+        stored = cls.objects.filter(pk=donor.pk).values(*fields).first()
+        if stored == {field: getattr(entry, field) for field in fields}:
+            return False
+        entry.save()
+        return True
+
+    # Set on entries returned by a nearest-donor search
+    distance_km = None
+
+    # Attribute names mirror Donor so result templates work with either
+
+    @property
+    def blood_group(self):
+        return BLOOD_GROUPS_BY_CODE.get(self.blood_group_code, '')
+
+    @property
+    def thana(self):
+        from .locations import get_hierarchy
+        return get_hierarchy().thana_name(self.thana_code)
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    @property
+    def thumbnail_url(self):
+        from django.core.files.storage import default_storage
+        return default_storage.url(self.thumbnail) if self.thumbnail else ''
+
+    @property
+    def can_donate(self):
+        return self.eligible_from is None or timezone.localdate() >= self.eligible_from
+
+    @property
+    def next_donation_date(self):
+        if self.can_donate:
+            return "Available now"
+        return self.eligible_from.strftime("%d %B %Y")
+
+
+class BloodSupply(models.Model):
+    """
+    Donors of one blood group in one thana, and how many of them could
+    donate on ``as_of``. One row per (thana, blood group), maintained
+    incrementally (see blood_supply.py).
+    """
+    thana = models.ForeignKey(Thana, on_delete=models.CASCADE, related_name='blood_supply')
+    blood_group = models.CharField(max_length=5, choices=Donor.BLOOD_GROUP_CHOICES)
+    # Not Positive: an unsignalled bulk change can push a count below zero
+    # until the nightly rebuild
+    total_donors = models.IntegerField(default=0)
+    eligible_donors = models.IntegerField(
+        default=0,
+        help_text="Active, available and past the 90-day gap"
+    )
+    as_of = models.DateField(help_text="Day the eligible count was last brought up to date")
+
+    class Meta:
+        verbose_name = "Blood Supply"
+        verbose_name_plural = "Blood Supply"
+        unique_together = ['thana', 'blood_group']
+
+    def __str__(self):
+        return f"{self.blood_group} in {self.thana}: {self.eligible_donors}/{self.total_donors}"
+
+
 class Recipient(models.Model):
     BLOOD_GROUP_CHOICES = [
         ('A+', 'A+'),
@@ -337,54 +696,6 @@ class Recipient(models.Model):
         ('O-', 'O-'),
     ]
 
-    THANA_CHOICES = [
-        ('Adabar', 'Adabar'),
-        ('Badda', 'Badda'),
-        ('Banani', 'Banani'),
-        ('Baridhara', 'Baridhara'),
-        ('Dhanmondi', 'Dhanmondi'),
-        ('Gulshan', 'Gulshan'),
-        ('Hatirjheel', 'Hatirjheel'),
-        ('Kafrul', 'Kafrul'),
-        ('Kalabagan', 'Kalabagan'),
-        ('Khilgaon', 'Khilgaon'),
-        ('Khilkhet', 'Khilkhet'),
-        ('Mirpur', 'Mirpur'),
-        ('Mohammadpur', 'Mohammadpur'),
-        ('Motijheel', 'Motijheel'),
-        ('New Market', 'New Market'),
-        ('Old Dhaka', 'Old Dhaka'),
-        ('Pallabi', 'Pallabi'),
-        ('Ramna', 'Ramna'),
-        ('Rampura', 'Rampura'),
-        ('Sabujbagh', 'Sabujbagh'),
-        ('Shah Ali', 'Shah Ali'),
-        ('Sher-e-Bangla Nagar', 'Sher-e-Bangla Nagar'),
-        ('Tejgaon', 'Tejgaon'),
-        ('Uttara', 'Uttara'),
-        ('Wari', 'Wari'),
-    ]
-
-    POST_OFFICE_CHOICES = [
-        ('Dhaka GPO', 'Dhaka GPO'),
-        ('Banani', 'Banani'),
-        ('Dhanmondi', 'Dhanmondi'),
-        ('Gulshan', 'Gulshan'),
-        ('Mirpur', 'Mirpur'),
-        ('Mohammadpur', 'Mohammadpur'),
-        ('Motijheel', 'Motijheel'),
-        ('New Market', 'New Market'),
-        ('Old Dhaka', 'Old Dhaka'),
-        ('Ramna', 'Ramna'),
-        ('Tejgaon', 'Tejgaon'),
-        ('Uttara', 'Uttara'),
-        ('Wari', 'Wari'),
-    ]
-
-    DISTRICT_CHOICES = [
-        ('Dhaka', 'Dhaka'),
-    ]
-
     # Phone number validator
     phone_regex = RegexValidator(
         regex=r'^\+?1?\d{9,15}$',
@@ -404,9 +715,12 @@ class Recipient(models.Model):
     blood_group = models.CharField(max_length=3, choices=BLOOD_GROUP_CHOICES)
     house_holding_no = models.CharField(max_length=100)
     road_block = models.CharField(max_length=200)
-    thana = models.CharField(max_length=50, choices=THANA_CHOICES)
-    post_office = models.CharField(max_length=50, choices=POST_OFFICE_CHOICES)
-    district = models.CharField(max_length=50, choices=DISTRICT_CHOICES, default='Dhaka')
+    thana = models.ForeignKey(Thana, on_delete=models.PROTECT, related_name='recipients',
+                              null=True, blank=True)
+    post_office = models.ForeignKey(PostOffice, on_delete=models.PROTECT, related_name='recipients',
+                                    null=True, blank=True)
+    district = models.ForeignKey(District, on_delete=models.PROTECT, related_name='recipients',
+                                 null=True, blank=True)
 
     # Optional fields
     age = models.PositiveIntegerField(null=True, blank=True)
@@ -417,11 +731,32 @@ class Recipient(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    # Normalized names, phone and email for staff search (see people_search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Recipient'
         verbose_name_plural = 'Recipients'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'user', 'first_name', 'last_name', 'email', 'phone_number'} & set(update_fields):
+            self.search_document = self.build_search_document()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'search_document'}
+        super().save(*args, **kwargs)
+
+    def build_search_document(self, user=None):
+        """search_document for this recipient, with the linked user's name and email too"""
+        user = user or self.user
+        names = [self.first_name, self.last_name]
+        emails = [self.email]
+        if user:
+            names += [user.first_name, user.last_name]
+            emails.append(user.email)
+        return search_document(names, phones=[self.phone_number], emails=emails)
+
     def __str__(self):
         if self.user:
             return f"{self.user.first_name} {self.user.last_name} - {self.blood_group}"
@@ -444,7 +779,8 @@ class Recipient(models.Model):
 
     @property
     def full_address(self):
-        return f"{self.house_holding_no}, {self.road_block}, {self.thana}, {self.post_office}, {self.district}"
+        address_parts = [self.house_holding_no, self.road_block, self.thana, self.post_office, self.district]
+        return ", ".join(str(part) for part in address_parts if part)
 
 
 class DonationHistory(models.Model):
@@ -458,6 +794,14 @@ class DonationHistory(models.Model):
     donation_date = models.DateTimeField(default=timezone.now)
     recipient_name = models.CharField(max_length=100, blank=True, null=True)
     hospital_name = models.CharField(max_length=200, blank=True, null=True)
+    hospital = models.ForeignKey(
+        Hospital,
+        on_delete=models.SET_NULL,
+        related_name='donations',
+        null=True,
+        blank=True,
+        help_text="Registry entry for hospital_name"
+    )
     location = models.CharField(max_length=200, default="Dhaka, Bangladesh")
     blood_group = models.CharField(max_length=5)
     amount = models.IntegerField(default=450, help_text="Amount in ml")
@@ -471,12 +815,15 @@ class DonationHistory(models.Model):
         ordering = ['-donation_date']
         verbose_name = 'Donation History'
         verbose_name_plural = 'Donation Histories'
+        indexes = [
+            models.Index(fields=['donor', 'status', 'donation_date']),
+        ]
 
     def __str__(self):
         return f"{self.donor.user.get_full_name()} - {self.donation_date.strftime('%Y-%m-%d')}"
 
 
-class BloodRequest(models.Model):
+class BloodRequest(GeoPoint):
     URGENCY_CHOICES = [
         ('low', 'Low'),
         ('medium', 'Medium'),
@@ -500,8 +847,18 @@ class BloodRequest(models.Model):
     # Location details
     hospital_name = models.CharField(max_length=200)
     hospital_address = models.TextField()
-    thana = models.CharField(max_length=50, choices=Donor.THANA_CHOICES)
-    district = models.CharField(max_length=50, default='Dhaka')
+    hospital = models.ForeignKey(
+        Hospital,
+        on_delete=models.SET_NULL,
+        related_name='blood_requests',
+        null=True,
+        blank=True,
+        help_text="Registry entry for hospital_name"
+    )
+    thana = models.ForeignKey(Thana, on_delete=models.PROTECT, related_name='blood_requests',
+                              null=True, blank=True)
+    district = models.ForeignKey(District, on_delete=models.PROTECT, related_name='blood_requests',
+                                 null=True, blank=True)
 
     # Request details
     patient_name = models.CharField(max_length=100)
@@ -527,9 +884,10 @@ class BloodRequest(models.Model):
         verbose_name_plural = 'Blood Requests'
         indexes = [
             models.Index(fields=['blood_group_needed']),
-            models.Index(fields=['thana']),
             models.Index(fields=['status']),
             models.Index(fields=['urgency_level']),
+            # Keyset pages of the donor request list, one range per urgency level
+            models.Index(fields=['status', 'urgency_level', 'needed_by_date', 'id']),
         ]
 
     def __str__(self):
@@ -765,6 +1123,60 @@ class WithdrawalRequest(models.Model):
         return 1.0
 
 
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be sent. Bulk admin actions enqueue messages here
+    and ``manage.py send_outbox`` delivers them in batches over one SMTP
+    connection.
+    """
+    KIND_CHOICES = [
+        ('donation_reminder', 'Donation Reminder'),
+    ]
+
+    donor = models.ForeignKey(
+        'Donor',
+        on_delete=models.CASCADE,
+        related_name='outbox_messages'
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Outbox Message"
+        verbose_name_plural = "Outbox Messages"
+        indexes = [
+            # The send_outbox queue: unsent messages, oldest first
+            models.Index(fields=['created_at'], condition=models.Q(sent_at__isnull=True), name='outbox_unsent_idx'),
+            # Skipping donors who already have a reminder waiting
+            models.Index(fields=['donor', 'kind'], condition=models.Q(sent_at__isnull=True),
+                         name='outbox_unsent_donor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for donor {self.donor_id}"
+
+
+class SearchLock(models.Model):
+    """
+    A worker's lease on computing one donor search (see donor_search.py).
+    Taking it is an INSERT on the primary key, so it is atomic on every
+    database, whichever cache backend is configured.
+    """
+    key = models.CharField(max_length=250, primary_key=True)
+    owner = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Search Lock"
+        verbose_name_plural = "Search Locks"
+
+    def __str__(self):
+        return f"{self.key} until {self.expires_at}"
+
+
 # Helper function to update donation history and award points/badges
 def process_donation_rewards(donor):
     """
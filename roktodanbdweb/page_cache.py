@@ -0,0 +1,80 @@
+# roktodanbdweb/page_cache.py
+"""
+Full-page cache for the anonymous variant of public pages.
+
+Anonymous visitors see identical HTML on these pages. The first anonymous
+GET renders the page and stores the body together with an ETag and a
+Last-Modified date. Later anonymous GETs are served from the cache without
+the template engine or context processors, and a client that already has
+the page gets a 304.
+
+Signed-in users always get a fresh render, so responses carry
+``Vary: Cookie``. Keys include DEPLOY_VERSION, so a deploy starts from an
+empty page cache. A page is never stored if rendering it issued a CSRF
+token, changed the session or set a cookie, because that content is
+specific to one visitor.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+_PAGE_KEY = 'page:{}:{}:{}'
+
+
+def _cacheable(request, response):
+    session = getattr(request, 'session', None)
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Cache-Control')
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and not (session is not None and session.modified)
+    )
+
+
+def cache_anonymous_page(view):
+    """
+    Serve anonymous GET and HEAD requests for this view from the page cache.
+    The key is the host and path; only use it on views whose anonymous
+    output ignores the query string.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+
+        key = _PAGE_KEY.format(settings.DEPLOY_VERSION, request.get_host(), request.path)
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if not _cacheable(request, response):
+                patch_vary_headers(response, ('Cookie',))
+                return response
+            content = response.content
+            entry = (
+                content,
+                response['Content-Type'],
+                '"%s"' % hashlib.sha1(content).hexdigest()[:16],
+                int(time.time()),
+            )
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+
+        content, content_type, etag, last_modified = entry
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Browsers may keep the page but must check back; the check is a cache hit
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ('Cookie',))
+        return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+    return wrapped
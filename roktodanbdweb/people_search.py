@@ -0,0 +1,306 @@
+# roktodanbdweb/people_search.py
+"""
+Indexed name, phone and email search over donors and recipients.
+
+Each row keeps a ``search_document``: one lowercase line with
+
+* every name word as written, and in Latin letters if it is in Bengali
+  script (রহিম -> rhim),
+* a consonant key per name word, written ``#key#``. The key drops vowels
+  and ``h`` and merges doubled letters, so common spellings of one name
+  share it: Mohammad, Muhammad and মোহাম্মদ are all ``#md#``, and
+  Rahim, Rohim and রহিম are all ``#rm#``,
+* the phone number as digits, without the 88 country prefix,
+* the email address.
+
+A query is normalized the same way. Every query word must match one of its
+forms somewhere in the document, as a substring. The document is indexed
+for substring search:
+
+* PostgreSQL: a pg_trgm GIN index on the column serves the LIKE filters,
+  and results are ranked by trigram word similarity. Creating the pg_trgm
+  extension needs a superuser, or on PostgreSQL 13+ a role with CREATE on
+  the database. Without it the index is skipped with a warning and search
+  falls back to unranked LIKE filters; a DBA can run
+  ``CREATE EXTENSION pg_trgm`` and re-run migrate to add the index.
+* SQLite: an FTS5 table with the trigram tokenizer shadows the column,
+  kept in step by triggers, and results are ranked by bm25.
+
+Other backends filter with plain LIKE and do not rank.
+"""
+import logging
+import re
+import unicodedata
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+_BENGALI = {
+    # Independent vowels
+    'অ': 'a', 'আ': 'a', 'ই': 'i', 'ঈ': 'i', 'উ': 'u', 'ঊ': 'u', 'ঋ': 'ri',
+    'এ': 'e', 'ঐ': 'oi', 'ও': 'o', 'ঔ': 'ou',
+    # Consonants, without the inherent vowel
+    'ক': 'k', 'খ': 'kh', 'গ': 'g', 'ঘ': 'gh', 'ঙ': 'ng',
+    'চ': 'ch', 'ছ': 'chh', 'জ': 'j', 'ঝ': 'jh', 'ঞ': 'n',
+    'ট': 't', 'ঠ': 'th', 'ড': 'd', 'ঢ': 'dh', 'ণ': 'n',
+    'ত': 't', 'থ': 'th', 'দ': 'd', 'ধ': 'dh', 'ন': 'n',
+    'প': 'p', 'ফ': 'ph', 'ব': 'b', 'ভ': 'bh', 'ম': 'm',
+    'য': 'j', 'র': 'r', 'ল': 'l', 'শ': 'sh', 'ষ': 'sh', 'স': 's', 'হ': 'h',
+    'ৎ': 't', 'ং': 'ng', 'ঃ': 'h', 'ঁ': '',
+    # Vowel signs, virama and nukta
+    'া': 'a', 'ি': 'i', 'ী': 'i', 'ু': 'u', 'ূ': 'u', 'ৃ': 'ri',
+    'ে': 'e', 'ৈ': 'oi', 'ো': 'o', 'ৌ': 'ou', '্': '', '়': '',
+    # Digits
+    '০': '0', '১': '1', '২': '2', '৩': '3', '৪': '4',
+    '৫': '5', '৬': '6', '৭': '7', '৮': '8', '৯': '9',
+}
+_TRANSLITERATION = str.maketrans(_BENGALI)
+# Letters with a nukta, which NFC splits into two code points
+_NUKTA_LETTERS = (('ড়', 'r'), ('ঢ়', 'rh'), ('য়', 'y'))
+
+# Bengali vowel signs are combining marks, which \w does not match
+_WORD = re.compile(r'[\wঀ-৿]+')
+_BENGALI_LETTER = re.compile(r'[ঀ-৿]')
+_KEY_SPELLINGS = (('ph', 'f'), ('z', 'j'), ('q', 'k'), ('v', 'b'), ('x', 'ks'))
+_KEY_DROPPED = re.compile(r'[aeiouyhw]')
+_REPEATS = re.compile(r'(.)\1+')
+
+# The FTS5 trigram tokenizer cannot match shorter terms
+_MIN_INDEXED_LENGTH = 3
+
+logger = logging.getLogger(__name__)
+
+
+def _latin(word):
+    """``word`` in lowercase ASCII letters and digits"""
+    # NFC keeps vowel signs like ো whole and splits the nukta letters
+    word = unicodedata.normalize('NFC', word)
+    for letter, latin in _NUKTA_LETTERS:
+        word = word.replace(letter, latin)
+    word = unicodedata.normalize('NFKD', word.translate(_TRANSLITERATION))
+    return ''.join(char for char in word if char.isascii() and char.isalnum())
+
+
+def _key(latin):
+    key = latin
+    for spelling, sound in _KEY_SPELLINGS:
+        key = key.replace(spelling, sound)
+    key = _REPEATS.sub(r'\1', key[:1] + _KEY_DROPPED.sub('', key[1:]))
+    return f'#{key}#'
+
+
+def _name_forms(word):
+    """Every form of one name word the document holds"""
+    forms = []
+    if _BENGALI_LETTER.search(word):
+        forms.append(word)
+    latin = _latin(word)
+    if latin:
+        forms.append(latin)
+        if not latin.isdigit():
+            forms.append(_key(latin))
+    return forms
+
+
+def _phone_digits(phone):
+    digits = ''.join(char for char in _latin(phone) if char.isdigit())
+    return digits[2:] if digits.startswith('880') else digits
+
+
+def _words(text):
+    return _WORD.findall(unicodedata.normalize('NFKC', text or '').casefold())
+
+
+def search_document(names, phones=(), emails=()):
+    """The search_document line for a person"""
+    tokens = []
+    for name in names:
+        for word in _words(name):
+            tokens.extend(_name_forms(word))
+    tokens.extend(_phone_digits(phone) for phone in phones if phone)
+    tokens.extend(email.strip().casefold() for email in emails if email)
+    return ' '.join(dict.fromkeys(token for token in tokens if token))
+
+
+def query_terms(query):
+    """
+    The query as a list of terms, each a tuple of forms; a row matches when
+    every term has a form in its document
+    """
+    terms = []
+    for chunk in (query or '').split():
+        if '@' in chunk:
+            terms.append((chunk.casefold(),))
+            continue
+        digits = _phone_digits(chunk)
+        if digits and len(digits) == len(_latin(chunk)):
+            terms.append((digits,))
+            continue
+        for word in _words(chunk):
+            forms = tuple(_name_forms(word))
+            if forms:
+                terms.append(forms)
+    return terms
+
+
+# ---------- indexes ----------
+
+def _fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _has_document_column(connection, model):
+    with connection.cursor() as cursor:
+        columns = connection.introspection.get_table_description(cursor, model._meta.db_table)
+    return any(column.name == 'search_document' for column in columns)
+
+
+def _has_trigram(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def _install_trigram(connection):
+    """Whether pg_trgm is installed, creating it if this role may"""
+    if _has_trigram(connection):
+        return True
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError as error:
+        logger.warning(
+            'Could not create the pg_trgm extension (%s); people search runs without its index '
+            'until a superuser runs CREATE EXTENSION pg_trgm and migrate is re-run.', error,
+        )
+        return False
+    return True
+
+
+def install_search_indexes(connection, models):
+    """
+    Create the search_document index for each model if it is missing.
+    SQLite drops triggers when a migration rebuilds a table, so this also
+    runs after every migrate and refills the FTS table if triggers were lost.
+    """
+    if connection.vendor == 'postgresql' and not _install_trigram(connection):
+        return
+    for model in models:
+        table = model._meta.db_table
+        if table not in connection.introspection.table_names() or not _has_document_column(connection, model):
+            continue
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}_search_trgm" '
+                    f'ON "{table}" USING gin (search_document gin_trgm_ops)'
+                )
+            elif connection.vendor == 'sqlite':
+                fts = _fts_table(model)
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS \"{fts}\" USING fts5("
+                    f"search_document, content='{table}', content_rowid='id', tokenize='trigram')"
+                )
+                triggers = [f'{fts}_insert', f'{fts}_delete', f'{fts}_update']
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                    triggers,
+                )
+                if cursor.fetchone()[0] == len(triggers):
+                    continue
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "{triggers[0]}" AFTER INSERT ON "{table}" BEGIN '
+                    f'INSERT INTO "{fts}" (rowid, search_document) VALUES (new.id, new.search_document); END'
+                )
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "{triggers[1]}" AFTER DELETE ON "{table}" BEGIN '
+                    f'INSERT INTO "{fts}" ("{fts}", rowid, search_document) '
+                    f"VALUES ('delete', old.id, old.search_document); END"
+                )
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "{triggers[2]}" AFTER UPDATE OF search_document ON "{table}" '
+                    f'BEGIN INSERT INTO "{fts}" ("{fts}", rowid, search_document) '
+                    f"VALUES ('delete', old.id, old.search_document); "
+                    f'INSERT INTO "{fts}" (rowid, search_document) VALUES (new.id, new.search_document); END'
+                )
+                cursor.execute(f"INSERT INTO \"{fts}\" (\"{fts}\") VALUES ('rebuild')")
+
+
+def remove_search_indexes(connection, models):
+    for model in models:
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS "{table}_search_trgm"')
+            elif connection.vendor == 'sqlite':
+                fts = _fts_table(model)
+                for suffix in ('insert', 'delete', 'update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"')
+                cursor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+
+
+# ---------- search ----------
+
+_trigram_checked = {}
+
+
+def _trigram_ready(alias):
+    """Whether pg_trgm is installed on ``alias``, checked once per process"""
+    if alias not in _trigram_checked:
+        _trigram_checked[alias] = _has_trigram(connections[alias])
+    return _trigram_checked[alias]
+
+def _fts_query(terms):
+    def quoted(form):
+        return '"%s"' % form.replace('"', '""')
+    return ' AND '.join(
+        '(%s)' % ' OR '.join(quoted(form) for form in forms)
+        for forms in terms
+    )
+
+
+def _contains(forms):
+    condition = Q()
+    for form in forms:
+        condition |= Q(search_document__contains=form)
+    return condition
+
+
+def search_people(queryset, query):
+    """
+    Filter ``queryset`` (donors or recipients) to rows matching ``query``,
+    annotated with ``search_rank``: higher is a better match
+    """
+    terms = query_terms(query)
+    no_rank = Value(0.0, output_field=FloatField())
+    if not terms:
+        return queryset.none().annotate(search_rank=no_rank)
+    model = queryset.model
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'sqlite':
+        indexed = [forms for forms in terms if all(len(form) >= _MIN_INDEXED_LENGTH for form in forms)]
+        for forms in terms:
+            if forms not in indexed:
+                queryset = queryset.filter(_contains(forms))
+        if not indexed:
+            return queryset.annotate(search_rank=no_rank)
+        fts = _fts_table(model)
+        match = _fts_query(indexed)
+        column = f'"{model._meta.db_table}"."{model._meta.pk.column}"'
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            # bm25 is lower for better matches
+            f'SELECT -bm25("{fts}") FROM "{fts}" WHERE "{fts}" MATCH %s AND rowid = {column}',
+            [match], output_field=FloatField(),
+        ))
+
+    for forms in terms:
+        queryset = queryset.filter(_contains(forms))
+    if vendor == 'postgresql' and _trigram_ready(queryset.db):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        words = ' '.join(forms[0] for forms in terms)
+        return queryset.annotate(search_rank=TrigramWordSimilarity(words, 'search_document'))
+    return queryset.annotate(search_rank=no_rank)
@@ -0,0 +1,156 @@
+# roktodanbdweb/request_events.py
+"""
+Per-process fan-out of new urgent blood requests to Server-Sent Events
+streams.
+
+Each process runs one hub task on its event loop, however many donors are
+connected. Every SSE_POLL_INTERVAL seconds it asks the source for requests
+newer than the last one it saw. That is an indexed ``pk > watermark`` query,
+and it needs no LISTEN/NOTIFY or message broker, so it works the same on
+SQLite and in tests. Each new active high or critical request is then
+offered to every subscription, which queues a compact event if the
+request's group and location suit its donor. The task stops when the last
+subscriber leaves.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .geo import haversine_km
+from .locations import get_hierarchy
+from .models import BloodRequest, UNIVERSAL_DONOR_GROUPS, compatible_for
+
+logger = logging.getLogger(__name__)
+
+EVENT_URGENCY_LEVELS = ('critical', 'high')
+# Events a slow client may fall behind by before new ones are dropped
+QUEUE_SIZE = 50
+
+
+def latest_request_id():
+    return BloodRequest.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def requests_after(watermark, limit=None):
+    """
+    Active urgent requests with a pk above ``watermark`` as compact event
+    dicts, and the new watermark
+    """
+    rows = list(BloodRequest.objects.filter(pk__gt=watermark).order_by('pk').values(
+        'pk', 'status', 'urgency_level', 'blood_group_needed', 'hospital_name',
+        'thana_id', 'latitude', 'longitude',
+    )[:limit])
+    if not rows:
+        return [], watermark
+    hierarchy = get_hierarchy()
+    events = [
+        {
+            'id': row['pk'],
+            'group': row['blood_group_needed'],
+            'urgency': row['urgency_level'],
+            'hospital': row['hospital_name'],
+            'thana': hierarchy.thana_name(row['thana_id']),
+            'thana_id': row['thana_id'],
+            'latitude': row['latitude'],
+            'longitude': row['longitude'],
+        }
+        for row in rows
+        if row['status'] == 'active' and row['urgency_level'] in EVENT_URGENCY_LEVELS
+    ]
+    return events, rows[-1]['pk']
+
+
+class PollingSource:
+    """Reads new requests from the database; swap for a LISTEN-based source if needed"""
+
+    async def watermark(self):
+        return await sync_to_async(latest_request_id)()
+
+    async def fetch(self, watermark):
+        return await sync_to_async(requests_after)(watermark)
+
+
+class Subscription:
+    """One connected donor: what they can serve and where"""
+
+    def __init__(self, donor, radius_km):
+        self.groups = frozenset(compatible_for(donor.blood_group))
+        self.own_group = donor.blood_group
+        self.critical_only = donor.blood_group in UNIVERSAL_DONOR_GROUPS and donor.critical_requests_only
+        self.thana_id = donor.thana_id
+        self.latitude = donor.latitude
+        self.longitude = donor.longitude
+        self.radius_km = radius_km
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def wants(self, event):
+        if event['group'] not in self.groups:
+            return False
+        if self.critical_only and event['group'] != self.own_group and event['urgency'] != 'critical':
+            return False
+        if event['thana_id'] is not None and event['thana_id'] == self.thana_id:
+            return True
+        if None in (self.latitude, event['latitude']):
+            return False
+        return haversine_km(self.latitude, self.longitude, event['latitude'], event['longitude']) <= self.radius_km
+
+    def offer(self, event):
+        if self.wants(event):
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+
+class RequestEventHub:
+    def __init__(self, source=None, interval=None):
+        self.source = source or PollingSource()
+        self.interval = interval if interval is not None else settings.SSE_POLL_INTERVAL
+        self.subscriptions = set()
+        self._task = None
+
+    def subscribe(self, subscription):
+        self.subscriptions.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+
+    async def _run(self):
+        watermark = await self.source.watermark()
+        while self.subscriptions:
+            await asyncio.sleep(self.interval)
+            try:
+                events, watermark = await self.source.fetch(watermark)
+            except Exception:
+                # A failed poll must not end the stream of every connected donor
+                logger.exception("Polling for new blood requests failed")
+                continue
+            for event in events:
+                for subscription in list(self.subscriptions):
+                    subscription.offer(event)
+
+
+_hubs = {}
+
+
+def get_request_event_hub():
+    """The hub of the running event loop, created on first use"""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        # Loops other than the server's (tests, async_to_sync) come and go
+        for stale in [other for other in _hubs if other.is_closed()]:
+            del _hubs[stale]
+        hub = _hubs[loop] = RequestEventHub()
+    return hub
+
+
+def format_event(event):
+    """Serialize an event for the wire: SSE framing around compact JSON"""
+    data = {key: event[key] for key in ('id', 'group', 'urgency', 'hospital', 'thana')}
+    return f"id: {event['id']}\nevent: blood-request\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
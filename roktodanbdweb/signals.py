@@ -0,0 +1,148 @@
+# roktodanbdweb/signals.py
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import blood_supply, donor_bitmaps
+from .donor_search import invalidate_donor_searches
+from .emergency import invalidate_emergency_feeds
+from .hospitals import invalidate_hospital_trie
+from .locations import invalidate_hierarchy
+from .models import (
+    District, Thana, PostOffice, Donor, DonorSearchIndex, Hospital, BloodRequest, Recipient, DonationHistory,
+)
+from .people_search import install_search_indexes
+
+
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Thana)
+@receiver(post_save, sender=PostOffice)
+@receiver(post_delete, sender=District)
+@receiver(post_delete, sender=Thana)
+@receiver(post_delete, sender=PostOffice)
+def location_changed(sender, **kwargs):
+    """Drop the per-process location hierarchy when a location row changes"""
+    invalidate_hierarchy()
+
+
+@receiver(post_save, sender=Hospital)
+@receiver(post_delete, sender=Hospital)
+def hospital_changed(sender, **kwargs):
+    """Drop the per-process autocomplete trie when the registry changes"""
+    invalidate_hospital_trie()
+    invalidate_donor_searches()
+
+
+@receiver(pre_save, sender=BloodRequest)
+def blood_request_saving(sender, instance, raw=False, **kwargs):
+    """Remember the stored blood group, whose feeds must go too if it is edited"""
+    if not raw and instance.pk is not None:
+        instance._previous_blood_group = (BloodRequest.objects.filter(pk=instance.pk)
+                                          .values_list('blood_group_needed', flat=True).first())
+
+
+@receiver(post_save, sender=BloodRequest)
+@receiver(post_delete, sender=BloodRequest)
+def blood_request_changed(sender, instance, **kwargs):
+    """Created, fulfilled, expired or edited requests change the cached emergency feeds"""
+    previous = instance.__dict__.pop('_previous_blood_group', None)
+    invalidate_emergency_feeds(*{instance.blood_group_needed, previous} - {None})
+
+
+@receiver(pre_save, sender=DonationHistory)
+def donation_saving(sender, instance, raw=False, **kwargs):
+    """Remember the stored donor, whose counters must move too if the record is reassigned"""
+    if not raw and instance.pk is not None:
+        instance._previous_donor_id = (DonationHistory.objects.filter(pk=instance.pk)
+                                       .values_list('donor_id', flat=True).first())
+
+
+@receiver(post_save, sender=DonationHistory)
+@receiver(post_delete, sender=DonationHistory)
+def donation_changed(sender, instance, raw=False, **kwargs):
+    """
+    Keep the donor's donation counters in step. As receivers rather than
+    model methods, so admin bulk deletes and ``queryset.delete()`` run them too.
+    """
+    if raw:
+        return
+    previous = instance.__dict__.pop('_previous_donor_id', None)
+    Donor.refresh_donation_counters({instance.donor_id, previous} - {None})
+
+
+# Donor fields that cached find_blood results depend on
+DONOR_SEARCH_FIELDS = frozenset({
+    'user', 'user_id', 'blood_group', 'district', 'district_id', 'thana', 'thana_id', 'post_office',
+    'post_office_id', 'last_donation_month', 'last_donation_year', 'phone_number', 'profile_image',
+    'is_active', 'is_available', 'registration_date', 'latitude', 'longitude',
+})
+
+
+@receiver(pre_save, sender=Donor)
+def donor_saving(sender, instance, raw=False, **kwargs):
+    """Remember the donor's blood-supply cell and location before this save"""
+    if not raw and instance.pk is not None:
+        stored = (Donor.objects.only(*blood_supply.STATE_FIELDS, 'latitude', 'longitude')
+                  .filter(pk=instance.pk).first())
+        if stored is not None:
+            instance._supply_state = blood_supply.supply_state(stored, timezone.localdate())
+            instance._stored_point = (stored.latitude, stored.longitude)
+
+
+@receiver(post_save, sender=Donor)
+def donor_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Keep the denormalized search structures in step with the donor row.
+    Cached searches are only retired when something they show changed, so
+    saves of points, counters or preferences leave them fresh.
+    """
+    stored_point = instance.__dict__.pop('_stored_point', None)
+    if not raw:
+        blood_supply.donor_moved(
+            instance.__dict__.pop('_supply_state', None),
+            blood_supply.supply_state(instance, timezone.localdate()),
+        )
+    donor_bitmaps.donor_changed(instance)
+    if raw or (update_fields is not None and not DONOR_SEARCH_FIELDS & update_fields):
+        return
+    entry_changed = DonorSearchIndex.refresh(instance)
+    if entry_changed or stored_point != (instance.latitude, instance.longitude):
+        invalidate_donor_searches()
+
+
+@receiver(post_delete, sender=Donor)
+def donor_deleted(sender, instance, **kwargs):
+    blood_supply.donor_moved(blood_supply.supply_state(instance, timezone.localdate()), None)
+    donor_bitmaps.donor_deleted(instance.pk)
+    invalidate_donor_searches()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Donor names live on User; copy renames into the search entry and documents"""
+    if raw or (update_fields is not None and not {'first_name', 'last_name', 'email'} & set(update_fields)):
+        return
+    # Only entries whose name differs, so saves on login leave cached searches alone
+    if DonorSearchIndex.objects.filter(donor__user_id=instance.pk).exclude(
+        first_name=instance.first_name,
+        last_name=instance.last_name,
+    ).update(
+        first_name=instance.first_name,
+        last_name=instance.last_name,
+    ):
+        invalidate_donor_searches()
+    for model in (Donor, Recipient):
+        for person in model.objects.filter(user_id=instance.pk):
+            document = person.build_search_document(instance)
+            if document != person.search_document:
+                model.objects.filter(pk=person.pk).update(search_document=document)
+
+
+def install_people_search(sender, using, **kwargs):
+    """
+    post_migrate: make sure the people search indexes exist. SQLite drops
+    the FTS triggers when a later migration rebuilds the table.
+    """
+    install_search_indexes(connections[using], [Donor, Recipient])
@@ -0,0 +1,35 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.core.cache import cache
+
+register = template.Library()
+
+
+def cached_date_hierarchy(cl):
+    """
+    Django's date hierarchy, cached per model and query string for
+    ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT seconds. Building it runs MIN/MAX and
+    DISTINCT date queries over the whole filtered table.
+    """
+    query = hashlib.md5(cl.get_query_string().encode()).hexdigest()
+    key = f'admin-dates:{cl.opts.label_lower}:{query}'
+    context = cache.get(key)
+    if context is None:
+        context = date_hierarchy(cl)
+        cache.set(key, context, settings.ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT)
+    return context
+
+
+@register.tag(name='cached_date_hierarchy')
+def cached_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=cached_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
@@ -1,3 +1,1116 @@
-from django.test import TestCase
+import datetime
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    admin_lists, assignment, bulk_actions, donor_bitmaps, donor_search, donor_snapshot, emergency, hospitals,
+    views,
+)
+from .models import (
+    BloodRequest, BloodSupply, District, DonationHistory, Donor, DonorBadge, DonorPoints, DonorResponse,
+    DonorSearchIndex, Hospital, OutboxMessage, PointTransaction, PostOffice, Recipient, SearchLock, Thana,
+    WithdrawalRequest,
+)
+from .request_events import RequestEventHub, requests_after
+from .tiered_cache import TieredCache
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-default',
+    },
+    'tiered': {
+        'BACKEND': 'roktodanbdweb.tiered_cache.TieredCache',
+        'LOCATION': 'tests-tiered',
+        'OPTIONS': {'SHARED': 'default'},
+    },
+}
+
+
+class QueryCounter:
+    """execute_wrapper that counts queries from every thread it is installed in"""
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SingleFlightSearchTests(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.district = District.objects.create(name='Test District')
+        self.thana = Thana.objects.create(name='Test Thana', district=self.district)
+        self.post_office = PostOffice.objects.create(name='Test PO', district=self.district, thana=self.thana)
+        for number in range(3):
+            Donor.objects.create(
+                user=User.objects.create(username=f'donor{number}'),
+                phone_number=f'0170000000{number}', age=30, blood_group='A+',
+                district=self.district, thana=self.thana, post_office=self.post_office,
+            )
+        donor_search._cache.clear()
+        donor_search._cache.shared.clear()
+
+    def search(self):
+        return donor_search.donors_in_area('A+', self.thana, self.post_office, self.district)
+
+    def queries_for_one_search(self):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            donors, stale = self.search()
+        self.assertEqual(len(donors), 3)
+        self.assertFalse(stale)
+        donor_search._cache.clear()
+        donor_search._cache.shared.clear()
+        return counter.count
+
+    def test_concurrent_identical_searches_run_the_queries_once(self):
+        single = self.queries_for_one_search()
+        self.assertGreater(single, 0)
+
+        original = donor_search._area_donor_entries
+
+        def slow_entries(*args):
+            # Keep the first computation in flight while the other threads arrive
+            time.sleep(0.2)
+            return original(*args)
+
+        counter = QueryCounter()
+        barrier = threading.Barrier(self.threads)
+        results = []
+        errors = []
+
+        def run():
+            try:
+                with connection.execute_wrapper(counter):
+                    barrier.wait()
+                    results.append(self.search())
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        with mock.patch.object(donor_search, '_area_donor_entries', slow_entries):
+            workers = [threading.Thread(target=run) for _ in range(self.threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), self.threads)
+        self.assertTrue(all(len(donors) == 3 and not stale for donors, stale in results))
+        self.assertEqual(counter.count, single)
+
+    def test_waits_for_a_search_another_worker_is_computing(self):
+        key = f'area:A+:{self.district.pk}:{self.thana.pk}:{self.post_office.pk}'
+        # Another process holds the lock and stores its result a moment later
+        SearchLock.objects.create(key=donor_search._LOCK_KEY.format(key), owner='other',
+                                  expires_at=timezone.now() + datetime.timedelta(seconds=10))
+        computed = donor_search._area_donor_entries('A+', self.thana.pk, self.post_office.pk, self.district.pk)
+        publisher = threading.Timer(
+            0.2, donor_search._cache.set, (f'{donor_search.SEARCH_CACHE_NAMESPACE}:{key}', computed, 60)
+        )
+
+        publisher.start()
+        with mock.patch.object(donor_search, '_compute') as compute:
+            donors, stale = self.search()
+        publisher.join()
+
+        self.assertEqual(len(donors), 3)
+        self.assertFalse(stale)
+        compute.assert_not_called()
+        self.assertTrue(SearchLock.objects.filter(owner='other').exists())
+
+    def test_takes_over_an_expired_lock(self):
+        lock_key = donor_search._LOCK_KEY.format('area:A+:0:0:0')
+        SearchLock.objects.create(key=lock_key, owner='gone', expires_at=timezone.now())
+        owner = donor_search._take_lock(lock_key)
+        self.assertIsNotNone(owner)
+        # Held now, so a second worker is turned away
+        self.assertIsNone(donor_search._take_lock(lock_key))
+        self.assertEqual(SearchLock.objects.get(key=lock_key).owner, owner)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TieredCacheTests(TestCase):
+    def worker(self, name, local_timeout=300):
+        # A separate in-process tier over the shared cache, as in another worker process
+        return TieredCache(name, {'OPTIONS': {'SHARED': 'default', 'STAMP_INTERVAL': 0,
+                                              'LOCAL_TIMEOUT': local_timeout}})
+
+    def setUp(self):
+        caches['default'].clear()
+        self.first, self.second = self.worker('tiered-1'), self.worker('tiered-2')
+        self.addCleanup(self.first.clear)
+        self.addCleanup(self.second.clear)
+
+    def test_invalidating_a_namespace_retires_it_in_every_worker(self):
+        self.first.set('things:a', 'old')
+        self.first.set('others:a', 'kept')
+        self.assertEqual(self.second.get('things:a'), 'old')
+        self.second.invalidate_namespace('things')
+        self.assertIsNone(self.first.get('things:a'))
+        self.assertIsNone(self.second.get('things:a'))
+        self.assertEqual(self.first.get('others:a'), 'kept')
+
+    def test_l1_copy_keeps_the_l2_expiry(self):
+        self.first.set('things:a', 'value', 30)
+        self.assertEqual(self.second.get('things:a'), 'value')
+        key = self.second.make_key('things:a')
+        _, expires_at, _ = self.second._store.entries[key]
+        self.assertLessEqual(expires_at - time.monotonic(), 30)
+
+    def test_l1_entry_expires_with_its_timeout(self):
+        cache = self.worker('tiered-3', local_timeout=300)
+        self.addCleanup(cache.clear)
+        cache.set('things:a', 'value', 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('things:a'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HospitalTrieTests(TestCase):
+    def worker(self, name):
+        # A separate in-process tier over the shared cache, as in another worker process
+        return TieredCache(name, {'OPTIONS': {'SHARED': 'default', 'STAMP_INTERVAL': 0}})
+
+    def test_every_worker_sees_a_renamed_hospital(self):
+        hospital = Hospital.objects.create(name='Old General Hospital')
+        first, second = self.worker('worker-1'), self.worker('worker-2')
+        with mock.patch.object(hospitals, '_cache', first):
+            self.assertEqual(hospitals.get_hospital_trie().suggest('old'), [hospital])
+        # Renamed in the second worker; its signal retires the cached trie everywhere
+        with mock.patch.object(hospitals, '_cache', second):
+            hospital.name = 'New General Hospital'
+            hospital.save()
+        with mock.patch.object(hospitals, '_cache', first):
+            trie = hospitals.get_hospital_trie()
+            self.assertEqual(trie.suggest('old'), [])
+            self.assertEqual([match.name for match in trie.suggest('new')], ['New General Hospital'])
+
+
+# Nothing cached between requests, so every page does its full work each time
+UNCACHED = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'tiered': {
+        'BACKEND': 'roktodanbdweb.tiered_cache.TieredCache',
+        'LOCATION': 'tests-uncached',
+        'OPTIONS': {'SHARED': 'default'},
+    },
+}
+
+
+class AdminTestData:
+    """A logged-in superuser, one location and factories for admin tests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.district = District.objects.create(name='Test District')
+        cls.thana = Thana.objects.create(name='Test Thana', district=cls.district)
+        cls.post_office = PostOffice.objects.create(name='Test PO', district=cls.district, thana=cls.thana)
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def make_user(self, name, number):
+        return User.objects.create(username=f'{name}{number}', first_name=name.title(), last_name=str(number),
+                                   email=f'{name}{number}@example.com')
+
+    def make_donor(self, number):
+        return Donor.objects.create(
+            user=self.make_user('donor', number), phone_number=f'0171{number:07d}', age=30, blood_group='A+',
+            district=self.district, thana=self.thana, post_office=self.post_office,
+        )
+
+    def make_recipient(self, number):
+        user = self.make_user('recipient', number)
+        return Recipient.objects.create(
+            user=user, first_name=user.first_name, last_name=user.last_name, email=user.email,
+            phone_number=f'0181{number:07d}', blood_group='B+', house_holding_no='1', road_block='Road 1',
+            district=self.district, thana=self.thana, post_office=self.post_office,
+        )
+
+    def make_blood_request(self, number):
+        now = timezone.now()
+        return BloodRequest.objects.create(
+            recipient=self.make_recipient(number), blood_group_needed='B+', hospital_name='Test Hospital',
+            hospital_address='Test Road', thana=self.thana, district=self.district,
+            patient_name=f'Patient {number}', patient_age=40, needed_by_date=now + datetime.timedelta(days=1),
+            contact_person='Contact', contact_number='01900000000', expires_at=now + datetime.timedelta(days=2),
+        )
+
+    def make_emergency_request(self, number, blood_group, urgency_level):
+        blood_request = self.make_blood_request(number)
+        BloodRequest.objects.filter(pk=blood_request.pk).update(
+            blood_group_needed=blood_group, urgency_level=urgency_level)
+        blood_request.refresh_from_db()
+        return blood_request
+
+    def make_donor_points(self, number):
+        return DonorPoints.objects.create(donor=self.make_donor(number), total_points=100, available_points=100)
+
+
+ADMIN_TEST_SETTINGS = override_settings(
+    CACHES=UNCACHED,
+    # Pages render without a collectstatic manifest
+    STORAGES={**settings.STORAGES,
+              'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+
+
+@ADMIN_TEST_SETTINGS
+class AdminQueryCountTests(AdminTestData, TestCase):
+    """Each admin changelist and change view runs the same queries for 1 and 6 rows"""
+    extra_rows = 5
+
+    def page_queries(self, *urls):
+        counts = []
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, secure=True)
+            self.assertEqual(response.status_code, 200, url)
+            counts.append(len(queries))
+        return counts
+
+    def assertConstantQueries(self, make):
+        first = make(0)
+        opts = first._meta
+        urls = (
+            reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'),
+            reverse(f'admin:{opts.app_label}_{opts.model_name}_change', args=[first.pk]),
+        )
+        # The first request fills per-process caches (content types, locations)
+        self.page_queries(*urls)
+        counts = self.page_queries(*urls)
+        for number in range(1, self.extra_rows + 1):
+            make(number)
+        self.assertEqual(self.page_queries(*urls), counts)
+
+    # ---------- one test per ModelAdmin ----------
+
+    def test_donor_admin(self):
+        self.assertConstantQueries(self.make_donor)
+
+    def test_recipient_admin(self):
+        self.assertConstantQueries(self.make_recipient)
+
+    def test_donation_history_admin(self):
+        self.assertConstantQueries(lambda number: DonationHistory.objects.create(
+            donor=self.make_donor(number), donation_date=timezone.now() - datetime.timedelta(days=30 * number),
+            status='completed', hospital_name='Test Hospital', blood_group='A+', location='Test Thana',
+        ))
+
+    def test_blood_request_admin(self):
+        self.assertConstantQueries(self.make_blood_request)
+
+    def test_donor_response_admin(self):
+        self.assertConstantQueries(lambda number: DonorResponse.objects.create(
+            donor=self.make_donor(number), blood_request=self.make_blood_request(number), response='accept',
+        ))
+
+    def test_donor_points_admin(self):
+        def make(number):
+            points = self.make_donor_points(number)
+            PointTransaction.objects.create(donor_points=points, transaction_type='earned', points=100,
+                                            description='Blood Donation')
+            return points
+
+        self.assertConstantQueries(make)
+
+    def test_point_transaction_admin(self):
+        self.assertConstantQueries(lambda number: PointTransaction.objects.create(
+            donor_points=self.make_donor_points(number), transaction_type='earned', points=100,
+            description='Blood Donation',
+        ))
+
+    def test_donor_badge_admin(self):
+        self.assertConstantQueries(lambda number: DonorBadge.objects.create(
+            donor=self.make_donor(number), badge_type='first_donor', donation_count_when_earned=1,
+        ))
+
+    def test_withdrawal_request_admin(self):
+        self.assertConstantQueries(lambda number: WithdrawalRequest.objects.create(
+            donor=self.make_donor(number), points_requested=50, amount_bdt=50,
+        ))
+
+    def test_district_admin(self):
+        self.assertConstantQueries(lambda number: District.objects.create(name=f'District {number}'))
+
+    def test_thana_admin(self):
+        self.assertConstantQueries(lambda number: Thana.objects.create(name=f'Thana {number}',
+                                                                      district=self.district))
+
+    def test_post_office_admin(self):
+        self.assertConstantQueries(lambda number: PostOffice.objects.create(
+            name=f'PO {number}', district=self.district, thana=self.thana,
+        ))
+
+    def test_hospital_admin(self):
+        self.assertConstantQueries(lambda number: Hospital.objects.create(
+            name=f'Hospital {number}', district=self.district, thana=self.thana,
+        ))
+
+    def test_user_admin(self):
+        def make(number):
+            donor = self.make_donor(number)
+            self.make_recipient(number)
+            return donor.user
+
+        self.assertConstantQueries(make)
+
+
+@ADMIN_TEST_SETTINGS
+class AdminBulkActionTests(AdminTestData, TestCase):
+    """Bulk actions on "select all" run the same queries for 1 and 6 rows"""
+
+    def run_action(self, model, action):
+        url = reverse(f'admin:roktodanbdweb_{model._meta.model_name}_changelist')
+        data = {'action': action, 'select_across': '1', 'index': '0',
+                '_selected_action': list(model.objects.values_list('pk', flat=True))}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, secure=True)
+        self.assertIn(response.status_code, (200, 302))
+        return response, len(queries)
+
+    def assertConstantActionQueries(self, make, action, reset=None):
+        make(0)
+        model = type(make(1))
+        self.run_action(model, action)
+        if reset:
+            reset()
+        _, first = self.run_action(model, action)
+        for number in range(2, 7):
+            make(number)
+        if reset:
+            reset()
+        _, second = self.run_action(model, action)
+        self.assertEqual(first, second)
+
+    def test_mark_as_unavailable(self):
+        self.assertConstantActionQueries(
+            self.make_donor, 'mark_as_unavailable', reset=lambda: Donor.objects.update(is_available=True)
+        )
+        self.assertFalse(Donor.objects.filter(is_available=True).exists())
+        self.assertFalse(DonorSearchIndex.objects.filter(is_searchable=True).exists())
+        cell = BloodSupply.objects.get(thana=self.thana, blood_group='A+')
+        self.assertEqual((cell.total_donors, cell.eligible_donors), (7, 0))
+
+    def test_mark_as_available(self):
+        self.assertConstantActionQueries(
+            self.make_donor, 'mark_as_available', reset=lambda: Donor.objects.update(is_available=False)
+        )
+        self.assertEqual(DonorSearchIndex.objects.filter(is_searchable=True).count(), 7)
+        cell = BloodSupply.objects.get(thana=self.thana, blood_group='A+')
+        self.assertEqual((cell.total_donors, cell.eligible_donors), (7, 7))
+
+    def test_send_donation_reminder(self):
+        self.assertConstantActionQueries(
+            self.make_donor, 'send_donation_reminder', reset=lambda: OutboxMessage.objects.all().delete()
+        )
+        self.assertEqual(OutboxMessage.objects.filter(kind='donation_reminder').count(), 7)
+        # Donors who already have one waiting are skipped
+        self.run_action(Donor, 'send_donation_reminder')
+        self.assertEqual(OutboxMessage.objects.count(), 7)
+
+    def test_export_donor_list(self):
+        self.assertConstantActionQueries(self.make_donor, 'export_donor_list')
+        response, _ = self.run_action(Donor, 'export_donor_list')
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 8)
+
+    def test_award_bonus_points(self):
+        self.assertConstantActionQueries(self.make_donor_points, 'award_bonus_points')
+        bonus = settings.ADMIN_BONUS_POINTS
+        self.assertEqual(DonorPoints.objects.get(donor__user__username='donor0').available_points, 100 + 3 * bonus)
+        self.assertEqual(PointTransaction.objects.filter(transaction_type='bonus').count(), 2 + 2 + 7)
+
+    def test_reset_points(self):
+        self.assertConstantActionQueries(
+            self.make_donor_points, 'reset_points', reset=lambda: DonorPoints.objects.update(available_points=100)
+        )
+        self.assertFalse(DonorPoints.objects.filter(available_points__gt=0).exists())
+        self.assertEqual(PointTransaction.objects.filter(transaction_type='penalty', points=-100).count(), 2 + 2 + 7)
+
+    @override_settings(ADMIN_BULK_ACTION_BACKGROUND_THRESHOLD=2)
+    def test_large_selections_run_in_the_background(self):
+        for number in range(3):
+            self.make_donor(number)
+        with mock.patch.object(bulk_actions._pool, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                response, _ = self.run_action(Donor, 'mark_as_unavailable')
+        submit.assert_called_once()
+        self.assertEqual(Donor.objects.filter(is_available=True).count(), 3)
+        self.assertContains(self.client.get(response.url, secure=True), 'in the background')
+
+
+@ADMIN_TEST_SETTINGS
+class DonorCountTests(AdminTestData, TestCase):
+    """The staff count endpoint answers from the bitmap index, which follows other processes' changes"""
+
+    def setUp(self):
+        super().setUp()
+        # Start each test without an index loaded
+        patcher = mock.patch.object(donor_bitmaps, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.other_thana = Thana.objects.create(name='Other Thana', district=self.district)
+        for number in range(4):
+            donor = self.make_donor(number)
+            if number == 3:
+                Donor.objects.filter(pk=donor.pk).update(blood_group='O-', thana=self.other_thana)
+
+    def counts(self, query=''):
+        response = self.client.get(reverse('donor_counts') + query, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counts_and_breakdowns(self):
+        counts = self.counts(f'?blood_group=A%2B&thana={self.thana.pk}&available=1')
+        self.assertEqual(counts['count'], 3)
+        # Each breakdown ignores its own filter
+        self.assertEqual(counts['by_blood_group']['A+'], 3)
+        self.assertEqual(counts['by_blood_group']['O-'], 0)
+        self.assertEqual(counts['by_thana'], [{'id': self.thana.pk, 'name': 'Test Thana', 'count': 3}])
+
+    def test_invalid_filters(self):
+        for query in ('?blood_group=Z', '?thana=x', '?available=yes', '?min_weight=heavy'):
+            response = self.client.get(reverse('donor_counts') + query, secure=True)
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_refresh_drops_donors_deleted_by_other_processes(self):
+        self.assertEqual(self.counts()['count'], 4)
+        # As if another worker deleted it: this process's signal never fires
+        with mock.patch.object(donor_bitmaps, 'donor_deleted'):
+            Donor.objects.filter(thana=self.other_thana).delete()
+        with override_settings(DONOR_BITMAP_REFRESH_INTERVAL=0):
+            counts = self.counts()
+        self.assertEqual(counts['count'], 3)
+        self.assertEqual(counts['by_blood_group']['O-'], 0)
+
+    def test_refresh_picks_up_rows_committed_behind_the_watermark(self):
+        self.assertEqual(self.counts()['by_blood_group']['O-'], 1)
+        watermark = donor_bitmaps.get_bitmap_index().watermark
+        # Another worker's slow transaction: stamped before rows this index
+        # has already seen, committed after them, and no signal here
+        Donor.objects.filter(thana=self.thana).update(
+            blood_group='O-', last_updated=watermark - datetime.timedelta(seconds=5))
+        with override_settings(DONOR_BITMAP_REFRESH_INTERVAL=0):
+            self.assertEqual(self.counts()['by_blood_group']['O-'], 4)
+
+
+@ADMIN_TEST_SETTINGS
+class MatchingInboxTests(AdminTestData, TestCase):
+    """The matching page lists every request the donor's blood group can serve"""
+
+    def setUp(self):
+        super().setUp()
+        donor = self.make_donor(1)
+        Donor.objects.filter(pk=donor.pk).update(blood_group='O-', critical_requests_only=False)
+        self.donor = Donor.objects.get(pk=donor.pk)
+        self.client.force_login(self.donor.user)
+
+    def inbox(self):
+        response = self.client.get(reverse('matching'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['compatible_requests'])
+
+    def test_universal_donor_sees_compatible_requests_own_group_first(self):
+        other_high = self.make_emergency_request(1, 'A+', 'high')
+        other_critical = self.make_emergency_request(2, 'B+', 'critical')
+        own = self.make_emergency_request(3, 'O-', 'high')
+        answered = self.make_emergency_request(4, 'AB+', 'critical')
+        DonorResponse.objects.create(donor=self.donor, blood_request=answered, response='refuse')
+        elsewhere = self.make_emergency_request(5, 'A+', 'critical')
+        other_thana = Thana.objects.create(name='Other Thana', district=self.district)
+        BloodRequest.objects.filter(pk=elsewhere.pk).update(thana=other_thana)
+
+        self.assertEqual(self.inbox(), [own, other_critical, other_high])
+
+        response = self.client.post(reverse('matching'), {'critical_requests_only': 'on'}, secure=True)
+        self.assertRedirects(response, reverse('matching'), fetch_redirect_response=False)
+        self.assertEqual(self.inbox(), [own, other_critical])
+        # An unchecked box is left out of the form
+        self.client.post(reverse('matching'), {}, secure=True)
+        self.assertEqual(self.inbox(), [own, other_critical, other_high])
+
+    def test_other_donors_cannot_opt_out_of_other_groups(self):
+        Donor.objects.filter(pk=self.donor.pk).update(blood_group='A+')
+        self.client.post(reverse('matching'), {'critical_requests_only': 'on'}, secure=True)
+        self.assertFalse(Donor.objects.get(pk=self.donor.pk).critical_requests_only)
+
+
+@ADMIN_TEST_SETTINGS
+class DonorHistoryTests(AdminTestData, TestCase):
+    """Keyset pages of a donor's history, with statistics over every page"""
+
+    def setUp(self):
+        super().setUp()
+        self.donor = self.make_donor(1)
+        self.client.force_login(self.donor.user)
+
+    def donate(self, days_ago, status='completed', amount=450):
+        return DonationHistory.objects.create(
+            donor=self.donor, donation_date=self.today - datetime.timedelta(days=days_ago), status=status,
+            amount=amount, hospital_name='Test Hospital', blood_group='A+', location='Test Thana',
+        )
+
+    def page(self, **query):
+        response = self.client.get(reverse('donor_history'), query, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    @mock.patch.object(views, 'DONATION_HISTORY_PAGE_SIZE', 2)
+    def test_pages_split_ties_and_statistics_cover_every_page(self):
+        self.today = timezone.now().replace(microsecond=0)
+        oldest = self.donate(300, amount=350)
+        # Two donations at the same moment straddle the first page boundary
+        tied = [self.donate(100), self.donate(100)]
+        cancelled = self.donate(10, status='cancelled')
+
+        first = self.page()
+        self.assertEqual(first['donation_history'], [cancelled, tied[1]])
+        self.assertEqual((first['total_donations'], first['lives_saved'], first['total_ml']), (3, 9, 1250))
+        self.assertEqual(first['days_since_last'], 100)
+        last = self.page(after=first['next_cursor'])
+        self.assertEqual(last['donation_history'], [tied[0], oldest])
+        self.assertIsNone(last['next_cursor'])
+        self.assertEqual(last['total_donations'], 3)
+
+    def test_filters_narrow_the_statistics_and_ride_along_with_the_cursor(self):
+        self.today = timezone.now()
+        self.donate(300)
+        self.donate(100)
+        self.donate(10, status='cancelled')
+        from_date = timezone.localdate(self.today - datetime.timedelta(days=150)).isoformat()
+        context = self.page(from_date=from_date, status='completed')
+        self.assertEqual(len(context['donation_history']), 1)
+        self.assertEqual(context['total_donations'], 1)
+        self.assertEqual(context['filter_query'], f'from_date={from_date}&status=completed')
+
+
+class DonorSnapshotOverlayTests(AdminTestData, TestCase):
+    """Donors changed after the snapshot was built are served from the overlay"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'donor_snapshot.bin')
+        snapshot_settings = override_settings(DONOR_SNAPSHOT_PATH=path, DONOR_SNAPSHOT_REFRESH_INTERVAL=0)
+        snapshot_settings.enable()
+        self.addCleanup(snapshot_settings.disable)
+        # Start each test without a mapped snapshot
+        patcher = mock.patch.object(donor_snapshot, '_state', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.donors = [self.make_donor(number) for number in range(3)]
+        for offset, donor in enumerate(self.donors):
+            Donor.objects.filter(pk=donor.pk).update(
+                registration_date=timezone.now() - datetime.timedelta(days=10 - offset))
+        self.assertEqual(donor_snapshot.build_snapshot(), 3)
+
+    def search(self, blood_group, eligible_on=None):
+        return donor_snapshot.search_donor_ids(
+            blood_group, self.thana, self.post_office, self.district, eligible_on=eligible_on)
+
+    def test_snapshot_rows_newest_first(self):
+        self.assertEqual(self.search('A+'), [donor.pk for donor in reversed(self.donors)])
+        self.assertEqual(self.search('O-'), [])
+
+    def test_overlay_adds_moves_and_hides_changed_donors(self):
+        first, second, third = self.donors
+        # Changed behind the snapshot: saves only bump last_updated
+        first.blood_group = 'O-'
+        first.save()
+        second.is_available = False
+        second.save()
+        today = timezone.localdate()
+        newcomer = self.make_donor(3)
+        newcomer.last_donation_month = Donor.MONTH_CHOICES[today.month - 1][0]
+        newcomer.last_donation_year = str(today.year)
+        newcomer.save()
+
+        self.assertEqual(self.search('A+'), [newcomer.pk, third.pk])
+        self.assertEqual(self.search('O-'), [first.pk])
+        # The newcomer's 90-day gap is not over yet
+        self.assertEqual(self.search('A+', eligible_on=today), [third.pk])
+
+
+@ADMIN_TEST_SETTINGS
+class BloodRequestListTests(AdminTestData, TestCase):
+    """Keyset pages of the requests a donor can serve"""
+
+    def setUp(self):
+        super().setUp()
+        self.donor = self.make_donor(1)
+        self.client.force_login(self.donor.user)
+
+    def make_request(self, number, urgency_level, needed_by):
+        blood_request = self.make_emergency_request(number, 'A+', urgency_level)
+        BloodRequest.objects.filter(pk=blood_request.pk).update(needed_by_date=needed_by)
+        return blood_request
+
+    def page(self, after=None):
+        response = self.client.get(reverse('blood_request_list'), {'after': after} if after else {}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['requests']), response.context['next_cursor']
+
+    @mock.patch.object(views, 'BLOOD_REQUEST_PAGE_SIZE', 3)
+    def test_pages_split_ties_and_urgency_levels_without_gaps(self):
+        tomorrow = timezone.now().replace(microsecond=0) + datetime.timedelta(days=1)
+        # Created out of order so pk order and sort order differ
+        low_late = self.make_request(1, 'low', tomorrow)
+        high = [self.make_request(number, 'high', tomorrow) for number in (2, 3, 4)]
+        critical = [self.make_request(number, 'critical', tomorrow) for number in (5, 6)]
+        low_soon = self.make_request(7, 'low', tomorrow - datetime.timedelta(hours=1))
+
+        first, cursor = self.page()
+        # Three high requests tie on needed_by_date across this boundary
+        self.assertEqual(first, critical + high[:1])
+        second, cursor = self.page(cursor)
+        self.assertEqual(second, high[1:] + [low_soon])
+        last, cursor = self.page(cursor)
+        self.assertEqual(last, [low_late])
+        self.assertIsNone(cursor)
+
+    @mock.patch.object(views, 'BLOOD_REQUEST_PAGE_SIZE', 2)
+    def test_a_full_last_page_has_no_next_cursor(self):
+        tomorrow = timezone.now() + datetime.timedelta(days=1)
+        requests = [self.make_request(number, 'high', tomorrow) for number in (1, 2, 3, 4)]
+        first, cursor = self.page()
+        last, cursor = self.page(cursor)
+        self.assertEqual(first + last, requests)
+        self.assertIsNone(cursor)
+        self.assertEqual(self.page('not-a-cursor')[0], requests[:2])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class EmergencyFeedTests(AdminTestData, TestCase):
+    """Cached emergency feeds follow edited requests and keep every critical request"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_edited_blood_group_leaves_the_old_feeds(self):
+        blood_request = self.make_emergency_request(1, 'B+', 'critical')
+        self.assertEqual(emergency.emergency_feed('B+', self.thana), [blood_request])
+        blood_request.blood_group_needed = 'A+'
+        blood_request.save()
+        self.assertEqual(emergency.emergency_feed('B+', self.thana), [])
+        self.assertEqual(emergency.emergency_feed('A+', self.thana), [blood_request])
+
+    def test_critical_only_filter_runs_before_the_feed_is_cut(self):
+        for number in range(emergency.FEED_SIZE):
+            self.make_emergency_request(number, 'A+', 'high')
+        critical = self.make_emergency_request(emergency.FEED_SIZE, 'A+', 'critical')
+        feed = emergency.emergency_feed('O-', self.thana, critical_only=True)
+        self.assertEqual(feed, [critical])
+        self.assertEqual(len(emergency.emergency_feed('O-', self.thana)), emergency.FEED_SIZE)
+
+    def test_nearest_first_within_the_district_or_radius(self):
+        home = Thana.objects.create(name='Home', district=self.district, latitude=23.80, longitude=90.40)
+        near = Thana.objects.create(name='Near', district=self.district, latitude=23.85, longitude=90.40)
+        unmapped = Thana.objects.create(name='Unmapped', district=self.district)
+        other_district = District.objects.create(name='Other District')
+        across = Thana.objects.create(name='Across', district=other_district, latitude=23.90, longitude=90.40)
+        far = Thana.objects.create(name='Far', district=other_district, latitude=22.30, longitude=91.80)
+
+        def request_in(number, thana, urgency_level='high'):
+            blood_request = self.make_emergency_request(number, 'A+', urgency_level)
+            blood_request.thana, blood_request.district = thana, thana.district
+            blood_request.latitude = blood_request.longitude = None
+            blood_request.save()
+            return blood_request
+
+        in_unmapped = request_in(1, unmapped, 'critical')
+        in_far = request_in(2, far, 'critical')
+        in_across = request_in(3, across)
+        in_near = request_in(4, near)
+        in_home = request_in(5, home)
+        in_home_critical = request_in(6, home, 'critical')
+
+        with self.assertNumQueries(1):
+            feed = emergency._rank('A+', home, critical_only=False)
+        self.assertEqual(feed, [in_home_critical, in_home, in_near, in_across, in_unmapped])
+        self.assertNotIn(in_far, feed)
+        self.assertAlmostEqual(feed[2].distance_km, 5.56, places=1)
+        self.assertIsNone(feed[-1].distance_km)
+
+
+class RequestEventTests(AdminTestData, TestCase):
+    """The live request stream, for donors signed in with Google"""
+
+    social_backend = 'social_core.backends.google.GoogleOAuth2'
+
+    def setUp(self):
+        super().setUp()
+        self.donor = self.make_donor(1)
+        self.async_client = AsyncClient()
+
+    def test_wsgi_tells_the_browser_not_to_reconnect(self):
+        self.client.force_login(self.donor.user, backend=self.social_backend)
+        response = self.client.get(reverse('request_events'), secure=True)
+        self.assertEqual(response.status_code, 204)
+
+    async def read_stream(self, chunks, headers=None):
+        await self.async_client.aforce_login(self.donor.user, backend=self.social_backend)
+        response = await self.async_client.get(reverse('request_events'), secure=True, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        content = aiter(response.streaming_content)
+        try:
+            return [(await anext(content)).decode() for _ in range(chunks)]
+        finally:
+            await content.aclose()
+
+    async def test_asgi_streams_for_a_social_auth_session(self):
+        [first] = await self.read_stream(1)
+        self.assertTrue(first.startswith('retry: '))
+
+    @override_settings(SSE_KEEPALIVE=1)
+    async def test_replayed_requests_are_not_sent_again(self):
+        seen = await sync_to_async(self.make_emergency_request)(1, 'A+', 'critical')
+        missed = await sync_to_async(self.make_emergency_request)(2, 'A+', 'high')
+        events, _ = await sync_to_async(requests_after)(seen.pk)
+
+        class Hub:
+            # Delivers the missed request live as well, as when it is created
+            # between subscribing and the replay
+            def subscribe(self, subscription):
+                for event in events:
+                    subscription.offer(event)
+
+            def unsubscribe(self, subscription):
+                pass
+
+        with mock.patch.object(views, 'get_request_event_hub', Hub):
+            replay, after = await self.read_stream(2, {'Last-Event-ID': str(seen.pk)})
+        self.assertIn(f'id: {missed.pk}\n', replay)
+        self.assertNotIn(f'id: {seen.pk}\n', replay)
+        self.assertEqual(after, ': keepalive\n\n')
+
+    @override_settings(SSE_KEEPALIVE=1)
+    async def test_hub_delivers_only_requests_the_donor_can_serve(self):
+        served = await sync_to_async(self.make_emergency_request)(1, 'A+', 'critical')
+        other_group = await sync_to_async(self.make_emergency_request)(2, 'B+', 'critical')
+        not_urgent = await sync_to_async(self.make_emergency_request)(3, 'A+', 'medium')
+        events, watermark = await sync_to_async(requests_after)(0)
+
+        class Source:
+            # Everything above is new once the stream is subscribed
+            async def watermark(self):
+                return 0
+
+            async def fetch(self, since):
+                return (events, watermark) if since < watermark else ([], since)
+
+        hub = RequestEventHub(Source(), interval=0)
+        with mock.patch.object(views, 'get_request_event_hub', lambda: hub):
+            _, delivered, after = await self.read_stream(3)
+        self.assertEqual(delivered.splitlines()[:2], [f'id: {served.pk}', 'event: blood-request'])
+        self.assertEqual(json.loads(delivered.splitlines()[2].removeprefix('data: '))['group'], 'A+')
+        # The B+ request came after the A+ one but was never queued
+        self.assertEqual([event['id'] for event in events], [served.pk, other_group.pk])
+        self.assertEqual(after, ': keepalive\n\n')
+        self.assertNotIn(not_urgent.pk, [event['id'] for event in events])
+
+
+@ADMIN_TEST_SETTINGS
+class TrackRequestsTests(AdminTestData, TestCase):
+    """The recipient's tracking page and its JSON poll"""
+
+    def setUp(self):
+        super().setUp()
+        self.recipient = self.make_recipient(1)
+        self.client.force_login(self.recipient.user)
+
+    def make_tracked_request(self, number, **fields):
+        blood_request = self.make_blood_request(number)
+        BloodRequest.objects.filter(pk=blood_request.pk).update(recipient=self.recipient, **fields)
+        return blood_request
+
+    def respond(self, blood_request, count):
+        for number in range(count):
+            DonorResponse.objects.create(donor=self.make_donor(blood_request.pk * 100 + number),
+                                         blood_request=blood_request, response='accept')
+
+    def test_date_filter_covers_whole_days(self):
+        day = datetime.date(2026, 3, 10)
+        late = timezone.make_aware(datetime.datetime.combine(day, datetime.time(23, 30)))
+        inside = self.make_tracked_request(2, created_at=late)
+        self.make_tracked_request(3, created_at=late + datetime.timedelta(hours=1))
+        self.make_tracked_request(4, created_at=late - datetime.timedelta(days=1))
+        response = self.client.get(reverse('track_requests'), {'from_date': '2026-03-10', 'to_date': '2026-03-10'},
+                                   secure=True)
+        self.assertEqual([blood_request.pk for blood_request in response.context['blood_requests']], [inside.pk])
+
+    def test_page_prefetches_only_the_latest_responses(self):
+        blood_request = self.make_tracked_request(2)
+        self.respond(blood_request, 3)
+        with mock.patch.object(views, 'TRACK_REQUEST_RESPONSES', 2):
+            response = self.client.get(reverse('track_requests'), secure=True)
+        [tracked] = response.context['blood_requests']
+        self.assertEqual(tracked.response_count, 3)
+        self.assertEqual(len(tracked.latest_responses), 2)
+        self.assertContains(response, 'Showing the latest 2 of 3 responses.')
+
+    def test_updates_report_requests_with_new_responses(self):
+        old = timezone.now() - datetime.timedelta(hours=1)
+        answered = self.make_tracked_request(2, updated_at=old)
+        self.make_tracked_request(3, updated_at=old)
+        since = views._track_cursor(timezone.now() - datetime.timedelta(minutes=1))
+        self.respond(answered, views.TRACK_LATEST_RESPONDERS + 1)
+        response = self.client.get(reverse('track_requests_updates'), {'since': since}, secure=True)
+        [update] = response.json()['requests']
+        self.assertEqual(update['id'], answered.pk)
+        self.assertEqual(update['responses'], views.TRACK_LATEST_RESPONDERS + 1)
+        self.assertEqual(len(update['latest_responders']), views.TRACK_LATEST_RESPONDERS)
+
+
+@ADMIN_TEST_SETTINGS
+class DonationCounterTests(AdminTestData, TestCase):
+    """The donor's donation counters follow every way a donation record changes"""
+
+    def setUp(self):
+        super().setUp()
+        self.donor = self.make_donor(1)
+        self.donations = [
+            DonationHistory.objects.create(
+                donor=self.donor, donation_date=timezone.now() - datetime.timedelta(days=100 * number),
+                status='completed', hospital_name='Test Hospital', blood_group='A+', location='Test Thana',
+            )
+            for number in range(3)
+        ]
+
+    def assertCompleted(self, count):
+        self.donor.refresh_from_db()
+        self.assertEqual(self.donor.completed_donation_count, count)
+
+    def test_admin_bulk_delete(self):
+        self.assertCompleted(3)
+        url = reverse('admin:roktodanbdweb_donationhistory_changelist')
+        response = self.client.post(url, {
+            'action': 'delete_selected', 'post': 'yes', 'index': '0',
+            '_selected_action': [donation.pk for donation in self.donations[:2]],
+        }, secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertCompleted(1)
+        self.assertEqual(self.donor.last_donation_date, self.donations[2].donation_date)
+
+    def test_queryset_delete_and_reassignment(self):
+        DonationHistory.objects.filter(pk=self.donations[0].pk).delete()
+        self.assertCompleted(2)
+        other = self.make_donor(2)
+        self.donations[1].donor = other
+        self.donations[1].save()
+        self.assertCompleted(1)
+        other.refresh_from_db()
+        self.assertEqual(other.completed_donation_count, 1)
+
+
+class BackfillCoordinatesTests(AdminTestData, TestCase):
+    def test_thanas_without_a_centroid_only_warn(self):
+        self.make_donor(1)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('backfill_coordinates', stdout=stdout, stderr=stderr)
+        self.assertIn('No centroid for Test District / Test Thana (1 donors)', stderr.getvalue())
+        self.assertIn('Coordinates backfilled.', stdout.getvalue())
+
+
+class DonorSearchIndexTests(AdminTestData, TestCase):
+    """The search index follows every donor change, and the migration fills it"""
+
+    def entry(self, donor):
+        return DonorSearchIndex.objects.filter(donor=donor).first()
+
+    def test_tracks_donor_create_update_and_delete(self):
+        donor = self.make_donor(1)
+        self.assertEqual(self.entry(donor).blood_group, 'A+')
+        self.assertTrue(self.entry(donor).is_searchable)
+
+        donor.blood_group = 'O-'
+        donor.is_available = False
+        donor.save()
+        entry = self.entry(donor)
+        self.assertEqual(entry.blood_group, 'O-')
+        self.assertFalse(entry.is_searchable)
+
+        donor.user.first_name = 'Renamed'
+        donor.user.save()
+        self.assertEqual(self.entry(donor).first_name, 'Renamed')
+
+        donor.delete()
+        self.assertFalse(DonorSearchIndex.objects.exists())
+
+    def test_migration_indexes_existing_donors(self):
+        donor = self.make_donor(1)
+        DonorSearchIndex.objects.all().delete()
+        migration = importlib.import_module('roktodanbdweb.migrations.0022_fill_donor_search_index')
+        migration.fill_search_index(django_apps, None)
+        entry = self.entry(donor)
+        self.assertEqual((entry.blood_group, entry.thana_code, entry.phone_number),
+                         ('A+', self.thana.pk, donor.phone_number))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StaleDonorSearchTests(AdminTestData, TestCase):
+    """Cached searches stay fresh across unrelated saves and are served stale after real changes"""
+
+    def setUp(self):
+        super().setUp()
+        self.donor = self.make_donor(1)
+        donor_search._cache.clear()
+        donor_search._cache.shared.clear()
+        # Recompute in the test's thread instead of the background pool
+        patcher = mock.patch.object(donor_search, '_refresh_in_background')
+        self.refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertEqual(len(self.search()[0]), 1)
+
+    def search(self):
+        # Served from the search index rather than the on-disk snapshot
+        with mock.patch.object(donor_search, 'search_donor_ids', return_value=None):
+            return donor_search.donors_in_area('A+', self.thana, self.post_office, self.district)
+
+    def assertFresh(self):
+        donors, stale = self.search()
+        self.assertFalse(stale)
+        self.refresh.assert_not_called()
+        return donors
+
+    def test_unrelated_saves_keep_searches_fresh(self):
+        self.donor.critical_requests_only = False
+        self.donor.save()
+        self.donor.save(update_fields=['critical_requests_only'])
+        # The login pipeline saves the whole user
+        self.donor.user.last_login = timezone.now()
+        self.donor.user.save()
+        self.assertFresh()
+
+    def test_changed_donor_is_served_stale_then_refreshed(self):
+        self.donor.is_available = False
+        self.donor.save()
+        donors, stale = self.search()
+        self.assertTrue(stale)
+        self.assertEqual(len(donors), 1)
+        key, compute = self.refresh.call_args.args
+        donor_search._refresh(key, compute)
+        self.refresh.reset_mock()
+        self.assertEqual(self.assertFresh(), [])
+
+    def test_renamed_donor_retires_searches(self):
+        self.donor.user.first_name = 'Renamed'
+        self.donor.user.save()
+        self.assertTrue(self.search()[1])
+
+
+class AssignmentPlanTests(AdminTestData, TestCase):
+    def test_expired_requests_get_no_donors(self):
+        donor = self.make_donor(1)
+        Donor.objects.filter(pk=donor.pk).update(blood_group='B+', latitude=23.8, longitude=90.4)
+        live, expired = self.make_blood_request(1), self.make_blood_request(2)
+        BloodRequest.objects.filter(pk__in=[live.pk, expired.pk]).update(latitude=23.8, longitude=90.4)
+        BloodRequest.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - datetime.timedelta(hours=1))
+        plan, requests, _ = assignment.plan_for_region()
+        self.assertEqual(set(requests), {live.pk})
+        self.assertEqual([donor_id for donor_id, _ in plan.assignments[live.pk]], [donor.pk])
+
+
+@ADMIN_TEST_SETTINGS
+class ScalableChangelistTests(AdminTestData, TestCase):
+    """Estimated counts and autocomplete filters on large changelists"""
+
+    def setUp(self):
+        super().setUp()
+        self.other_thana = Thana.objects.create(name='Other Thana', district=self.district)
+        self.donors = [self.make_donor(number) for number in range(4)]
+        Donor.objects.filter(pk=self.donors[0].pk).update(thana=self.other_thana)
+
+    def changelist(self, query=None):
+        response = self.client.get(reverse('admin:roktodanbdweb_donor_changelist'), query or {}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_count_is_exact_up_to_the_limit_then_capped(self):
+        paginator = admin_lists.EstimatedCountPaginator(Donor.objects.order_by('pk'), 2)
+        with override_settings(ADMIN_EXACT_COUNT_LIMIT=10):
+            self.assertEqual(paginator.count, 4)
+        paginator = admin_lists.EstimatedCountPaginator(Donor.objects.order_by('pk'), 2)
+        with override_settings(ADMIN_EXACT_COUNT_LIMIT=2):
+            self.assertEqual(paginator.count, 3)
+            self.assertEqual(paginator.num_pages, 2)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_planner_estimate_is_used_above_the_limit_only(self):
+        with mock.patch.object(admin_lists, '_estimated_rows', return_value=50_000):
+            self.assertEqual(admin_lists.EstimatedCountPaginator(Donor.objects.all(), 2).count, 50_000)
+        # A low estimate is not trusted: count up to the limit instead
+        with mock.patch.object(admin_lists, '_estimated_rows', return_value=1):
+            self.assertEqual(admin_lists.EstimatedCountPaginator(Donor.objects.all(), 2).count, 3)
+
+    def test_autocomplete_filter_loads_only_the_selected_row(self):
+        response = self.changelist({'thana__id__exact': self.other_thana.pk, 'blood_group': 'A+'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.donors[0]])
+        [spec] = [spec for spec in response.context['cl'].filter_specs
+                  if isinstance(spec, admin_lists.AutocompleteFilter) and spec.field_path == 'thana']
+        self.assertEqual(spec.lookup_choices, [(self.other_thana.pk, str(self.other_thana))])
+        self.assertEqual(spec.other_params, [('blood_group', 'A+')])
+        self.assertContains(response, 'data-autocomplete-filter')
+        self.assertContains(response, '<input type="hidden" name="blood_group" value="A+">', html=True)
+
+    def test_autocomplete_filter_without_a_selection_loads_no_rows(self):
+        response = self.changelist()
+        specs = [spec for spec in response.context['cl'].filter_specs
+                 if isinstance(spec, admin_lists.AutocompleteFilter)]
+        self.assertEqual([spec.lookup_choices for spec in specs], [[], []])
+
+
+@ADMIN_TEST_SETTINGS
+class PeopleAdminSearchTests(AdminTestData, TestCase):
+    def changelist(self, model, query):
+        url = reverse(f'admin:roktodanbdweb_{model._meta.model_name}_changelist')
+        response = self.client.get(url, {'q': query}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_names_rank_before_address_and_location_matches(self):
+        by_name = self.make_donor(1)
+        by_name.user.first_name = 'Dhanmondi'
+        by_name.user.save()
+        other_thana = Thana.objects.create(name='Dhanmondi', district=self.district)
+        by_thana = self.make_donor(2)
+        Donor.objects.filter(pk=by_thana.pk).update(thana=other_thana)
+        self.make_donor(3)
+        self.assertEqual(self.changelist(Donor, 'dhanmondi'), [by_name, by_thana])
+
+    def test_recipient_by_house_and_district(self):
+        recipient = self.make_recipient(1)
+        Recipient.objects.filter(pk=recipient.pk).update(house_holding_no='42B')
+        self.make_recipient(2)
+        self.assertEqual(self.changelist(Recipient, '42b'), [recipient])
+        self.assertEqual(len(self.changelist(Recipient, 'test district')), 2)
@@ -0,0 +1,241 @@
+# roktodanbdweb/tiered_cache.py
+"""
+Two-tier cache backend: a small in-process LRU (L1) over a shared Django
+cache (L2), configured as the ``tiered`` alias in settings.py.
+
+Reads try L1, then L2, and copy L2 hits into L1. L1 keeps the objects
+themselves rather than pickles, so a hit costs a dict lookup. Treat cached
+values as immutable. L2 stores each value with its expiry time, so an entry
+copied into L1 expires there no later than in L2.
+
+Keys are ``<namespace>:<rest>``. Each namespace has a version stamp in L2,
+and every entry in both tiers records the stamp it was written under.
+``invalidate_namespace`` replaces the stamp with a new random one, and every
+worker on every node stops using the old entries. A plain ``set`` of a value
+never used before needs no atomic increment, so two workers invalidating at
+once cannot both land on the same stamp, whatever the L2 backend. A worker
+re-reads a stamp from L2 at most every STAMP_INTERVAL seconds, so that is
+how long other workers can lag an invalidation. ``delete`` only reaches
+this process's L1 and L2. Invalidate the namespace when other workers must
+forget a key too.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Changed with the layout of L2 entries, so no worker reads an older layout
+_STAMP_KEY = 'tiered-stamp:v2:{}'
+
+
+def new_stamp():
+    """A stamp no namespace has had before, even after its old one was evicted"""
+    return uuid.uuid4().hex
+
+# L1 stores and statistics are per process and shared by its threads, like locmem
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class _LocalStore:
+    def __init__(self):
+        self.entries = OrderedDict()  # key -> (value, expires_at, stamp)
+        self.stamps = {}  # namespace -> (stamp, checked_at)
+        self.lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'default')
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 300)
+        self._stamp_interval = options.get('STAMP_INTERVAL', 1)
+        with _stores_lock:
+            self._store = _stores.setdefault(location, _LocalStore())
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # ---------- namespace stamps ----------
+
+    @staticmethod
+    def namespace(key):
+        return key.split(':', 1)[0]
+
+    def _stamp(self, namespace):
+        store = self._store
+        now = time.monotonic()
+        cached = store.stamps.get(namespace)
+        if cached is not None and now - cached[1] < self._stamp_interval:
+            return cached[0]
+        stamp_key = _STAMP_KEY.format(namespace)
+        stamp = self.shared.get(stamp_key)
+        if stamp is None:
+            self.shared.add(stamp_key, new_stamp(), None)
+            stamp = self.shared.get(stamp_key)
+        store.stamps[namespace] = (stamp, now)
+        return stamp
+
+    def invalidate_namespace(self, namespace):
+        """Retire every entry in ``namespace``, in all processes"""
+        stamp = new_stamp()
+        self.shared.set(_STAMP_KEY.format(namespace), stamp, None)
+        self._store.stamps[namespace] = (stamp, time.monotonic())
+
+    def _shared_key(self, key, stamp):
+        # The shared backend validates the key it is given
+        return f'{stamp}:{key}'
+
+    # ---------- L1 ----------
+
+    def _local_get(self, key, stamp):
+        store = self._store
+        with store.lock:
+            entry = store.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, entry_stamp = entry
+            if entry_stamp != stamp or expires_at <= time.monotonic():
+                del store.entries[key]
+                return None
+            store.entries.move_to_end(key)
+            return entry
+
+    def _local_set(self, key, value, timeout, stamp):
+        local_timeout = self._local_timeout if timeout is None else min(timeout, self._local_timeout)
+        if local_timeout <= 0:
+            return
+        store = self._store
+        with store.lock:
+            store.entries[key] = (value, time.monotonic() + local_timeout, stamp)
+            store.entries.move_to_end(key)
+            while len(store.entries) > self._max_entries:
+                store.entries.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._store.lock:
+            self._store.entries.pop(key, None)
+
+    # ---------- L2 ----------
+
+    @staticmethod
+    def _expiry(timeout):
+        return None if timeout is None else time.time() + timeout
+
+    @staticmethod
+    def _remaining(expires_at):
+        return None if expires_at is None else expires_at - time.time()
+
+    # ---------- cache API ----------
+
+    def get(self, key, default=None, version=None):
+        stamp = self._stamp(self.namespace(key))
+        key = self.make_key(key, version=version)
+        entry = self._local_get(key, stamp)
+        if entry is not None:
+            self._count('l1_hits')
+            return entry[0]
+        shared_entry = self.shared.get(self._shared_key(key, stamp))
+        if shared_entry is None:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        value, expires_at = shared_entry
+        self._local_set(key, value, self._remaining(expires_at), stamp)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        stamp = self._stamp(self.namespace(key))
+        key = self.make_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        self.shared.set(self._shared_key(key, stamp), (value, self._expiry(timeout)), timeout)
+        self._local_set(key, value, timeout, stamp)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        stamp = self._stamp(self.namespace(key))
+        key = self.make_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        added = self.shared.add(self._shared_key(key, stamp), (value, self._expiry(timeout)), timeout)
+        if added:
+            self._local_set(key, value, timeout, stamp)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        # Rewritten rather than touched, so the stored expiry moves too
+        stamp = self._stamp(self.namespace(key))
+        key = self.make_key(key, version=version)
+        shared_key = self._shared_key(key, stamp)
+        shared_entry = self.shared.get(shared_key)
+        if shared_entry is None:
+            return False
+        timeout = self.get_backend_timeout(timeout)
+        self.shared.set(shared_key, (shared_entry[0], self._expiry(timeout)), timeout)
+        self._local_delete(key)
+        return True
+
+    def delete(self, key, version=None):
+        stamp = self._stamp(self.namespace(key))
+        key = self.make_key(key, version=version)
+        self._local_delete(key)
+        return self.shared.delete(self._shared_key(key, stamp))
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def incr(self, key, delta=1, version=None):
+        # Counters live in L2 only; a local copy would go stale across workers.
+        # A read and a write, so not atomic across workers.
+        stamp = self._stamp(self.namespace(key))
+        key = self.make_key(key, version=version)
+        self._local_delete(key)
+        shared_key = self._shared_key(key, stamp)
+        shared_entry = self.shared.get(shared_key)
+        if shared_entry is None:
+            raise ValueError(f"Key '{key}' not found.")
+        value, expires_at = shared_entry
+        value += delta
+        self.shared.set(shared_key, (value, expires_at), self._remaining(expires_at))
+        return value
+
+    def clear(self):
+        """Empty this process's L1. Shared entries are retired by namespace instead."""
+        with self._store.lock:
+            self._store.entries.clear()
+            self._store.stamps.clear()
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+        # None means "forever" for both tiers; L1 still caps it at LOCAL_TIMEOUT
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return timeout
+
+    # ---------- statistics ----------
+
+    def _count(self, counter):
+        store = self._store
+        with store.lock:
+            setattr(store, counter, getattr(store, counter) + 1)
+
+    def stats(self):
+        """Hit counts and ratios for this process since it started"""
+        store = self._store
+        with store.lock:
+            entries, l1_hits, l2_hits, misses = len(store.entries), store.l1_hits, store.l2_hits, store.misses
+        lookups = l1_hits + l2_hits + misses
+        return {
+            'entries': entries,
+            'max_entries': self._max_entries,
+            'l1_hits': l1_hits,
+            'l2_hits': l2_hits,
+            'misses': misses,
+            'l1_hit_ratio': l1_hits / lookups if lookups else None,
+            'hit_ratio': (l1_hits + l2_hits) / lookups if lookups else None,
+        }
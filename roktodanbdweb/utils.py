@@ -565,4 +565,30 @@ RoktoDan BD Team
 
     except Exception as e:
         logger.error(f"Failed to send donor response notification: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+def donation_reminder_email(donor, connection=None):
+    """
+    Donation reminder for one donor, built for ``send_outbox`` to send in a
+    batch over ``connection``
+    """
+    subject = 'RoktoDan BD - You can save a life again'
+    message = f"""
+Dear {donor.full_name},
+
+Thank you for being a RoktoDan BD donor. Patients in {donor.thana} need {donor.blood_group} blood,
+and your donation can save up to three lives.
+
+If you are healthy and your last donation was more than 90 days ago, please consider donating again
+and keep your availability up to date on your dashboard.
+
+Best regards,
+RoktoDan BD Team
+    """
+    return EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[donor.email],
+        connection=connection,
+    )
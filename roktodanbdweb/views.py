@@ -1,16 +1,28 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.contrib.auth import logout as auth_logout, authenticate, login
+from django.urls import reverse
+from django.contrib.auth import logout as auth_logout, authenticate, get_user, login
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.views import View
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.views.decorators.http import require_safe
 from django.utils import timezone
-from datetime import datetime, timedelta
+from django.core.paginator import Paginator
+from django.db.models import Case, Count, Exists, F, IntegerField, Max, OuterRef, Prefetch, Q, Sum, Value, When
+from django.db.models.functions import Greatest, Least
+from asgiref.sync import sync_to_async
+from datetime import datetime, timedelta, timezone as dt_timezone
+import asyncio
 import logging
 
 from .models import (
     Donor, Recipient, DonationHistory, DonorPoints, DonorBadge,
-    PointTransaction, BloodRequest, DonorResponse
+    PointTransaction, BloodRequest, DonorResponse, DonorSearchIndex, Hospital, BLOOD_GROUP_CODES,
+    LIVES_PER_DONATION, UNIVERSAL_DONOR_GROUPS, compatible_for
 )
 from .forms import (
     RecipientRegistrationForm, DonorResponseForm, DonorRegistrationForm
@@ -19,17 +31,47 @@ from .utils import (
     send_registration_email, send_admin_notification,
     send_donor_response_notification, send_blood_request_email_to_donor
 )
+from .locations import get_hierarchy, resolve_location
+from .blood_supply import supply_matrix
+from .donor_bitmaps import (
+    Active, And, Available, BloodGroup, EligibleOn, InDistrict, InThana, Not, Or, WeightAtLeast, query_bitmap_index
+)
+from .donor_search import NEAREST_DONOR_MAX_KM, donors_in_area, donors_near_hospital, search_stats
+from .emergency import emergency_feed
+from .geo import within
+from .hospitals import get_hospital_trie
+from .page_cache import cache_anonymous_page
+from .people_search import search_people
+from .request_events import (
+    QUEUE_SIZE, Subscription, format_event, get_request_event_hub, requests_after
+)
 
 logger = logging.getLogger(__name__)
 
+# Donors also see requests from hospitals this close, outside their own thana
+MATCHING_RADIUS_KM = 5
+BLOOD_REQUEST_PAGE_SIZE = 20
+# Most urgent first
+URGENCY_LEVELS = [level for level, _ in reversed(BloodRequest.URGENCY_CHOICES)]
+URGENCY_RANKS = {level: rank for rank, level in enumerate(URGENCY_LEVELS)}
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+TRACK_REQUESTS_PAGE_SIZE = 10
+TRACK_LATEST_RESPONDERS = 3
+# Responses listed under each request on the tracking page, newest first
+TRACK_REQUEST_RESPONSES = 20
+TRACK_REQUESTS_POLL_OVERLAP = timedelta(seconds=2)
+DONATION_HISTORY_PAGE_SIZE = 20
+
 
 # ==================== PUBLIC VIEWS ====================
 
+@cache_anonymous_page
 def home(request):
     """Home page view"""
     return render(request, 'home.html')
 
 
+@cache_anonymous_page
 def about_us(request):
     """About us page view"""
     return render(request, 'about_us.html')
@@ -172,39 +214,17 @@ def donor_dashboard(request):
         messages.error(request, "Donor profile not found. Please complete your registration.")
         return redirect('donor_registration')
 
-    # Calculate donation statistics
-    total_donations = calculate_total_donations(donor)
-    lives_saved = total_donations * 3  # Assuming each donation saves 3 lives
-
     # Get recent activities
     recent_activities = get_recent_activities(donor)
 
     context = {
         'donor': donor,
-        'total_donations': total_donations,
-        'lives_saved': lives_saved,
+        'total_donations': donor.completed_donation_count,
+        'lives_saved': donor.lives_saved,
         'recent_activities': recent_activities,
     }
 
-    return render(request, 'donors/donor_dashboard.html', context)
-
-
-def calculate_total_donations(donor):
-    """Calculate total number of donations based on donation history"""
-    if not donor.last_donation_month or not donor.last_donation_year:
-        return 0
-
-    try:
-        current_year = datetime.now().year
-        last_donation_year = int(donor.last_donation_year)
-
-        # Rough estimate based on eligibility (can donate every 3 months)
-        years_since_first_donation = current_year - last_donation_year + 1
-        estimated_donations = min(years_since_first_donation * 4, 20)
-
-        return max(1, estimated_donations) if donor.last_donation_year else 0
-    except (ValueError, TypeError):
-        return 0
+    return render(request, 'donor_dashboard.html', context)
 
 
 def get_recent_activities(donor):
@@ -263,6 +283,32 @@ def donor_profile_update(request):
 
 # ==================== DONOR HISTORY ====================
 
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _start_of_day(day):
+    """Midnight of ``day`` in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _history_cursor(donation):
+    """Keyset position of a donation: date (µs) and pk"""
+    donated = int((donation.donation_date - EPOCH) / timedelta(microseconds=1))
+    return f"{donated}.{donation.pk}"
+
+
+def _parse_history_cursor(value):
+    try:
+        donated, pk = (int(part) for part in value.split('.'))
+    except (AttributeError, ValueError):
+        return None
+    return EPOCH + timedelta(microseconds=donated), pk
+
+
 @login_required
 def donor_history(request):
     """Display donor's blood donation history"""
@@ -274,44 +320,58 @@ def donor_history(request):
     # Get all donation history for this donor
     donation_history = DonationHistory.objects.filter(donor=donor)
 
-    # Apply filters if provided
-    from_date = request.GET.get('from_date')
-    to_date = request.GET.get('to_date')
+    # Apply filters if provided. Dates are whole local days, compared as a
+    # datetime range so the (donor, status, donation_date) index applies
+    from_date = _parse_date(request.GET.get('from_date'))
+    to_date = _parse_date(request.GET.get('to_date'))
     status_filter = request.GET.get('status')
 
     if from_date:
-        try:
-            from_date = datetime.strptime(from_date, '%Y-%m-%d').date()
-            donation_history = donation_history.filter(donation_date__date__gte=from_date)
-        except ValueError:
-            pass
+        donation_history = donation_history.filter(donation_date__gte=_start_of_day(from_date))
 
     if to_date:
-        try:
-            to_date = datetime.strptime(to_date, '%Y-%m-%d').date()
-            donation_history = donation_history.filter(donation_date__date__lte=to_date)
-        except ValueError:
-            pass
+        donation_history = donation_history.filter(donation_date__lt=_start_of_day(to_date + timedelta(days=1)))
 
     if status_filter:
         donation_history = donation_history.filter(status=status_filter)
 
-    # Calculate statistics
-    total_donations = donation_history.filter(status='completed').count()
-    lives_saved = total_donations * 3
-
-    # Calculate days since last donation
-    last_donation = donation_history.filter(status='completed').first()
+    # All statistics in one query
+    completed = Q(status='completed')
+    stats = donation_history.aggregate(
+        total_donations=Count('pk', filter=completed),
+        last_donation=Max('donation_date', filter=completed),
+        total_ml=Sum('amount', filter=completed, default=0),
+    )
     days_since_last = None
-    if last_donation:
-        days_since_last = (timezone.now().date() - last_donation.donation_date.date()).days
+    if stats['last_donation']:
+        days_since_last = (timezone.now().date() - stats['last_donation'].date()).days
+
+    # Newest first, a keyset page at a time
+    cursor = _parse_history_cursor(request.GET.get('after'))
+    if cursor:
+        donation_date, pk = cursor
+        donation_history = donation_history.filter(
+            Q(donation_date__lt=donation_date) | Q(donation_date=donation_date, pk__lt=pk)
+        )
+    page = list(donation_history.order_by('-donation_date', '-pk')[:DONATION_HISTORY_PAGE_SIZE + 1])
+    has_next = len(page) > DONATION_HISTORY_PAGE_SIZE
+    page = page[:DONATION_HISTORY_PAGE_SIZE]
 
+    filters = request.GET.copy()
+    filters.pop('after', None)
     context = {
         'donor': donor,
-        'donation_history': donation_history,
-        'total_donations': total_donations,
-        'lives_saved': lives_saved,
+        'donation_history': page,
+        'total_donations': stats['total_donations'],
+        'lives_saved': stats['total_donations'] * LIVES_PER_DONATION,
+        'total_ml': stats['total_ml'],
         'days_since_last': days_since_last,
+        'from_date': from_date,
+        'to_date': to_date,
+        'status_filter': status_filter,
+        'filter_query': filters.urlencode(),
+        'next_cursor': _history_cursor(page[-1]) if has_next else None,
+        'is_first_page': cursor is None,
     }
 
     return render(request, 'donor_history.html', context)
@@ -319,21 +379,86 @@ def donor_history(request):
 
 # ==================== BLOOD REQUESTS ====================
 
+def servable_requests(donor):
+    """
+    Q for the requests a donor can give to: every compatible group, in one
+    indexed IN filter
+    """
+    servable = Q(blood_group_needed__in=compatible_for(donor.blood_group))
+    if donor.blood_group in UNIVERSAL_DONOR_GROUPS and donor.critical_requests_only:
+        # Keep universal donors from being flooded by every request in the area
+        servable = Q(blood_group_needed=donor.blood_group) | (servable & Q(urgency_level='critical'))
+    return servable
+
+
+def _request_cursor(blood_request):
+    """Keyset position of a row: urgency rank, needed-by time (µs) and pk"""
+    needed_by = int((blood_request.needed_by_date - EPOCH) / timedelta(microseconds=1))
+    return f"{URGENCY_RANKS[blood_request.urgency_level]}.{needed_by}.{blood_request.pk}"
+
+
+def _parse_request_cursor(value):
+    try:
+        rank, needed_by, pk = (int(part) for part in value.split('.'))
+    except (AttributeError, ValueError):
+        return None
+    if not 0 <= rank < len(URGENCY_RANKS):
+        return None
+    return rank, EPOCH + timedelta(microseconds=needed_by), pk
+
+
 @login_required
 def blood_request_list(request):
-    """Show blood requests that match donor's blood group"""
+    """
+    Active, unexpired requests the donor can serve and has not answered yet,
+    most urgent first, then soonest needed. Pages are keyset pages: each
+    urgency level is an index range scan on (status, urgency_level,
+    needed_by_date, id) that starts after the ``?after=`` cursor, so deep
+    pages cost the same as the first.
+    """
     try:
         donor = get_object_or_404(Donor, user=request.user)
     except Donor.DoesNotExist:
         messages.error(request, "Donor profile not found.")
         return redirect('donor_registration')
 
+    requests = BloodRequest.objects.filter(
+        servable_requests(donor),
+        status='active',
+        expires_at__gt=timezone.now(),
+    ).filter(
+        ~Exists(DonorResponse.objects.filter(blood_request=OuterRef('pk'), donor=donor))
+    ).annotate(
+        response_count=Count('donor_responses'),
+        units_still_needed=Greatest(
+            F('units_needed') - Count('donor_responses', filter=Q(donor_responses__response='accept')),
+            Value(0),
+        ),
+    ).select_related('thana', 'district')
+
+    cursor = _parse_request_cursor(request.GET.get('after'))
+    start_rank = cursor[0] if cursor else 0
+    page = []
+    # One query per urgency level until the page is full, usually just one
+    for level in URGENCY_LEVELS[start_rank:]:
+        rows = requests.filter(urgency_level=level)
+        if cursor and URGENCY_RANKS[level] == cursor[0]:
+            _, needed_by, pk = cursor
+            rows = rows.filter(Q(needed_by_date__gt=needed_by) | Q(needed_by_date=needed_by, pk__gt=pk))
+        page.extend(rows.order_by('needed_by_date', 'pk')[:BLOOD_REQUEST_PAGE_SIZE + 1 - len(page)])
+        if len(page) > BLOOD_REQUEST_PAGE_SIZE:
+            break
+
+    has_next = len(page) > BLOOD_REQUEST_PAGE_SIZE
+    page = page[:BLOOD_REQUEST_PAGE_SIZE]
     context = {
         'donor': donor,
-        'requests': [],  # Replace with actual blood requests
+        'requests': page,
+        'next_cursor': _request_cursor(page[-1]) if has_next else None,
+        'is_first_page': cursor is None,
     }
 
-    return render(request, 'donors/blood_requests.html', context)
+    return render(request, 'blood_requests.html', context)
 
 
 @login_required
@@ -345,18 +470,24 @@ def emergency_requests(request):
         messages.error(request, "Donor profile not found.")
         return redirect('donor_registration')
 
-    emergency_requests = []  # Replace with actual emergency requests
+    emergency_requests = emergency_feed(
+        donor.blood_group,
+        get_hierarchy().thanas.get(donor.thana_id),
+        # Filtered before the feed is cut to size, so no critical request is lost
+        critical_only=donor.blood_group in UNIVERSAL_DONOR_GROUPS and donor.critical_requests_only,
+    )
 
     context = {
         'donor': donor,
         'emergency_requests': emergency_requests,
     }
 
-    return render(request, 'donors/emergency_requests.html', context)
+    return render(request, 'emergency_requests.html', context)
 
 
 # ==================== FIND BLOOD ====================
 
+@cache_anonymous_page
 def find_blood(request):
     """
     Handle Find Blood functionality:
@@ -375,21 +506,35 @@ def find_blood(request):
     thana = request.GET.get('thana')
     post_office = request.GET.get('post_office')
     district = request.GET.get('district')
+    hospital_id = request.GET.get('hospital', '')
+
+    hospital = None
+    if blood_group and hospital_id.isdigit():
+        hospital = Hospital.objects.filter(pk=hospital_id, is_active=True).exclude(latitude=None).first()
+
+    # True when the results come from the cache past their freshness window
+    results_stale = False
+    if hospital:
+        # Nearest donors to the hospital, regardless of thana boundaries
+        donors, results_stale = donors_near_hospital(hospital, blood_group)
+
+        if donors:
+            messages.success(request, f'Found {len(donors)} available donor(s) near {hospital.name}!')
+        else:
+            messages.warning(request, f'No donors found within {NEAREST_DONOR_MAX_KM} km of {hospital.name}.')
 
     # If all search parameters are provided, search for donors
-    if all([blood_group, thana, post_office, district]):
-        donors = Donor.objects.filter(
-            blood_group=blood_group,
-            thana=thana,
-            post_office=post_office,
-            district=district,
-            is_active=True,
-            is_available=True
-        ).select_related('user').order_by('-registration_date')
+    elif all([blood_group, thana, post_office, district]):
+        # Resolve names to small integer keys in memory so the query filters
+        # on indexed key columns only
+        district_obj, thana_obj, post_office_obj = resolve_location(district, thana, post_office)
+        donors = []
+        if district_obj and thana_obj and post_office_obj and blood_group in BLOOD_GROUP_CODES:
+            donors, results_stale = donors_in_area(blood_group, thana_obj, post_office_obj, district_obj)
 
         # Add success message if donors found
-        if donors.exists():
-            messages.success(request, f'Found {donors.count()} available donor(s) in your area!')
+        if donors:
+            messages.success(request, f'Found {len(donors)} available donor(s) in your area!')
         else:
             messages.warning(request, 'No donors found matching your criteria. Try searching in nearby areas.')
 
@@ -405,9 +550,7 @@ def find_blood(request):
                 blood_group='',
                 house_holding_no='',
                 road_block='',
-                thana='',
-                post_office='',
-                district='Dhaka'
+                district=get_hierarchy().district('Dhaka')
             )
             messages.info(request, 'Welcome! Your recipient profile has been created. You can update it later.')
         except Exception as e:
@@ -415,11 +558,14 @@ def find_blood(request):
 
     context = {
         'donors': donors,
+        'results_stale': results_stale,
+        'hospitals': Hospital.objects.filter(is_active=True).exclude(latitude=None).only('pk', 'name'),
         'search_params': {
             'blood_group': blood_group,
             'thana': thana,
             'post_office': post_office,
             'district': district,
+            'hospital': hospital_id,
         }
     }
 
@@ -437,14 +583,29 @@ def matching(request):
         messages.error(request, "Donor profile not found. Please complete your registration.")
         return redirect('donor_registration')
 
-    # Get compatible blood requests
-    compatible_requests = BloodRequest.objects.filter(
-        blood_group_needed=donor.blood_group,
-        thana=donor.thana,
-        status='active'
+    universal_donor = donor.blood_group in UNIVERSAL_DONOR_GROUPS
+    if request.method == 'POST' and universal_donor:
+        donor.critical_requests_only = request.POST.get('critical_requests_only') == 'on'
+        donor.save(update_fields=['critical_requests_only', 'last_updated'])
+        return redirect('matching')
+
+    active = BloodRequest.objects.filter(servable_requests(donor), status='active')
+
+    # Requests in the donor's thana, plus nearby ones just across a boundary
+    nearby_ids = []
+    if donor.latitude is not None:
+        nearby_ids = list(within(active, donor.latitude, donor.longitude, MATCHING_RADIUS_KM))
+
+    # Exact-type requests first, then by urgency
+    compatible_requests = active.filter(
+        Q(thana_id=donor.thana_id) | Q(pk__in=nearby_ids)
     ).exclude(
         donor_responses__donor=donor
-    ).order_by('-urgency_level', '-created_at')
+    ).annotate(
+        exact_match=Case(When(blood_group_needed=donor.blood_group, then=Value(0)), default=Value(1)),
+        urgency_rank=Case(*[When(urgency_level=level, then=Value(rank))
+                            for level, rank in URGENCY_RANKS.items()]),
+    ).order_by('exact_match', 'urgency_rank', '-created_at')
 
     # Get recent matches
     recent_responses = DonorResponse.objects.filter(
@@ -461,6 +622,7 @@ def matching(request):
         'recent_responses': recent_responses,
         'total_responses': total_responses,
         'accepted_responses': accepted_responses,
+        'universal_donor': universal_donor,
     }
 
     return render(request, 'matching.html', context)
@@ -583,6 +745,10 @@ def request_blood_from_donor(request, donor_id):
             needed_by_date
         )
 
+        # Link the request to the registry hospital (by name or alias) and
+        # locate it there; otherwise it falls back to the thana centroid
+        hospital = get_hospital_trie().match(request.POST.get('hospital_name'))
+
         # Create blood request
         blood_request = BloodRequest.objects.create(
             recipient=recipient,
@@ -592,8 +758,9 @@ def request_blood_from_donor(request, donor_id):
             medical_condition=request.POST.get('medical_condition', ''),
             hospital_name=request.POST.get('hospital_name'),
             hospital_address=request.POST.get('hospital_address'),
-            thana=donor.thana,
-            district=donor.district,
+            hospital=hospital,
+            thana_id=donor.thana_id,
+            district_id=donor.district_id,
             units_needed=int(request.POST.get('units_needed', 1)),
             urgency_level=request.POST.get('urgency_level', 'medium'),
             needed_by_date=needed_by_date,
@@ -602,7 +769,9 @@ def request_blood_from_donor(request, donor_id):
             alternative_contact=request.POST.get('alternative_contact', ''),
             additional_notes=request.POST.get('additional_notes', ''),
             status='active',
-            expires_at=expires_at
+            expires_at=expires_at,
+            latitude=hospital.latitude if hospital and not hospital.approximate_location else None,
+            longitude=hospital.longitude if hospital and not hospital.approximate_location else None
         )
 
         # Send email notification to donor
@@ -632,6 +801,7 @@ def request_blood_from_donor(request, donor_id):
         })
 # ==================== REWARDS ====================
 
+@cache_anonymous_page
 def rewards(request):
     """Rewards page showing points, badges, and withdrawal options"""
     context = {
@@ -644,14 +814,8 @@ def rewards(request):
         # Get or create points account
         points_account, created = DonorPoints.objects.get_or_create(donor=donor)
 
-        # Count completed donations
-        total_donations = DonationHistory.objects.filter(
-            donor=donor,
-            status='completed'
-        ).count()
-
-        # Calculate lives saved
-        lives_saved = total_donations * 3
+        total_donations = donor.completed_donation_count
+        lives_saved = donor.lives_saved
 
         # Earned badges
         earned_badges = DonorBadge.objects.filter(donor=donor).order_by('-earned_date')
@@ -793,8 +957,386 @@ def award_donation_rewards(donor):
     return points_account, donation_count
 
 
+# ==================== LOCATION API ====================
+
+def _location_blob_response(request, blob, cache_control):
+    """Serve a precomputed JSON blob with its ETag, answering 304 when the client has it"""
+    body, etag = blob
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+@require_safe
+def location_index(request):
+    """
+    List districts with the versioned URL of each district's thanas and
+    post offices. Short-lived so clients pick up new versions quickly.
+    """
+    return _location_blob_response(request, get_hierarchy().index_blob, 'public, max-age=300')
+
+
+@require_safe
+def location_district(request, version, district_id):
+    """
+    Thanas and post offices of one district. The URL carries the hierarchy
+    version, so the response never changes and may be cached indefinitely.
+    """
+    hierarchy = get_hierarchy()
+    if version != hierarchy.version:
+        return redirect('location_district', hierarchy.version, district_id)
+
+    blob = hierarchy.district_blob(district_id)
+    if blob is None:
+        return JsonResponse({'error': 'Unknown district'}, status=404)
+    return _location_blob_response(request, blob, 'public, max-age=31536000, immutable')
+
+
+# ==================== HOSPITAL API ====================
+
+@require_safe
+def hospital_autocomplete(request):
+    """
+    Registry hospitals matching the typed prefix (``?q=``), served from the
+    in-memory trie
+    """
+    hospitals = get_hospital_trie().suggest(request.GET.get('q', ''))
+    response = JsonResponse({
+        'results': [
+            {
+                'id': hospital.id,
+                'name': hospital.name,
+                'address': hospital.address,
+                'thana': hospital.thana.name if hospital.thana else '',
+            }
+            for hospital in hospitals
+        ]
+    })
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+# ==================== BLOOD SUPPLY API ====================
+
+@require_safe
+def blood_supply(request):
+    """
+    Donors per thana and blood group, eligible and total, from the
+    materialized matrix
+    """
+    response = JsonResponse(supply_matrix())
+    response['Cache-Control'] = f'public, max-age={settings.BLOOD_SUPPLY_CACHE_TIMEOUT}'
+    return response
+
+
+# ==================== DONOR COUNTS ====================
+
+def _donor_count_filters(params):
+    """
+    The bitmap filters for the query string, by parameter. ``blood_group``,
+    ``district`` and ``thana`` may repeat and match any of their values;
+    ``active``, ``available`` and ``eligible`` take 1 or 0; ``min_weight``
+    is in kg. Raises ValueError for malformed values.
+    """
+    filters = {}
+    for param, make in (('blood_group', BloodGroup), ('district', InDistrict), ('thana', InThana)):
+        values = params.getlist(param)
+        if param == 'blood_group':
+            if not set(values) <= BLOOD_GROUP_CODES.keys():
+                raise ValueError(values)
+        else:
+            values = [int(value) for value in values]
+        if values:
+            filters[param] = Or(*map(make, values))
+    for param, make in (('active', Active), ('available', Available), ('eligible', EligibleOn)):
+        value = params.get(param)
+        if value not in (None, '0', '1'):
+            raise ValueError(value)
+        if value is not None:
+            filters[param] = make() if value == '1' else Not(make())
+    if params.get('min_weight'):
+        filters['min_weight'] = WeightAtLeast(int(params['min_weight']))
+    return filters
+
+
+@staff_member_required
+@require_safe
+def donor_counts(request):
+    """
+    How many donors match the filters in the query string (see
+    _donor_count_filters), with per blood group and per thana counts. Each
+    breakdown ignores its own filter, so it shows what selecting another
+    value would give. Answered from the in-process bitmap index.
+    """
+    try:
+        filters = _donor_count_filters(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid filter parameters'}, status=400)
+
+    def matching(*ignored):
+        return And(*(item for param, item in filters.items() if param not in ignored))
+
+    def count(index):
+        any_group = index.evaluate(matching('blood_group'))
+        any_thana = index.evaluate(matching('thana'))
+        return {
+            'count': index.count(matching()),
+            'by_blood_group': {
+                group: (any_group & index.bitmap('blood_group', group)).bit_count()
+                for group in BLOOD_GROUP_CODES
+            },
+            'by_thana': {
+                thana_id: (any_thana & index.bitmap('thana', thana_id)).bit_count()
+                for thana_id in index.values('thana') if thana_id is not None
+            },
+        }
+
+    counts = query_bitmap_index(count)
+    hierarchy = get_hierarchy()
+    counts['by_thana'] = sorted(
+        ({'id': thana_id, 'name': hierarchy.thana_name(thana_id), 'count': donors}
+         for thana_id, donors in counts['by_thana'].items() if donors),
+        key=lambda thana: (-thana['count'], thana['name']),
+    )
+    response = JsonResponse(counts)
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+# ==================== CACHE STATS ====================
+
+@staff_member_required
+def cache_stats(request):
+    """Hit ratios of this worker's in-process cache tier and donor search health"""
+    return JsonResponse({
+        'tiered': caches['tiered'].stats(),
+        'donor_search': search_stats(),
+    })
+
+
+# ==================== PEOPLE LOOKUP ====================
+
+PEOPLE_LOOKUP_LIMIT = 20
+
+
+@staff_member_required
+@require_safe
+def people_lookup(request):
+    """
+    Donors and recipients matching ``?q=`` (a name in Bengali or Latin
+    spelling, phone digits or email), best matches first
+    """
+    query = request.GET.get('q', '')
+    people = []
+    for model, kind in ((Donor, 'donor'), (Recipient, 'recipient')):
+        matches = search_people(model.objects.select_related('user'), query)
+        for person in matches.order_by('-search_rank', '-pk')[:PEOPLE_LOOKUP_LIMIT]:
+            people.append({
+                'type': kind,
+                'id': person.id,
+                'name': person.full_name,
+                'phone_number': person.phone_number,
+                'blood_group': person.blood_group,
+                'rank': person.search_rank,
+                'admin_url': reverse(f'admin:roktodanbdweb_{kind}_change', args=[person.id]),
+            })
+    people.sort(key=lambda person: person['rank'], reverse=True)
+    response = JsonResponse({'results': people[:PEOPLE_LOOKUP_LIMIT]})
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+# ==================== LIVE EVENTS ====================
+
+async def request_events(request):
+    """
+    Server-Sent Events stream of new high and critical requests the donor can
+    serve in their area. Served by an ASGI server (see start.sh), where each
+    stream is a cheap coroutine fed by the process-wide hub. Under WSGI it
+    answers 204, which tells the browser not to reconnect, rather than hold
+    a worker per donor.
+    """
+    # Not request.auser(): the social-auth backend that signs most donors in
+    # has no async aget_user
+    user = await sync_to_async(get_user)(request)
+    if not user.is_authenticated:
+        return HttpResponse(status=403)
+    donor = await Donor.objects.filter(user=user).afirst()
+    if donor is None:
+        return HttpResponse(status=404)
+
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    subscription = Subscription(donor, MATCHING_RADIUS_KM)
+    retry = f"retry: {int(settings.SSE_POLL_INTERVAL * 1000)}\n\n"
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    # Highest request id sent on this stream
+    sent = last_event_id or 0
+
+    async def missed():
+        # Requests created while the browser was reconnecting
+        nonlocal sent
+        if last_event_id is None:
+            return ''
+        events, _ = await sync_to_async(requests_after)(last_event_id, limit=QUEUE_SIZE)
+        events = [event for event in events if subscription.wants(event)]
+        if events:
+            sent = max(sent, events[-1]['id'])
+        return ''.join(format_event(event) for event in events)
+
+    hub = get_request_event_hub()
+
+    async def stream():
+        nonlocal sent
+        hub.subscribe(subscription)
+        try:
+            yield retry + await missed()
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), settings.SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                # The hub may also deliver what the replay already sent
+                if event['id'] <= sent:
+                    continue
+                sent = event['id']
+                yield format_event(event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ==================== OTHERS VIEWS ====================
 
+def _tracked_requests(recipient, responses):
+    """
+    The recipient's requests with their response tallies and, as
+    ``latest_responses``, their newest ``responses`` responses with the
+    donor, in one annotated query plus one prefetch
+    """
+    latest_responses = DonorResponse.objects.select_related('donor__user').order_by('-response_date', '-pk')
+    return BloodRequest.objects.filter(recipient=recipient).annotate(
+        response_count=Count('donor_responses'),
+        accepted_count=Count('donor_responses', filter=Q(donor_responses__response='accept')),
+        refused_count=Count('donor_responses', filter=Q(donor_responses__response='refuse')),
+        # Each accepting donor pledges one unit
+        units_pledged=Least(
+            Count('donor_responses', filter=Q(donor_responses__response='accept')), F('units_needed'),
+            output_field=IntegerField(),
+        ),
+    ).select_related('thana', 'district').prefetch_related(
+        # Sliced per request with a window function, not in Python
+        Prefetch('donor_responses', queryset=latest_responses[:responses], to_attr='latest_responses')
+    )
+
+
+def _track_cursor(moment):
+    return str(int((moment - EPOCH) / timedelta(microseconds=1)))
+
+
+@login_required
 def track_requests(request):
-    """Track blood requests page"""
-    return render(request, 'track_requests.html')
\ No newline at end of file
+    """The signed-in recipient's blood requests with live response tallies"""
+    recipient = Recipient.objects.filter(user=request.user).first()
+    if recipient is None:
+        messages.error(request, "Recipient profile not found. Please register as a recipient.")
+        return redirect('register_recipient')
+
+    # Taken before reading, so anything committed meanwhile shows up in the next poll
+    cursor = _track_cursor(timezone.now())
+    blood_requests = _tracked_requests(recipient, TRACK_REQUEST_RESPONSES)
+
+    status_filter = request.GET.get('status')
+    urgency_filter = request.GET.get('urgency')
+    if status_filter:
+        blood_requests = blood_requests.filter(status=status_filter)
+    if urgency_filter:
+        blood_requests = blood_requests.filter(urgency_level=urgency_filter)
+    # Bounds on created_at itself rather than its date, so the index is used
+    for param, lookup, days in (('from_date', 'created_at__gte', 0), ('to_date', 'created_at__lt', 1)):
+        try:
+            day = datetime.strptime(request.GET.get(param, ''), '%Y-%m-%d')
+        except ValueError:
+            continue
+        blood_requests = blood_requests.filter(**{lookup: timezone.make_aware(day + timedelta(days=days))})
+
+    paginator = Paginator(blood_requests.order_by('-created_at'), TRACK_REQUESTS_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    # Tallies over all of the recipient's requests, not just the filtered page
+    stats = BloodRequest.objects.filter(recipient=recipient).aggregate(
+        active_requests_count=Count('pk', filter=Q(status='active'), distinct=True),
+        fulfilled_requests_count=Count('pk', filter=Q(status='fulfilled'), distinct=True),
+        expired_requests_count=Count('pk', filter=Q(status='expired'), distinct=True),
+        total_responses_count=Count('donor_responses'),
+    )
+
+    context = {
+        'blood_requests': page_obj.object_list,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+        'updates_cursor': cursor,
+        'responses_shown': TRACK_REQUEST_RESPONSES,
+        **stats,
+    }
+    return render(request, 'track_requests.html', context)
+
+
+@login_required
+@require_safe
+def track_requests_updates(request):
+    """
+    JSON poll for the tracking page: only the recipient's requests that
+    changed (status edits or new donor responses) since ``?since=``, and the
+    cursor to send next time
+    """
+    recipient = Recipient.objects.filter(user=request.user).first()
+    if recipient is None:
+        return JsonResponse({'error': 'Recipient profile not found'}, status=404)
+
+    cursor = timezone.now()
+    try:
+        since = EPOCH + timedelta(microseconds=int(request.GET['since']))
+    except (KeyError, ValueError, OverflowError):
+        return JsonResponse({'error': 'Missing or invalid since cursor'}, status=400)
+    # Overlap slightly so a row committed just after the last poll is not missed
+    since -= TRACK_REQUESTS_POLL_OVERLAP
+
+    changed = _tracked_requests(recipient, TRACK_LATEST_RESPONDERS).annotate(
+        latest_response_at=Max('donor_responses__response_date'),
+    ).filter(Q(updated_at__gt=since) | Q(latest_response_at__gt=since))
+    return JsonResponse({
+        'cursor': _track_cursor(cursor),
+        'requests': [
+            {
+                'id': blood_request.id,
+                'status': blood_request.status,
+                'status_display': blood_request.get_status_display(),
+                'responses': blood_request.response_count,
+                'accepted': blood_request.accepted_count,
+                'refused': blood_request.refused_count,
+                'units_pledged': blood_request.units_pledged,
+                'units_needed': blood_request.units_needed,
+                'time_remaining': blood_request.time_remaining,
+                'latest_responders': [
+                    {'name': response.donor.full_name, 'response': response.response}
+                    for response in blood_request.latest_responses
+                ],
+            }
+            for blood_request in changed
+        ],
+    })
\ No newline at end of file
@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+# Start command. Serves the ASGI application, so each live request event
+# stream (/events/requests/) is a coroutine instead of a blocked worker.
+exec gunicorn roktodanbd.asgi:application \
+    --worker-class uvicorn_worker.UvicornWorker \
+    --bind "0.0.0.0:${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-2}"
@@ -0,0 +1,16 @@
+// Submits an admin AutocompleteFilter (roktodanbdweb/admin_lists.py) as soon
+// as a row is picked. select2 fires jQuery events, so listen through django.jQuery.
+'use strict';
+{
+    const $ = django.jQuery;
+
+    $(function () {
+        $('select[data-autocomplete-filter]').on('change', function () {
+            // A cleared box must not send an empty lookup
+            if (!this.value) {
+                this.disabled = true;
+            }
+            this.form.submit();
+        });
+    });
+}
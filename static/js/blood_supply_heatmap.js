@@ -0,0 +1,96 @@
+// Admin index heatmap: eligible donors per blood group, by district or by
+// thana within one district, shaded by eligible count.
+(function () {
+    var module = document.getElementById('blood-supply');
+    if (!module) {
+        return;
+    }
+    var select = module.querySelector('select');
+    var head = module.querySelector('thead');
+    var body = module.querySelector('tbody');
+    var matrix = null;
+
+    function cell(text, eligible, max) {
+        var td = document.createElement('td');
+        td.className = 'cell';
+        td.textContent = text;
+        // Red shading, strongest where the fewest donors can give
+        var shortage = max ? 1 - eligible / max : 1;
+        td.style.backgroundColor = 'rgba(198, 40, 40, ' + (0.08 + 0.6 * shortage).toFixed(2) + ')';
+        return td;
+    }
+
+    function render() {
+        var district = select.value;
+        var rows;
+        if (district) {
+            rows = matrix.thanas.filter(function (thana) { return thana.district === district; });
+        } else {
+            // Fold thanas into one row per district
+            var byDistrict = {};
+            rows = [];
+            matrix.thanas.forEach(function (thana) {
+                var row = byDistrict[thana.district];
+                if (!row) {
+                    row = byDistrict[thana.district] = {
+                        name: thana.district,
+                        eligible: matrix.groups.map(function () { return 0; }),
+                        total: matrix.groups.map(function () { return 0; })
+                    };
+                    rows.push(row);
+                }
+                matrix.groups.forEach(function (group, i) {
+                    row.eligible[i] += thana.eligible[i];
+                    row.total[i] += thana.total[i];
+                });
+            });
+        }
+
+        var max = 0;
+        rows.forEach(function (row) {
+            row.eligible.forEach(function (count) { max = Math.max(max, count); });
+        });
+
+        body.innerHTML = '';
+        rows.forEach(function (row) {
+            var tr = document.createElement('tr');
+            var name = document.createElement('th');
+            name.textContent = row.name;
+            tr.appendChild(name);
+            matrix.groups.forEach(function (group, i) {
+                tr.appendChild(cell(row.eligible[i] + ' / ' + row.total[i], row.eligible[i], max));
+            });
+            body.appendChild(tr);
+        });
+        module.querySelector('.hint').textContent = 'as of ' + matrix.as_of;
+    }
+
+    fetch(module.dataset.url, {headers: {'Accept': 'application/json'}})
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+            matrix = data;
+            var header = document.createElement('tr');
+            header.appendChild(document.createElement('th'));
+            data.groups.forEach(function (group) {
+                var th = document.createElement('th');
+                th.textContent = group;
+                header.appendChild(th);
+            });
+            head.appendChild(header);
+
+            var districts = [];
+            data.thanas.forEach(function (thana) {
+                if (districts.indexOf(thana.district) === -1) {
+                    districts.push(thana.district);
+                }
+            });
+            districts.forEach(function (name) {
+                var option = document.createElement('option');
+                option.value = name;
+                option.textContent = name;
+                select.appendChild(option);
+            });
+            select.addEventListener('change', render);
+            render();
+        });
+})();
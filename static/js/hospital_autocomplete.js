@@ -0,0 +1,86 @@
+// Hospital name autocomplete backed by the registry API.
+//
+// Usage: give a text input
+//   data-autocomplete-url="{% url 'hospital_autocomplete' %}"
+//   list="<id of an empty datalist>"
+// and optionally data-address-field="<name of the address field>" to fill
+// the address when a suggestion is picked. Listeners are delegated from the
+// document, so forms loaded later (e.g. into a modal) work too.
+(function () {
+    'use strict';
+
+    const DEBOUNCE_MS = 150;
+    // prefix -> results, per page
+    const cache = {};
+    const timers = new WeakMap();
+    const lastResults = new WeakMap();
+
+    function render(input, results) {
+        const datalist = document.getElementById(input.getAttribute('list'));
+        lastResults.set(input, results);
+        if (!datalist) {
+            return;
+        }
+        datalist.innerHTML = '';
+        results.forEach(function (hospital) {
+            const option = document.createElement('option');
+            option.value = hospital.name;
+            if (hospital.thana) {
+                option.label = hospital.thana;
+            }
+            datalist.appendChild(option);
+        });
+    }
+
+    function lookup(input) {
+        const query = input.value.trim().toLowerCase();
+        if (query.length < 2) {
+            render(input, []);
+            return;
+        }
+        if (cache[query]) {
+            render(input, cache[query]);
+            return;
+        }
+        const url = input.dataset.autocompleteUrl + '?q=' + encodeURIComponent(query);
+        fetch(url, {credentials: 'same-origin'})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error('HTTP error! status: ' + response.status);
+                }
+                return response.json();
+            })
+            .then(function (data) {
+                cache[query] = data.results;
+                if (input.value.trim().toLowerCase() === query) {
+                    render(input, data.results);
+                }
+            })
+            .catch(function (error) {
+                console.error('Error loading hospitals:', error);
+            });
+    }
+
+    document.addEventListener('input', function (event) {
+        const input = event.target;
+        if (!input.matches || !input.matches('input[data-autocomplete-url]')) {
+            return;
+        }
+        clearTimeout(timers.get(input));
+        timers.set(input, setTimeout(function () { lookup(input); }, DEBOUNCE_MS));
+    });
+
+    document.addEventListener('change', function (event) {
+        const input = event.target;
+        if (!input.matches || !input.matches('input[data-autocomplete-url]') || !input.dataset.addressField) {
+            return;
+        }
+        const picked = (lastResults.get(input) || []).find(function (hospital) {
+            return hospital.name === input.value;
+        });
+        const address = input.form && input.form.elements[input.dataset.addressField];
+        if (picked && address && !address.value) {
+            address.value = picked.address;
+        }
+    });
+})();
@@ -0,0 +1,112 @@
+// Dependent District -> Thana -> Post Office dropdowns.
+//
+// Usage: give the district <select> the attributes
+//   data-locations-url="{% url 'location_index' %}"
+//   data-thana-select="<id of thana select>"
+//   data-post-office-select="<id of post office select>"
+// and put the currently chosen name on each select as data-selected.
+// Option values stay location names, so forms and search URLs are unchanged.
+(function () {
+    'use strict';
+
+    // District payloads are immutable per version URL; the browser cache
+    // keeps them across pages, this map avoids refetching within a page.
+    const districtCache = {};
+
+    function fetchJSON(url) {
+        return fetch(url, {credentials: 'same-origin'}).then(function (response) {
+            if (!response.ok) {
+                throw new Error('HTTP error! status: ' + response.status);
+            }
+            return response.json();
+        });
+    }
+
+    function fillSelect(select, items, selected) {
+        const placeholder = select.options.length ? select.options[0].cloneNode(true) : null;
+        select.innerHTML = '';
+        if (placeholder && placeholder.value === '') {
+            select.appendChild(placeholder);
+        }
+        items.forEach(function (item) {
+            const option = document.createElement('option');
+            option.value = item.name;
+            option.textContent = item.name;
+            if (item.name === selected) {
+                option.selected = true;
+            }
+            select.appendChild(option);
+        });
+    }
+
+    function setup(districtSelect) {
+        const thanaSelect = document.getElementById(districtSelect.dataset.thanaSelect);
+        const postOfficeSelect = document.getElementById(districtSelect.dataset.postOfficeSelect);
+        let districts = [];
+        let current = null;
+
+        function selectedDistrict() {
+            return districts.find(function (d) { return d.name === districtSelect.value; });
+        }
+
+        function fillPostOffices() {
+            if (!postOfficeSelect || !current) {
+                return;
+            }
+            const thana = current.thanas.find(function (t) { return t.name === thanaSelect.value; });
+            // Post offices without a thana serve the whole district
+            const postOffices = current.post_offices.filter(function (p) {
+                return p.thana === null || (thana && p.thana === thana.id);
+            });
+            fillSelect(postOfficeSelect, postOffices,
+                       postOfficeSelect.value || postOfficeSelect.dataset.selected);
+        }
+
+        function loadDistrict() {
+            const district = selectedDistrict();
+            if (!district) {
+                current = null;
+                if (thanaSelect) { fillSelect(thanaSelect, [], ''); }
+                if (postOfficeSelect) { fillSelect(postOfficeSelect, [], ''); }
+                return;
+            }
+            const cached = districtCache[district.url];
+            const pending = cached ? Promise.resolve(cached) : fetchJSON(district.url);
+            pending.then(function (data) {
+                districtCache[district.url] = data;
+                current = data;
+                if (thanaSelect) {
+                    fillSelect(thanaSelect, data.thanas, thanaSelect.value || thanaSelect.dataset.selected);
+                }
+                fillPostOffices();
+            }).catch(function (error) {
+                console.error('Error loading locations:', error);
+            });
+        }
+
+        fetchJSON(districtSelect.dataset.locationsUrl).then(function (data) {
+            districts = data.districts;
+            fillSelect(districtSelect, districts, districtSelect.value || districtSelect.dataset.selected);
+            loadDistrict();
+        }).catch(function (error) {
+            console.error('Error loading districts:', error);
+        });
+
+        districtSelect.addEventListener('change', function () {
+            [thanaSelect, postOfficeSelect].forEach(function (select) {
+                if (select) {
+                    select.value = '';
+                    delete select.dataset.selected;
+                }
+            });
+            loadDistrict();
+        });
+        if (thanaSelect) {
+            thanaSelect.addEventListener('change', fillPostOffices);
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-locations-url]').forEach(setup);
+    });
+})();
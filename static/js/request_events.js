@@ -0,0 +1,28 @@
+// Live notice of new urgent blood requests (Server-Sent Events).
+// Include on pages with a <div id="live-requests"></div>; each new request the
+// donor can serve is announced there with a link to respond.
+(function () {
+    var container = document.getElementById('live-requests');
+    if (!container || !window.EventSource) {
+        return;
+    }
+
+    var source = new EventSource(container.dataset.url);
+    source.addEventListener('blood-request', function (e) {
+        var request = JSON.parse(e.data);
+        var notice = document.createElement('div');
+        notice.className = 'alert alert-danger live-request urgency-' + request.urgency;
+
+        var text = document.createElement('span');
+        text.textContent = request.urgency.toUpperCase() + ': ' + request.group + ' needed at ' +
+            request.hospital + (request.thana ? ', ' + request.thana : '') + ' ';
+        notice.appendChild(text);
+
+        var link = document.createElement('a');
+        link.href = container.dataset.respondUrl.replace('/0/', '/' + request.id + '/');
+        link.textContent = 'Respond';
+        notice.appendChild(link);
+
+        container.insertBefore(notice, container.firstChild);
+    });
+})();
@@ -0,0 +1,57 @@
+// Keep the request tracking page current without reloading it: poll for
+// requests that changed since the last cursor and patch their cards.
+(function () {
+    var POLL_INTERVAL = 30000;
+    var container = document.querySelector('.track-requests-container[data-updates-url]');
+    if (!container) {
+        return;
+    }
+    var cursor = container.dataset.cursor;
+
+    function update(request) {
+        var card = container.querySelector('.request-card[data-request-id="' + request.id + '"]');
+        if (!card) {
+            return;
+        }
+        if (request.status !== card.dataset.status) {
+            // Status changes move badges and actions around; redraw the page
+            window.location.reload();
+            return;
+        }
+        card.querySelector('.response-summary').textContent =
+            request.accepted + ' accepted, ' + request.refused + ' refused';
+        card.querySelector('.units-pledged').textContent = request.units_pledged + ' / ' + request.units_needed;
+        card.querySelector('.time-remaining').textContent = request.time_remaining;
+
+        if (request.responses > Number(card.dataset.responses)) {
+            card.dataset.responses = request.responses;
+            var notice = card.querySelector('.new-responses') || document.createElement('a');
+            notice.className = 'new-responses';
+            notice.href = window.location.href;
+            notice.textContent = 'New responses (latest: ' + request.latest_responders.map(function (r) {
+                return r.name + ' ' + (r.response === 'accept' ? 'accepted' : 'refused');
+            }).join(', ') + ') - reload to see details';
+            card.querySelector('.request-info').appendChild(notice);
+        }
+    }
+
+    function poll() {
+        if (document.hidden) {
+            return;
+        }
+        fetch(container.dataset.updatesUrl + '?since=' + encodeURIComponent(cursor), {
+            credentials: 'same-origin',
+            headers: {'Accept': 'application/json'}
+        })
+            .then(function (response) { return response.ok ? response.json() : null; })
+            .then(function (data) {
+                if (data) {
+                    cursor = data.cursor;
+                    data.requests.forEach(update);
+                }
+            })
+            .catch(function () {});
+    }
+
+    setInterval(poll, POLL_INTERVAL);
+})();